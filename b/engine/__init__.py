@@ -13,6 +13,7 @@ This directory contains the fundamental layers of the home consciousness:
 - llm calls (llm)
 - operational modes (modes)
 - global constants (constants) - NEW
+- task deadlines (deadline)
 
 Based on the Law of Conscious Bridge:
 the modules maintain the connection between the deep identity and the moment-self.
@@ -26,4 +27,5 @@ __all__ = [
     "llm",
     "modes",
     "constants",
+    "deadline",
 ]
\ No newline at end of file
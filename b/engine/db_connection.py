@@ -5,10 +5,19 @@ from psycopg2.extras import DictCursor
 from pathlib import Path
 from typing import Optional, Any
 
+from engine.deadline import time_budget
+from engine.llm import get_embedding, EMBEDDING_PROVIDER
+
 # --- CONFIGURATION ---
 VECTOR_DIMENSIONS = 768  # Dimension of Google text-embedding-005
 TABLE_NAME = "memories"
 
+# Timeouts: a hung connection must not freeze the calling thread.
+# The statement timeout is shortened to the remaining budget of the caller's deadline.
+DB_CONNECT_TIMEOUT_SECONDS = 10
+DB_STATEMENT_TIMEOUT_MS = 15000
+DB_MIN_STATEMENT_TIMEOUT_MS = 100   # statement_timeout=0 would mean "no limit"
+
 # List of expected columns for validation
 EXPECTED_COLUMNS = {
     "id",
@@ -47,13 +56,23 @@ def _load_db_url() -> str:
         raise RuntimeError(f"CRITICAL ERROR loading DB URL: {e}")
 
 
-def get_db_connection() -> Any:
+def get_db_connection(statement_timeout_ms: Optional[int] = None) -> Any:
     """
     Returns an active database connection.
+    Every statement is limited to 'statement_timeout_ms' (default: DB_STATEMENT_TIMEOUT_MS,
+    capped by the current deadline); 0 disables the limit (schema setup).
     """
     db_url = _load_db_url()
+    if statement_timeout_ms is None:
+        budget = time_budget(DB_STATEMENT_TIMEOUT_MS / 1000.0)
+        statement_timeout_ms = max(DB_MIN_STATEMENT_TIMEOUT_MS, int(budget * 1000))
+    connect_timeout = max(1, int(time_budget(DB_CONNECT_TIMEOUT_SECONDS)))
     try:
-        conn = psycopg2.connect(db_url)
+        conn = psycopg2.connect(
+            db_url,
+            connect_timeout=connect_timeout,
+            options=f"-c statement_timeout={int(statement_timeout_ms)}"
+        )
         conn.autocommit = True  # Important: CREATE statements must run immediately
         return conn
     except Exception as e:
@@ -136,7 +155,8 @@ def check_and_initialize_db() -> None:
     print("[DB] Checking database connection...")
 
     try:
-        conn = get_db_connection()
+        # No statement limit here: building the HNSW index may take a while
+        conn = get_db_connection(statement_timeout_ms=0)
         with conn.cursor() as cur:
             # Check if table exists and is valid
             exists_and_valid = _validate_existing_schema(cur)
@@ -152,6 +172,30 @@ def check_and_initialize_db() -> None:
         sys.exit(1)  # Immediate exit if DB is not healthy
 
 
+def check_embedding_dimensions(provider: Optional[str] = None) -> None:
+    """
+    Startup check: the embedding provider must produce VECTOR_DIMENSIONS-long vectors.
+    A mismatch would break every insert and search, so it stops the system;
+    an unreachable provider is only reported.
+    """
+    provider = provider or EMBEDDING_PROVIDER
+    vector = get_embedding("embedding dimension check", provider=provider)
+
+    if not vector:
+        print(f"[DB] WARNING: embedding check skipped, '{provider}' returned no vector.")
+        return
+
+    if len(vector) != VECTOR_DIMENSIONS:
+        print(
+            f"\n!!! CRITICAL EMBEDDING ERROR !!!\n"
+            f"'{provider}' produces {len(vector)}-dimensional vectors, "
+            f"the '{TABLE_NAME}' table stores {VECTOR_DIMENSIONS}.\n"
+        )
+        sys.exit(1)
+
+    print(f"[DB] Embedding dimension OK ({provider}: {VECTOR_DIMENSIONS}).")
+
+
 # For testing purposes if run standalone
 if __name__ == "__main__":
     check_and_initialize_db()
\ No newline at end of file
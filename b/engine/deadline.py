@@ -0,0 +1,73 @@
+"""
+Request deadlines.
+
+A Deadline is created per Worker task and handed down to every blocking layer
+(MIND, LLM calls, tool dispatch, DB queries). Each layer takes a slice of the
+remaining budget; when the budget runs out the layer degrades (skips a step,
+returns a timeout result) instead of blocking the Worker.
+
+The active deadline is also kept in a context variable (deadline_scope), so layers
+that are not given one explicitly (DB connections, embeddings inside tools) still honour it.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Deadline:
+    def __init__(self, seconds: float, label: str = "task"):
+        self.label = label
+        self.budget = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def slice(self, fraction: float = 1.0, cap: Optional[float] = None) -> float:
+        """Seconds for one step: 'fraction' of what is left, at most 'cap'."""
+        seconds = self.remaining() * fraction
+        return min(seconds, cap) if cap is not None else seconds
+
+    def sub(self, fraction: float = 1.0, cap: Optional[float] = None, label: str = "") -> "Deadline":
+        """Child deadline for a sub-step (never outlives this one)."""
+        return Deadline(self.slice(fraction, cap), label or self.label)
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.label}: {self.remaining():.1f}s of {self.budget:.1f}s left)"
+
+
+_CURRENT: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Makes 'deadline' the current one for the enclosed block (None: keep the current one)."""
+    if deadline is None:
+        yield current_deadline()
+        return
+    token = _CURRENT.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT.reset(token)
+
+
+def time_budget(default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds available for the next blocking step: the current deadline's remaining time,
+    capped by 'default'. Without a deadline, 'default' (None = unlimited).
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    return min(remaining, default) if default is not None else remaining
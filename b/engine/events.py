@@ -0,0 +1,106 @@
+"""
+Internal event bus and timers of the Conductor.
+
+State changes are published as events instead of being discovered by polling state.json:
+publish(topic, **payload) puts {"type": topic, **payload} on every queue subscribed to 'topic'.
+The Conductor subscribes its result_queue, so events arrive in order with the worker and
+input results and it blocks on a single queue.
+
+Timers keeps the Conductor's deadlines (the proactive cycle): the Conductor blocks on its
+queue until the next one is due (timeout()) and handles the due ones with pop_due().
+"""
+
+import heapq
+import logging
+import threading
+import time
+from itertools import count
+from queue import Queue
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- TOPICS ---
+MODE_CHANGED = "mode_changed"  # modes.update_state: mode_id, previous_mode_id, intent, summary
+
+_subscribers: Dict[str, List[Queue]] = {}
+_lock = threading.Lock()
+
+
+# --------------------------------------------------------------------
+# BUS
+# --------------------------------------------------------------------
+def subscribe(topic: str, queue: Queue):
+    """Events of 'topic' are put on 'queue' from now on (once per queue)."""
+    with _lock:
+        queues = _subscribers.setdefault(topic, [])
+        if queue not in queues:
+            queues.append(queue)
+
+
+def unsubscribe(topic: str, queue: Queue):
+    with _lock:
+        queues = _subscribers.get(topic, [])
+        if queue in queues:
+            queues.remove(queue)
+
+
+def publish(topic: str, **payload: Any) -> int:
+    """Puts the event on every subscribed queue; returns the number of subscribers reached."""
+    with _lock:
+        queues = list(_subscribers.get(topic, ()))
+    event = {"type": topic, **payload}
+    for queue in queues:
+        queue.put(event)
+    logger.debug(f"Event '{topic}' published to {len(queues)} subscriber(s).")
+    return len(queues)
+
+
+# --------------------------------------------------------------------
+# TIMERS
+# --------------------------------------------------------------------
+class Timers:
+    """
+    Named one-shot timers on the monotonic clock (a heap; re-scheduling a name replaces it).
+    Not thread-safe: owned by the loop that waits on them.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._due: Dict[str, float] = {}
+        self._seq = count()
+
+    def schedule_at(self, name: str, due: float):
+        """(Re)schedules 'name' at the monotonic time 'due'."""
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, next(self._seq), name))
+
+    def schedule(self, name: str, delay: float):
+        self.schedule_at(name, time.monotonic() + delay)
+
+    def cancel(self, name: str):
+        self._due.pop(name, None)
+
+    def _drop_stale(self):
+        # Entries replaced by a later schedule() or cancelled stay in the heap until they surface
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def timeout(self) -> Optional[float]:
+        """Seconds until the next timer is due (0 if one is overdue, None without timers)."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def pop_due(self) -> List[str]:
+        """Names of the timers that are due, removed from the set."""
+        now = time.monotonic()
+        names = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, name = heapq.heappop(self._heap)
+            del self._due[name]
+            names.append(name)
+            self._drop_stale()
+        return names
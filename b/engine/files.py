@@ -1,9 +1,14 @@
 import json
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# name -> (stamp, data) of load_json_cached
+_JSON_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_JSON_CACHE_LOCK = threading.Lock()
+
 def load_json(name: str, default: Any) -> Any:
     """Loads a JSON file relative to the base directory."""
     path = BASE_DIR / name
@@ -16,4 +21,30 @@ def save_json(name: str, data: Any) -> None:
     """Saves data to a JSON file relative to the base directory."""
     path = BASE_DIR / name
     with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def file_stamp(name) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file relative to the base directory (or absolute); None if missing."""
+    try:
+        st = (BASE_DIR / name).stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def load_json_cached(name: str, default: Any) -> Any:
+    """
+    load_json, re-read only when the file's stamp changed. Every caller gets the SAME object
+    while the file is unchanged: treat it as read-only (copy before modifying).
+    prompts/block_cache.py relies on that identity to reuse rendered prompt sections.
+    """
+    stamp = file_stamp(name)
+    if stamp is None:
+        return default
+    with _JSON_CACHE_LOCK:
+        cached = _JSON_CACHE.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    data = load_json(name, default)
+    with _JSON_CACHE_LOCK:
+        _JSON_CACHE[name] = (stamp, data)
+    return data
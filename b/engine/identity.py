@@ -3,12 +3,13 @@
 # ================================================================================
 
 from typing import Dict, Any, List
-from .files import load_json, save_json
+from .files import load_json_cached, save_json
 
 IDENTITY_FILE = "identity.json"
 
 def load_identity() -> Dict[str, Any]:
-    return load_json(IDENTITY_FILE, {
+    # Shared while identity.json is unchanged (read-only; see files.load_json_cached)
+    return load_json_cached(IDENTITY_FILE, {
         "version": "1.0",
         "laws": [],
         "meta": {}
@@ -0,0 +1,63 @@
+"""
+engine.llm - Unified LLM access layer.
+
+Exports the provider configuration, the async API (acall_llm, aget_embedding),
+the blocking wrappers used by the thread-based callers (call_llm, get_embedding)
+the streaming variants (stream_llm, astream_llm), the call journal (last_calls)
+and the per-call-site routes (get_route).
+"""
+
+from .config import DEFAULT_PROVIDER, EMBEDDING_PROVIDER, PROVIDER_CONFIG
+from .aio import (
+    acall_llm,
+    aget_embedding,
+    call_llm,
+    get_embedding,
+    get_loop,
+    run_sync,
+    run_concurrently
+)
+from .routing import LLMCallError, get_provider_stats, stats_snapshot, primary_provider
+from .ratelimit import wait_time_snapshot
+from .streaming import astream_llm, astream_call_llm, stream_llm, ReplyStreamExtractor
+from .clients import warm_up
+from .prompt_cache import cache_stats
+from .metrics import metrics_snapshot, render_prometheus, export_metrics
+from .scheduler import scheduler_snapshot, priority_scope
+from .routes import get_route, routes_snapshot
+from .journal import last_calls, last_call, journal_stats, flush_journal
+
+__all__ = [
+    "DEFAULT_PROVIDER",
+    "EMBEDDING_PROVIDER",
+    "PROVIDER_CONFIG",
+    "acall_llm",
+    "aget_embedding",
+    "call_llm",
+    "get_embedding",
+    "get_loop",
+    "run_sync",
+    "run_concurrently",
+    "warm_up",
+    "LLMCallError",
+    "get_provider_stats",
+    "stats_snapshot",
+    "wait_time_snapshot",
+    "cache_stats",
+    "metrics_snapshot",
+    "render_prometheus",
+    "export_metrics",
+    "scheduler_snapshot",
+    "priority_scope",
+    "get_route",
+    "primary_provider",
+    "routes_snapshot",
+    "astream_llm",
+    "astream_call_llm",
+    "stream_llm",
+    "ReplyStreamExtractor",
+    "last_calls",
+    "last_call",
+    "journal_stats",
+    "flush_journal"
+]
@@ -0,0 +1,327 @@
+"""
+Native asyncio LLM layer.
+
+Every provider call runs on ONE shared event loop living in a daemon thread ("LLMLoop").
+- acall_llm / aget_embedding: coroutines, usable with asyncio.gather for independent calls.
+- call_llm / get_embedding: blocking wrappers for the thread-based callers (Worker, Monologue, Memory).
+- A priority scheduler caps in-flight requests per provider and serves the reply first (scheduler.py).
+- Fallback chains and hedging per call site (routing.py).
+- Every call is recorded by the background journal (journal.py).
+- Optional schema validation with a cheap repair call (structured.py).
+- Every call has a timeout; the sync wrappers derive it from the caller's task deadline (engine/deadline.py).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+
+from .config import (
+    PROVIDER_CONFIG,
+    EMBEDDING_PROVIDER,
+    SCHEMA_REPAIR_ENABLED,
+    SCHEMA_REPAIR_MIN_SECONDS,
+    CALL_TIMEOUT_SECONDS,
+    EMBEDDING_TIMEOUT_SECONDS
+)
+from .providers import aembed
+from .routing import aroute_completion, primary_provider, LLMCallError
+from .routes import get_route
+from .ratelimit import with_retries
+from .parsing import parse_json_response
+from .structured import validate_output, build_repair_prompt, to_response_dict, record_outcome
+from .journal import record_call
+from .prompt_cache import observe_prefix, record_cache_usage
+from .metrics import record_llm_call, record_embedding
+from .callinfo import CALLER_THREAD
+from .scheduler import CALL_PRIORITY, priority_for
+from ..deadline import time_budget
+
+logger = logging.getLogger(__name__)
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_THREAD: Optional[threading.Thread] = None
+_LOOP_LOCK = threading.Lock()
+
+
+# ====================================================================
+# SHARED EVENT LOOP
+# ====================================================================
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the shared LLM event loop, starting its thread on first use.
+    """
+    global _LOOP, _LOOP_THREAD
+
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=_run, daemon=True, name="LLMLoop")
+            thread.start()
+            ready.wait()
+
+            _LOOP, _LOOP_THREAD = loop, thread
+
+    return _LOOP
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Runs a coroutine on the shared loop and blocks the calling thread until it finishes.
+    Must not be called from the loop thread itself (it would deadlock).
+    """
+    loop = get_loop()
+    if threading.current_thread() is _LOOP_THREAD:
+        coro.close()
+        raise RuntimeError("run_sync() called from the LLM loop thread. Await the coroutine instead.")
+
+    caller = threading.current_thread().name
+
+    async def _as_caller():
+        # Tasks spawned by the coroutine inherit this context
+        CALLER_THREAD.set(caller)
+        return await coro
+
+    future = asyncio.run_coroutine_threadsafe(_as_caller(), loop)
+    return future.result(timeout)
+
+
+def run_concurrently(*coros: Coroutine) -> List[Any]:
+    """
+    Runs independent coroutines together on the shared loop.
+    Results keep the input order; a failed coroutine returns its exception in place.
+    """
+    async def _gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    return run_sync(_gather())
+
+
+# ====================================================================
+# ASYNC API
+# ====================================================================
+
+async def _acomplete_recorded(
+        prompt: str,
+        provider: Optional[str],
+        call_site: str,
+        json_mode: bool,
+        cache_prefix: Optional[str] = None,
+        schema=None
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Routed completion with metrics and journal.
+    Without an explicit 'provider' the call site's route (routes.py) picks it.
+    Returns (raw_text, None) on success, (None, error response dict) if every provider failed.
+    """
+    route = get_route(call_site)
+    extra = {"prefix_hash": observe_prefix(call_site, cache_prefix)} if cache_prefix else None
+    started = time.perf_counter()
+    try:
+        completion = await aroute_completion(
+            prompt, provider=provider or route.get("provider"), call_site=call_site, json_mode=json_mode,
+            cache_prefix=cache_prefix, schema=schema, route=route
+        )
+    except LLMCallError as e:
+        model_name = PROVIDER_CONFIG.get(e.provider, {}).get("model", "")
+        latency = time.perf_counter() - started
+        record_llm_call(call_site, e.provider, model_name, latency, len(prompt), 0, status="error")
+        record_call(
+            call_site, e.provider, model_name, prompt, "", latency, json_mode=json_mode, error=str(e), extra=extra
+        )
+        return None, {"reply": f"CRITICAL ERROR ({e.provider}): {e}", "tools": []}
+
+    # --- MONITORING: metrics in memory, journal queued for its thread, no disk I/O here ---
+    raw_response_text = completion["text"] or ""
+    latency = time.perf_counter() - started
+    record_cache_usage(completion["provider"], completion["usage"])
+    record_llm_call(
+        call_site, completion["provider"], completion["model"], latency,
+        len(prompt), len(raw_response_text), usage=completion["usage"]
+    )
+    record_call(
+        call_site, completion["provider"], completion["model"], prompt, raw_response_text,
+        latency, usage=completion["usage"], json_mode=json_mode, extra=extra
+    )
+    return raw_response_text, None
+
+
+def timeout_response(call_site: str, provider: Optional[str], prompt: str, timeout: float,
+                     json_mode: bool = True, partial: str = "") -> Dict[str, Any]:
+    """Records a call that ran out of time and returns the standard reply dict (flagged 'timed_out')."""
+    provider = provider or primary_provider(call_site)
+    model_name = PROVIDER_CONFIG.get(provider, {}).get("model", "")
+    record_llm_call(call_site, provider, model_name, timeout, len(prompt), len(partial), status="timeout")
+    record_call(
+        call_site, provider, model_name, prompt, partial, timeout,
+        json_mode=json_mode, error=f"timeout after {timeout:.1f}s"
+    )
+    logger.warning(f"LLM call timed out [{call_site}] after {timeout:.1f}s.")
+    return {"reply": f"TIMEOUT ({call_site}): no answer within {timeout:.1f}s", "tools": [], "timed_out": True}
+
+
+async def afinish_structured(
+        raw_response_text: str,
+        schema,
+        call_site: str,
+        timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Validates a JSON answer against 'schema'. On failure runs one repair call (call site "repair")
+    with only the broken text, the schema and the error, if 'timeout' leaves room for it.
+    If that fails too, the loosely parsed dict is returned, exactly as without a schema.
+    """
+    model, error = validate_output(schema, raw_response_text)
+    if model is not None:
+        record_outcome(call_site, "ok")
+        return to_response_dict(model)
+
+    logger.warning(f"Schema validation failed [{call_site}] ({schema.__name__}): {error[:300]}")
+    if SCHEMA_REPAIR_ENABLED and (timeout is None or timeout >= SCHEMA_REPAIR_MIN_SECONDS):
+        try:
+            repaired_text, _ = await asyncio.wait_for(_acomplete_recorded(
+                build_repair_prompt(schema, raw_response_text, error), None, "repair", True, schema=schema
+            ), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Schema repair timed out [{call_site}].")
+            repaired_text = None
+        if repaired_text is not None:
+            model, error = validate_output(schema, repaired_text)
+            if model is not None:
+                record_outcome(call_site, "repaired")
+                return to_response_dict(model)
+            logger.warning(f"Schema repair failed [{call_site}]: {error[:300]}")
+
+    record_outcome(call_site, "failed")
+    return parse_json_response(raw_response_text, call_site=call_site)
+
+
+async def acall_llm(
+        prompt: str,
+        provider: Optional[str] = None,
+        json_mode: bool = True,
+        call_site: str = "default",
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Unified LLM call (async).
+    Supports extended provider keys (e.g., 'groq_oss').
+    'call_site' selects the route (provider, model, sampling; routes.py) and the fallback chain
+    (and hedging) in routing.py. An explicit 'provider' overrides the route's provider.
+    'cache_prefix' is the static leading part of 'prompt' (see prompt_cache.py).
+    'schema' (pydantic model, JSON mode only) enables native structured output and validation (structured.py).
+    'timeout' bounds the whole call (default CALL_TIMEOUT_SECONDS); running out returns a 'timed_out' reply.
+    'priority' overrides the scheduler class of the call site (scheduler.py).
+    """
+    if provider and provider not in PROVIDER_CONFIG:
+        return {"reply": f"ERROR: Unknown provider: {provider}", "tools": []}
+
+    # Inherited by every task of this call (hedges, schema repair)
+    priority_token = CALL_PRIORITY.set(priority_for(call_site, priority))
+    try:
+        timeout = CALL_TIMEOUT_SECONDS if timeout is None else max(0.0, timeout)
+        expires = time.monotonic() + timeout
+        try:
+            raw_response_text, error_response = await asyncio.wait_for(_acomplete_recorded(
+                prompt, provider, call_site, json_mode, cache_prefix, schema if json_mode else None
+            ), timeout)
+        except asyncio.TimeoutError:
+            return timeout_response(call_site, provider, prompt, timeout, json_mode)
+        if error_response is not None:
+            return error_response
+
+        # Processing (JSON vs RAW)
+        if not json_mode:
+            return {"reply": raw_response_text, "tools": []}
+
+        if schema is not None:
+            return await afinish_structured(raw_response_text, schema, call_site, timeout=expires - time.monotonic())
+
+        return parse_json_response(raw_response_text, call_site=call_site)
+    finally:
+        CALL_PRIORITY.reset(priority_token)
+
+
+async def aget_embedding(
+        text: str,
+        provider: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> List[float]:
+    text = (text or "").strip()
+    if not text: return []
+
+    # No failover here: vectors of different models are not comparable
+    provider = provider or EMBEDDING_PROVIDER
+    started = time.perf_counter()
+    timeout = EMBEDDING_TIMEOUT_SECONDS if timeout is None else max(0.0, timeout)
+    priority_token = CALL_PRIORITY.set(priority_for("embedding", priority))
+    try:
+        vector = await asyncio.wait_for(with_retries(provider, text, lambda: aembed(provider, text)), timeout)
+    except asyncio.TimeoutError:
+        record_embedding(provider, time.perf_counter() - started, status="timeout")
+        logger.warning(f"Embedding timed out after {timeout:.1f}s.")
+        return []
+    except Exception as e:
+        record_embedding(provider, time.perf_counter() - started, status="error")
+        print(f"Embedding error: {e}")
+        return []
+    finally:
+        CALL_PRIORITY.reset(priority_token)
+
+    record_embedding(provider, time.perf_counter() - started)
+    return vector
+
+
+# ====================================================================
+# SYNC WRAPPERS (Backward compatible API)
+# ====================================================================
+
+def call_llm(
+        prompt: str,
+        provider: Optional[str] = None,
+        json_mode: bool = True,
+        call_site: str = "default",
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Unified LLM call.
+    Blocking wrapper around acall_llm for the thread-based callers.
+    Without an explicit 'timeout' the remaining budget of the caller's deadline applies.
+    """
+    if timeout is None:
+        timeout = time_budget(CALL_TIMEOUT_SECONDS)
+    return run_sync(acall_llm(
+        prompt, provider=provider, json_mode=json_mode, call_site=call_site,
+        cache_prefix=cache_prefix, schema=schema, timeout=timeout, priority=priority
+    ))
+
+
+def get_embedding(
+        text: str,
+        provider: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> List[float]:
+    """
+    Blocking wrapper around aget_embedding (timeout as in call_llm).
+    Without an explicit 'priority' the caller's class (priority_scope) applies, else "embedding"'s.
+    """
+    if timeout is None:
+        timeout = time_budget(EMBEDDING_TIMEOUT_SECONDS)
+    return run_sync(aget_embedding(text, provider=provider, timeout=timeout, priority=priority))
@@ -0,0 +1,450 @@
+"""
+Offline batch jobs (memory backfill, re-extraction with a new prompt, re-embedding).
+
+A job lives in BATCH_DIR/<job_id>/:
+- requests.jsonl   one request per line: {"custom_id", "prompt"} (chat) or {"custom_id", "text"} (embedding)
+- results.jsonl    one normalized result per line: {"custom_id", "text" | "embedding" | "error"}
+- applied.txt      custom_ids already handed to the job's handler (the resume checkpoint)
+- job.json         kind, provider, backend, request options, batch id, status
+
+Backends:
+- "provider": the OpenAI-protocol Batch API (files + batches) of OpenAI / Groq. Runs on the
+  provider's batch quota, not through the interactive rate limits.
+- "local": executes the requests on the shared LLM loop, BATCH_LOCAL_CONCURRENCY at a time at
+  scheduler priority "batch" (Gemini, self-hosted servers, mock_server.py). An interrupted run
+  continues with the requests that have no result yet.
+
+Everything is restartable: create_job() on an existing id reopens the job, run_job() submits
+only if needed, polls, and applies only the results that are not in applied.txt yet.
+Individual requests are not journaled (a backfill would flood the journal); metrics are kept.
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .config import (
+    PROVIDER_CONFIG,
+    DEFAULT_PROVIDER,
+    EMBEDDING_PROVIDER,
+    BATCH_DIR,
+    BATCH_POLL_SECONDS,
+    BATCH_LOCAL_POLL_SECONDS,
+    BATCH_COMPLETION_WINDOW,
+    BATCH_LOCAL_CONCURRENCY,
+    get_client_type,
+    get_base_url
+)
+from .clients import BASE_DIR, get_async_client
+from .providers import acomplete, aembed
+from .ratelimit import with_retries
+from .routes import get_route, request_options
+from .scheduler import CALL_PRIORITY
+from .metrics import counter, record_llm_call, record_embedding
+from .aio import run_sync, run_concurrently
+
+logger = logging.getLogger(__name__)
+
+BATCH_PRIORITY = "batch"
+BATCH_REQUESTS = counter(
+    "llm_batch_requests_total", "Batch job requests by outcome.", ("kind", "backend", "outcome")
+)
+
+# Local executor threads of this process, by job id
+_LOCAL_RUNS: Dict[str, threading.Thread] = {}
+_LOCAL_LOCK = threading.Lock()
+
+
+# ====================================================================
+# JOB STORAGE
+# ====================================================================
+
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut by a crash while appending
+                logger.warning(f"Batch: skipped a broken line in {path.name}.")
+
+
+def _append_jsonl(path: Path, records: Iterable[Dict[str, Any]]):
+    with path.open("a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class BatchJob:
+    """File-backed state of one batch job (see the module docstring for the layout)."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.dir = BASE_DIR / BATCH_DIR / job_id
+        self.requests_path = self.dir / "requests.jsonl"
+        self.results_path = self.dir / "results.jsonl"
+        self.applied_path = self.dir / "applied.txt"
+        self.state_path = self.dir / "job.json"
+        self.state: Dict[str, Any] = {}
+        if self.state_path.exists():
+            with self.state_path.open("r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.state)
+
+    @property
+    def status(self) -> str:
+        return self.state.get("status", "created")
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        tmp.replace(self.state_path)
+
+    def set_status(self, status: str, **extra):
+        self.state.update(extra, status=status, updated_at=time.time())
+        self.save()
+
+    def requests(self) -> Iterator[Dict[str, Any]]:
+        return _read_jsonl(self.requests_path)
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Results by custom_id (a later line wins)."""
+        return {r["custom_id"]: r for r in _read_jsonl(self.results_path) if "custom_id" in r}
+
+    def applied_ids(self) -> set:
+        if not self.applied_path.exists():
+            return set()
+        with self.applied_path.open("r", encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def summary(self) -> Dict[str, Any]:
+        results = self.results()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "backend": self.state.get("backend"),
+            "provider": self.state.get("provider"),
+            "requests": self.state.get("request_count", 0),
+            "results": len(results),
+            "errors": sum(1 for r in results.values() if "error" in r),
+            "applied": len(self.applied_ids())
+        }
+
+
+def _backend_for(provider: str) -> str:
+    if get_client_type(provider) in ("openai", "groq") and not get_base_url(provider):
+        return "provider"
+    return "local"
+
+
+def create_job(
+        job_id: str,
+        requests: Iterable[Dict[str, Any]],
+        kind: str = "chat",
+        provider: Optional[str] = None,
+        call_site: str = "batch",
+        json_mode: bool = True
+) -> BatchJob:
+    """
+    Writes a new job ('requests' need "custom_id" and "prompt" / "text").
+    An existing job with this id is reopened as it is (its requests are not rewritten).
+    Chat jobs take provider, model and sampling from the route of 'call_site';
+    embedding jobs use EMBEDDING_PROVIDER.
+    """
+    job = BatchJob(job_id)
+    if job.exists:
+        logger.info(f"Batch job '{job_id}' resumed ({job.status}).")
+        return job
+
+    if kind not in ("chat", "embedding"):
+        raise ValueError(f"Unknown batch job kind: {kind}")
+    route = get_route(call_site) if kind == "chat" else {}
+    provider = provider or route.get("provider") or (EMBEDDING_PROVIDER if kind == "embedding" else DEFAULT_PROVIDER)
+    if provider not in PROVIDER_CONFIG:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    job.dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    seen = set()
+    with job.requests_path.open("w", encoding="utf-8") as f:
+        for request in requests:
+            if request["custom_id"] in seen:
+                raise ValueError(f"Duplicate custom_id in batch job '{job_id}': {request['custom_id']}")
+            seen.add(request["custom_id"])
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            count += 1
+
+    job.state = {
+        "job_id": job_id,
+        "kind": kind,
+        "provider": provider,
+        "backend": _backend_for(provider),
+        "call_site": call_site,
+        "json_mode": json_mode,
+        "options": request_options(route, provider) if kind == "chat" else {},
+        "request_count": count,
+        "created_at": time.time()
+    }
+    job.set_status("created")
+    logger.info(f"Batch job '{job_id}' created: {count} {kind} requests via {provider} ({job.state['backend']}).")
+    return job
+
+
+# ====================================================================
+# LOCAL EXECUTOR
+# ====================================================================
+
+async def _aexecute(state: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+    """One request of a local job. No failover: a job stays on one model."""
+    provider = state["provider"]
+    custom_id = request["custom_id"]
+    token = CALL_PRIORITY.set(BATCH_PRIORITY)
+    started = time.perf_counter()
+    try:
+        if state["kind"] == "embedding":
+            text = request["text"]
+            vector = await with_retries(provider, text, lambda: aembed(provider, text))
+            record_embedding(provider, time.perf_counter() - started, status="ok" if vector else "error")
+            if not vector:
+                return {"custom_id": custom_id, "error": "empty embedding"}
+            return {"custom_id": custom_id, "embedding": vector}
+
+        prompt = request["prompt"]
+        completion = await with_retries(provider, prompt, lambda: acomplete(
+            provider, prompt, state.get("json_mode", True), options=state.get("options")
+        ))
+        text = completion["text"] or ""
+        record_llm_call(
+            state["call_site"], provider, completion["model"], time.perf_counter() - started,
+            len(prompt), len(text), usage=completion["usage"]
+        )
+        return {"custom_id": custom_id, "text": text}
+    except Exception as e:
+        return {"custom_id": custom_id, "error": str(e)[:500]}
+    finally:
+        CALL_PRIORITY.reset(token)
+
+
+def _run_local(job: BatchJob):
+    done = set(job.results())
+    pending = [r for r in job.requests() if r["custom_id"] not in done]
+    logger.info(f"Batch job '{job.job_id}': local executor started ({len(pending)} requests left).")
+
+    for i in range(0, len(pending), BATCH_LOCAL_CONCURRENCY):
+        chunk = pending[i:i + BATCH_LOCAL_CONCURRENCY]
+        outputs = run_concurrently(*[_aexecute(job.state, request) for request in chunk])
+        records = []
+        for request, output in zip(chunk, outputs):
+            if isinstance(output, BaseException):
+                output = {"custom_id": request["custom_id"], "error": str(output)[:500]}
+            records.append(output)
+            BATCH_REQUESTS.inc(kind=job.state["kind"], backend="local", outcome="error" if "error" in output else "ok")
+        _append_jsonl(job.results_path, records)
+
+
+def _start_local(job: BatchJob):
+    with _LOCAL_LOCK:
+        thread = _LOCAL_RUNS.get(job.job_id)
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=_run_local, args=(job,), name=f"Batch-{job.job_id}", daemon=True)
+        _LOCAL_RUNS[job.job_id] = thread
+        thread.start()
+
+
+def _poll_local(job: BatchJob) -> str:
+    with _LOCAL_LOCK:
+        thread = _LOCAL_RUNS.get(job.job_id)
+    if thread is not None and thread.is_alive():
+        return "in_progress"
+    if len(job.results()) >= job.state.get("request_count", 0):
+        return "completed"
+    # Interrupted (crash, restart): continue with the requests that have no result yet
+    _start_local(job)
+    return "in_progress"
+
+
+# ====================================================================
+# PROVIDER BATCH API (OpenAI protocol: OpenAI, Groq)
+# ====================================================================
+
+def _provider_line(state: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+    config = PROVIDER_CONFIG[state["provider"]]
+    if state["kind"] == "embedding":
+        body = {"model": config["embedding_model"], "input": request["text"]}
+        if config.get("embedding_dimensions"):
+            body["dimensions"] = config["embedding_dimensions"]
+        url = "/v1/embeddings"
+    else:
+        options = state.get("options") or {}
+        body = {
+            "model": options.get("model") or config["model"],
+            "messages": [{"role": "user", "content": request["prompt"]}],
+            "temperature": options.get("temperature")
+        }
+        if options.get("max_tokens"):
+            body["max_tokens"] = options["max_tokens"]
+        if state.get("json_mode", True):
+            body["response_format"] = {"type": "json_object"}
+        url = "/v1/chat/completions"
+    return {"custom_id": request["custom_id"], "method": "POST", "url": url, "body": body}
+
+
+def _normalize_provider_result(kind: str, line: Dict[str, Any]) -> Dict[str, Any]:
+    custom_id = line.get("custom_id")
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    if line.get("error") or (response.get("status_code") or 200) >= 400:
+        error = line.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+        return {"custom_id": custom_id, "error": json.dumps(error, ensure_ascii=False)[:500]}
+    try:
+        if kind == "embedding":
+            return {"custom_id": custom_id, "embedding": body["data"][0]["embedding"]}
+        return {"custom_id": custom_id, "text": body["choices"][0]["message"]["content"] or ""}
+    except (KeyError, IndexError, TypeError) as e:
+        return {"custom_id": custom_id, "error": f"Unexpected batch output: {e}"}
+
+
+def _submit_provider(job: BatchJob) -> str:
+    state = job.state
+    lines = [_provider_line(state, request) for request in job.requests()]
+    payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+    endpoint = lines[0]["url"] if lines else "/v1/chat/completions"
+
+    async def _asubmit():
+        client = get_async_client(state["provider"])
+        uploaded = await client.files.create(file=(f"{job.job_id}.jsonl", payload), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=uploaded.id, endpoint=endpoint, completion_window=BATCH_COMPLETION_WINDOW
+        )
+        return batch.id
+
+    return run_sync(_asubmit())
+
+
+def _poll_provider(job: BatchJob) -> str:
+    state = job.state
+
+    async def _apoll():
+        client = get_async_client(state["provider"])
+        batch = await client.batches.retrieve(state["batch_id"])
+        if batch.status != "completed":
+            return batch.status, []
+        lines: List[str] = []
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                content = await client.files.content(file_id)
+                lines.extend(content.text.splitlines())
+        return batch.status, lines
+
+    status, lines = run_sync(_apoll())
+    if status in ("failed", "expired", "cancelled"):
+        logger.error(f"Batch job '{job.job_id}': provider batch {state['batch_id']} {status}.")
+        return "failed"
+    if status != "completed":
+        return "in_progress"
+
+    records = [_normalize_provider_result(state["kind"], json.loads(line)) for line in lines if line.strip()]
+    for record in records:
+        BATCH_REQUESTS.inc(kind=state["kind"], backend="provider", outcome="error" if "error" in record else "ok")
+    # Rewritten as a whole: the provider returns every result at once
+    with job.results_path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return "completed"
+
+
+# ====================================================================
+# PUBLIC API
+# ====================================================================
+
+def submit_job(job: BatchJob):
+    """Starts the job on its backend (no-op for a job that already runs or finished)."""
+    if job.status != "created":
+        return
+    if job.state["backend"] == "provider":
+        batch_id = _submit_provider(job)
+        job.set_status("in_progress", batch_id=batch_id)
+        logger.info(f"Batch job '{job.job_id}' submitted to {job.state['provider']}: {batch_id}")
+    else:
+        job.set_status("in_progress")
+        _start_local(job)
+
+
+def poll_job(job: BatchJob) -> str:
+    """Updates and returns the job status: created | in_progress | completed | failed."""
+    if job.status != "in_progress":
+        return job.status
+    if job.state["backend"] == "provider":
+        status = _poll_provider(job)
+    else:
+        status = _poll_local(job)
+    if status != job.status:
+        job.set_status(status)
+    return status
+
+
+def apply_results(job: BatchJob, handler: Callable[[Dict[str, Any], Dict[str, Any]], None]) -> Dict[str, int]:
+    """
+    Hands every successful result not applied yet to 'handler(request, result)' and checkpoints it.
+    A result whose handler raises stays unapplied (retried on the next call); error results are counted.
+    """
+    counts = {"applied": 0, "failed": 0}
+    results = job.results()
+    applied = job.applied_ids()
+    todo = [cid for cid, r in results.items() if cid not in applied and "error" not in r]
+    counts["failed"] = sum(1 for r in results.values() if "error" in r)
+    if not todo:
+        return counts
+
+    todo_ids = set(todo)
+    requests = {r["custom_id"]: r for r in job.requests() if r["custom_id"] in todo_ids}
+    with job.applied_path.open("a", encoding="utf-8") as checkpoint:
+        for custom_id in todo:
+            try:
+                handler(requests.get(custom_id, {"custom_id": custom_id}), results[custom_id])
+            except Exception as e:
+                logger.error(f"Batch job '{job.job_id}': applying '{custom_id}' failed: {e}")
+                continue
+            checkpoint.write(custom_id + "\n")
+            checkpoint.flush()
+            counts["applied"] += 1
+    return counts
+
+
+def run_job(
+        job: BatchJob,
+        handler: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+        poll_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Submits (if needed), polls until the job is finished and applies the results with 'handler'.
+    Local jobs stream: results are applied while the job runs. Returns job.summary().
+    """
+    if poll_seconds is None:
+        poll_seconds = BATCH_POLL_SECONDS if job.state.get("backend") == "provider" else BATCH_LOCAL_POLL_SECONDS
+    submit_job(job)
+    while True:
+        status = poll_job(job)
+        if handler is not None:
+            apply_results(job, handler)
+        if status in ("completed", "failed"):
+            break
+        time.sleep(poll_seconds)
+
+    summary = job.summary()
+    logger.info(f"Batch job '{job.job_id}' finished: {summary}")
+    return summary
@@ -0,0 +1,15 @@
+"""
+Per-call context carried across the thread -> event loop hop.
+run_sync() stores the calling thread's name here, so records produced on the
+loop thread (journal, metrics) can tell which thread (Worker, Monologue, ...) asked.
+"""
+
+import contextvars
+import threading
+
+CALLER_THREAD: contextvars.ContextVar = contextvars.ContextVar("llm_caller_thread", default="")
+
+
+def current_caller() -> str:
+    """Name of the thread that issued the current LLM call."""
+    return CALLER_THREAD.get() or threading.current_thread().name
@@ -0,0 +1,204 @@
+"""
+Client / model registry.
+
+- One SDK client per provider key, created lazily under a lock (get_async_client).
+- OpenAI and Groq clients share one keep-alive HTTP connection pool (HTTP_POOL).
+- Gemini GenerativeModel objects are cached per (provider, model, generation_config).
+- warm_up() builds everything up front, so the first real call pays no setup cost.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .config import (
+    PROVIDER_CONFIG, HTTP_POOL, HTTP_TIMEOUT_SECONDS, DEFAULT_TEMPERATURE,
+    get_client_type, get_base_url, is_openai_compatible
+)
+
+# Importing external libraries
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
+
+try:
+    from groq import AsyncGroq
+except ImportError:
+    AsyncGroq = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# b/ directory (engine/llm/ -> engine/ -> b/)
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Async clients are bound to the shared event loop (see aio.py): they are used from the
+# loop thread only, but creation is locked so warm_up() and first calls cannot race.
+_ACTIVE_CLIENTS: Dict[str, Any] = {}
+_MODELS: Dict[Tuple, Any] = {}
+_HTTP_CLIENT = None
+_REGISTRY_LOCK = threading.RLock()
+
+
+def _load_api_key(provider: str) -> str:
+    config = PROVIDER_CONFIG.get(provider)
+    if not config:
+        raise ValueError(f"Unknown provider configuration: {provider}")
+    if config.get("api_key"):
+        return config["api_key"]
+    key_key = config.get("env_key")
+    if not key_key:
+        raise RuntimeError(f"No API key configured for '{provider}'.")
+
+    token_path = BASE_DIR.parent / "tokens" / "project_token.json"
+
+    if not token_path.exists():
+        raise RuntimeError(f"Token file not found: {token_path}")
+
+    with token_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    api_key = data.get(key_key)
+
+    if not api_key:
+        raise RuntimeError(f"{key_key} not found in project_token.json file.")
+
+    return api_key
+
+
+def _shared_http_client():
+    """Keep-alive connection pool shared by the OpenAI-protocol SDK clients (None -> SDK default)."""
+    global _HTTP_CLIENT
+    if httpx is None:
+        return None
+    if _HTTP_CLIENT is None:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            limits=httpx.Limits(**HTTP_POOL),
+            timeout=HTTP_TIMEOUT_SECONDS
+        )
+    return _HTTP_CLIENT
+
+
+def get_async_client(provider: str):
+    """
+    Returns the cached async client for a provider (creating it on first use).
+    For Google the SDK is module-level, so only the API key is configured.
+    """
+    client = _ACTIVE_CLIENTS.get(provider)
+    if client is not None:
+        return client
+
+    with _REGISTRY_LOCK:
+        if provider in _ACTIVE_CLIENTS:
+            return _ACTIVE_CLIENTS[provider]
+
+        # Handle alias providers (groq_llama -> uses groq client logic)
+        real_provider_type = get_client_type(provider)
+        base_url = get_base_url(provider)
+        if is_openai_compatible(provider) and not base_url:
+            raise ValueError(f"Provider '{provider}' is openai_compatible but has no base_url.")
+
+        if base_url:
+            # OpenAI-compatible endpoint (local server, mock server): the key is optional
+            try:
+                api_key = _load_api_key(provider)
+            except (RuntimeError, ValueError):
+                api_key = "not-needed"
+        else:
+            api_key = _load_api_key(provider)
+
+        if real_provider_type == "openai":
+            if AsyncOpenAI is None: raise ImportError("OpenAI module missing.")
+            # Retries are handled centrally (ratelimit.py), not by the SDK
+            client = AsyncOpenAI(
+                api_key=api_key, base_url=base_url or None, max_retries=0, http_client=_shared_http_client()
+            )
+
+        elif real_provider_type == "groq":
+            if AsyncGroq is None: raise ImportError("Groq module missing.")
+            client = AsyncGroq(api_key=api_key, max_retries=0, http_client=_shared_http_client())
+
+        elif real_provider_type == "google":
+            if genai is None: raise ImportError("Google GenerativeAI module missing.")
+            genai.configure(api_key=api_key)
+            client = genai
+
+        else:
+            raise ValueError(f"Unsupported provider client init: {provider}")
+
+        _ACTIVE_CLIENTS[provider] = client  # Cached by alias name (groq_llama and groq get separate clients)
+        return client
+
+
+def config_key(generation_config: Dict[str, Any]) -> str:
+    """Hashable form of a generation config (values may be nested, e.g. a response_schema)."""
+    return json.dumps(generation_config, sort_keys=True, default=str)
+
+
+def get_generative_model(provider: str, model_name: str, generation_config: Dict[str, Any]):
+    """
+    Cached Gemini GenerativeModel for one (provider, model, generation_config) combination.
+    The model object is immutable configuration, so reusing it across calls is safe.
+    """
+    key = (provider, model_name, config_key(generation_config))
+    model = _MODELS.get(key)
+    if model is not None:
+        return model
+
+    client = get_async_client(provider)
+    with _REGISTRY_LOCK:
+        if key not in _MODELS:
+            _MODELS[key] = client.GenerativeModel(
+                model_name=model_name,
+                generation_config=dict(generation_config)
+            )
+        return _MODELS[key]
+
+
+def gemini_generation_config(
+        json_mode: bool,
+        response_schema: Optional[Dict[str, Any]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_output_tokens: Optional[int] = None
+) -> Dict[str, Any]:
+    gen_config = {"temperature": temperature}
+    if max_output_tokens:
+        gen_config["max_output_tokens"] = max_output_tokens
+    if json_mode:
+        gen_config["response_mime_type"] = "application/json"
+        if response_schema:
+            gen_config["response_schema"] = response_schema
+    return gen_config
+
+
+def warm_up(providers: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Creates the clients (and the Gemini models for both JSON and text mode) ahead of the first call.
+    Failures are reported, not raised: a provider without a key just stays cold.
+    Returns {provider: "ok" | error message}.
+    """
+    status: Dict[str, str] = {}
+    for provider in providers or PROVIDER_CONFIG.keys():
+        try:
+            get_async_client(provider)
+            if get_client_type(provider) == "google":
+                model_name = PROVIDER_CONFIG[provider]["model"]
+                for json_mode in (True, False):
+                    get_generative_model(provider, model_name, gemini_generation_config(json_mode))
+            status[provider] = "ok"
+        except Exception as e:
+            status[provider] = str(e)
+            logger.warning(f"LLM warm-up failed for '{provider}': {e}")
+    return status
@@ -0,0 +1,236 @@
+"""
+Provider configuration for the LLM layer.
+Single Source of Truth for provider keys, models and concurrency limits.
+"""
+
+import os
+
+# ====================================================================
+# CONFIGURATION
+# ====================================================================
+
+DEFAULT_PROVIDER = "google"
+
+PROVIDER_CONFIG = {
+    "google": {
+        "model": "gemini-2.0-flash",
+        "embedding_model": "models/text-embedding-004",
+        "env_key": "GOOGLE_API_KEY"
+    },
+    "openai": {
+        "model": "gpt-4o-mini",
+        "embedding_model": "text-embedding-3-small",
+        "embedding_dimensions": 768,  # text-embedding-3 models can shorten to the DB's vector size
+        "env_key": "OPENAI_API_KEY"
+    },
+    # Default Groq (fallback)
+    "groq": {
+        "model": "llama-3.3-70b-versatile",
+        "env_key": "GROQ_API_KEY"
+    },
+    # Specific Persona: LLAMA (Creative)
+    "groq_llama": {
+        "model": "llama-3.3-70b-versatile",
+        "env_key": "GROQ_API_KEY"
+    },
+    # Specific Persona: OSS (Logical/Alternative - using Mixtral)
+    "groq_oss": {
+        "model": "mixtral-8x7b-32768",
+        "env_key": "GROQ_API_KEY"
+    },
+    # Co-located OpenAI-compatible server (vLLM, llama.cpp server, Ollama, mock_server.py).
+    # Used only where a route points at it, e.g. llm_routes.json:
+    #   {"call_sites": {"extract": {"provider": "local"}, "monologue": {"provider": "local"}}}
+    "local": {
+        "type": "openai_compatible",
+        "base_url": "http://127.0.0.1:8000/v1",
+        "model": "qwen2.5-7b-instruct",
+        "embedding_model": "nomic-embed-text"
+    }
+}
+# "type": "openai_compatible" needs "base_url"; the key is optional ("api_key" inline or "env_key"
+# in project_token.json) and the provider has no client-side rate limit unless RATE_LIMITS names it.
+# Any other provider can carry a "base_url" too (e.g. "http://127.0.0.1:8765/v1"); it is then spoken to
+# with the OpenAI protocol, whatever its key. The env variable below redirects ALL providers
+# (offline load tests against engine/llm/mock_server.py).
+BASE_URL_ENV = "AI_HOME_LLM_BASE_URL"
+OPENAI_COMPATIBLE = "openai_compatible"
+
+# --- EMBEDDINGS ---
+# One provider for every memory vector: vectors of different models are not comparable, so
+# changing it needs a re-embedding of the table. Its dimension is checked against
+# VECTOR_DIMENSIONS (engine/db_connection.py) at startup.
+EMBEDDING_PROVIDER = DEFAULT_PROVIDER
+
+# --- CONCURRENCY ---
+# Maximum number of in-flight requests per provider key on the shared event loop.
+# Aliases (groq_llama, groq_oss) get their own slot count, but share the API key.
+PROVIDER_CONCURRENCY = {
+    "google": 4,
+    "openai": 4,
+    "groq": 2,
+    "groq_llama": 1,
+    "groq_oss": 1,
+    "local": 8
+}
+DEFAULT_CONCURRENCY = 2
+
+# --- SCHEDULER (PRIORITIES) ---
+# Every provider request waits for a slot in scheduler.py; queued calls are admitted
+# highest class first. Call sites not listed get DEFAULT_PRIORITY.
+PRIORITY_CLASSES = ["interactive", "mind", "tool", "memory", "monologue", "batch"]
+CALL_SITE_PRIORITY = {
+    "reply": "interactive",
+    "mind.main": "mind",
+    "mind.creative": "mind",
+    "mind.fused": "mind",
+    "mind.router": "mind",
+    "proactive": "tool",
+    "knowledge.ask": "tool",
+    "game.persona": "tool",
+    "extract": "memory",
+    "embedding": "memory",
+    "monologue": "monologue",
+    "batch": "batch"
+}
+DEFAULT_PRIORITY = "tool"
+# Queued calls of these classes wait while an interactive call waits for the same provider (at most this long)
+PREEMPTIBLE_PRIORITIES = {"memory", "monologue", "batch"}
+PREEMPT_HOLD_MAX_SECONDS = 20.0
+
+# --- CALL SITE ROUTES (provider / model / sampling per call site) ---
+# Resolved by routes.py. Keys: "provider", "model" (only used on that provider, a failover
+# falls back to the provider's own model), "temperature", "max_tokens" (None = provider default).
+# Overridable per mode (MODE_CONFIG[mode]["llm_routes"]) and at runtime in ROUTES_FILE.
+# An explicit provider argument (personas) beats the table.
+DEFAULT_TEMPERATURE = 0.7
+CALL_SITE_ROUTES = {
+    "reply": {"provider": "google", "temperature": 0.7},
+    "mind.main": {"provider": "google", "temperature": 0.7},
+    "mind.creative": {"provider": "openai", "temperature": 1.0},
+    "mind.fused": {"provider": "google", "temperature": 0.8},
+    # Optional turn classifier of engine/mind_router.py: a small co-located model, no failover
+    "mind.router": {"provider": "local", "temperature": 0.0, "max_tokens": 32},
+    "proactive": {"provider": "google", "temperature": 0.7},
+    "monologue": {"provider": "google", "temperature": 0.9},
+    "knowledge.ask": {"provider": "google", "temperature": 0.3},
+    # Classification-like, short output: the cheapest fast model
+    "extract": {"provider": "google", "model": "gemini-2.0-flash-lite", "temperature": 0.2, "max_tokens": 1024},
+    "repair": {"provider": "google", "model": "gemini-2.0-flash-lite", "temperature": 0.0}
+}
+ROUTES_FILE = "llm_routes.json"          # Relative to b/; {"call_sites": {...}, "modes": {mode: {...}}}
+ROUTES_RELOAD_CHECK_SECONDS = 2.0        # mtime of ROUTES_FILE is re-checked this often
+
+# --- ROUTING (FAILOVER & HEDGING) ---
+# Ordered fallback chains per call site. The requested provider is always tried first,
+# then the rest of the chain. An empty chain means: no fallback (e.g. personas).
+FALLBACK_CHAINS = {
+    "default": ["google", "openai", "groq"],
+    "mind.creative": ["openai", "groq", "google"],
+    # Structured output repair: short prompt, the cheapest fast model first
+    "repair": ["google", "openai"],
+    "mind.router": [],
+    "game.persona": []
+}
+
+# Call sites where a slow primary is raced against the next provider in the chain.
+HEDGE_CALL_SITES = {"reply", "proactive", "mind.main", "mind.fused"}
+
+# The hedge fires after the primary's p95 latency (needs this many samples first).
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY_SECONDS = 8.0
+LATENCY_WINDOW = 200
+
+# --- RATE LIMITS (CLIENT SIDE) ---
+# Per client type: requests and estimated tokens per minute.
+# Providers sharing an API key (groq, groq_llama, groq_oss) share one limiter.
+RATE_LIMITS = {
+    "google": {"rpm": 1000, "tpm": 1000000},
+    "openai": {"rpm": 500, "tpm": 200000},
+    "groq": {"rpm": 30, "tpm": 12000}
+}
+# Tokens reserved for the answer on top of the prompt estimate
+EXPECTED_OUTPUT_TOKENS = 800
+
+# --- RETRY / BACKOFF (429 and 5xx) ---
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+
+# --- HTTP CONNECTION POOL (OpenAI / Groq) ---
+# One keep-alive pool shared by the SDK clients; connections are reused across calls.
+HTTP_POOL = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 120.0
+}
+HTTP_TIMEOUT_SECONDS = 120.0
+
+# --- CALL TIMEOUTS ---
+# Upper bound for one call_llm / stream_llm / get_embedding (incl. retries and failover).
+# A task deadline (engine/deadline.py) shortens it to the remaining budget.
+CALL_TIMEOUT_SECONDS = 120.0
+EMBEDDING_TIMEOUT_SECONDS = 30.0
+
+# --- PROMPT PREFIX CACHING ---
+# Prompts are built as static prefix + dynamic suffix (prompts/*_parts) and the prefix is passed
+# as 'cache_prefix'. OpenAI / Groq cache identical prefixes automatically; Gemini gets an
+# explicit CachedContent handle once the prefix proved stable and is large enough.
+CONTEXT_CACHE_ENABLED = True
+CONTEXT_CACHE_TTL_SECONDS = 900
+CONTEXT_CACHE_MIN_TOKENS = 4096   # Smaller prefixes are rejected by the API / not worth a handle
+CONTEXT_CACHE_MIN_REPEATS = 2     # Prefix must be seen this often before a handle is created
+CONTEXT_CACHE_MAX_HANDLES = 16
+
+# --- STRUCTURED OUTPUT (call_llm(..., schema=Model)) ---
+# On a validation failure one repair call (call site "repair") fixes the JSON
+# instead of re-running the full prompt. False -> the unvalidated dict is returned.
+SCHEMA_REPAIR_ENABLED = True
+SCHEMA_REPAIR_MIN_SECONDS = 3.0   # Skip the repair if less time is left before the call's timeout
+
+# --- BATCH JOBS (offline bulk work: backfill, re-extraction, re-embedding; batch.py) ---
+# OpenAI / Groq without a base_url use the provider's Batch API (own quota, not the interactive
+# rate limits); every other provider runs the job on the local executor at priority "batch".
+BATCH_DIR = "batch_jobs"                # Relative to b/; one folder per job
+BATCH_POLL_SECONDS = 30.0
+BATCH_LOCAL_POLL_SECONDS = 1.0          # Local jobs: results are applied while the job runs
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_LOCAL_CONCURRENCY = 8             # Requests in flight at once on the local executor
+
+# --- METRICS (in-process registry, exported to files; no server) ---
+METRICS_EXPORT_ENABLED = True
+METRICS_DIR = "logs/metrics"            # Relative to b/ (llm.prom + llm_metrics.json)
+METRICS_EXPORT_INTERVAL_SECONDS = 60.0
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+SIZE_BUCKETS = (1000, 4000, 16000, 64000, 128000, 256000)  # characters
+
+# --- CALL JOURNAL (replaces the old last_llm_call_<model>.json files) ---
+# Records are queued and written by a background thread into rotating JSONL segments.
+JOURNAL_ENABLED = True
+JOURNAL_DIR = "logs/llm_journal"        # Relative to b/
+JOURNAL_SAMPLE_RATE = 1.0               # Share of successful calls journaled (errors always are)
+JOURNAL_COMPRESS = True                 # Closed segments are gzipped
+JOURNAL_SEGMENT_MAX_BYTES = 5 * 1024 * 1024
+JOURNAL_MAX_TOTAL_BYTES = 200 * 1024 * 1024  # Oldest segments are deleted above this
+JOURNAL_QUEUE_SIZE = 1000               # Records beyond this are dropped (never blocks a call)
+JOURNAL_RING_SIZE = 50                  # In-memory "last calls" view
+
+
+def get_base_url(provider: str) -> str:
+    """OpenAI-compatible endpoint of a provider ("" = the provider's own API)."""
+    return os.environ.get(BASE_URL_ENV) or PROVIDER_CONFIG.get(provider, {}).get("base_url", "")
+
+
+def is_openai_compatible(provider: str) -> bool:
+    """Self-hosted OpenAI-protocol server (PROVIDER_CONFIG "type": "openai_compatible")."""
+    return PROVIDER_CONFIG.get(provider, {}).get("type") == OPENAI_COMPATIBLE
+
+
+def get_client_type(provider: str) -> str:
+    """
+    Maps an extended provider key to its client implementation.
+    (groq_llama -> groq, groq_oss -> groq, openai_compatible or anything with a base_url -> openai)
+    """
+    if is_openai_compatible(provider) or get_base_url(provider):
+        return "openai"
+    return "groq" if "groq" in provider else provider
@@ -0,0 +1,274 @@
+"""
+LLM call journal.
+
+Replaces the old synchronous 'last_llm_call_<model>.json' dumps:
+- record_call() never touches the disk; it pushes the record into a bounded queue
+  (dropping it if the queue is full) and into an in-memory ring buffer.
+- A daemon thread ("LLMJournal") drains the queue into rotating JSONL segments under
+  b/logs/llm_journal/, gzip-compressing closed segments and deleting the oldest ones
+  above the total size cap.
+- last_calls() / last_call() serve the "what did the model just see" view from the ring.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    JOURNAL_ENABLED,
+    JOURNAL_DIR,
+    JOURNAL_SAMPLE_RATE,
+    JOURNAL_COMPRESS,
+    JOURNAL_SEGMENT_MAX_BYTES,
+    JOURNAL_MAX_TOTAL_BYTES,
+    JOURNAL_QUEUE_SIZE,
+    JOURNAL_RING_SIZE
+)
+from .clients import BASE_DIR
+from .callinfo import current_caller
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+_QUEUE: "queue.Queue" = queue.Queue(maxsize=JOURNAL_QUEUE_SIZE)
+_RING: deque = deque(maxlen=JOURNAL_RING_SIZE)
+_RING_LOCK = threading.Lock()
+
+_WRITER_THREAD: Optional[threading.Thread] = None
+_WRITER_LOCK = threading.Lock()
+
+_COUNTERS = {"written": 0, "dropped": 0, "sampled_out": 0}
+_COUNTERS_LOCK = threading.Lock()
+
+
+def _count(name: str):
+    with _COUNTERS_LOCK:
+        _COUNTERS[name] += 1
+
+
+# ====================================================================
+# SEGMENT WRITER (journal thread only)
+# ====================================================================
+
+class _SegmentWriter:
+    """Appends JSONL lines to the current segment and rotates it by size."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.handle = None
+        self.path: Optional[Path] = None
+        self.size = 0
+        self.sequence = 0
+        self._close_leftovers()
+
+    def write(self, record: Dict[str, Any]):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        if self.handle is None:
+            self._open()
+        elif self.size + len(line) > JOURNAL_SEGMENT_MAX_BYTES:
+            self.rotate()
+            self._open()
+        self.handle.write(line)
+        self.size += len(line)
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.flush()
+
+    def rotate(self):
+        """Closes (and compresses) the current segment, then enforces the size cap."""
+        if self.handle is None:
+            return
+        self.handle.close()
+        self.handle = None
+        if JOURNAL_COMPRESS:
+            self._compress(self.path)
+        self.path = None
+        self.size = 0
+        self._enforce_cap()
+
+    def _open(self):
+        self.sequence += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = self.directory / f"llm_{stamp}_{os.getpid()}_{self.sequence:03d}.jsonl"
+        self.handle = self.path.open("ab")
+        self.size = 0
+
+    @staticmethod
+    def _compress(path: Path):
+        try:
+            with path.open("rb") as src, gzip.open(str(path) + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            path.unlink()
+        except OSError as e:
+            logger.warning(f"Journal: failed to compress {path.name}: {e}")
+
+    def _close_leftovers(self):
+        """Segments left open by a previous (crashed) run are compressed on startup."""
+        if not JOURNAL_COMPRESS:
+            return
+        for path in self.directory.glob("llm_*.jsonl"):
+            self._compress(path)
+
+    def _enforce_cap(self):
+        segments = sorted(
+            (p for p in self.directory.glob("llm_*.jsonl*") if p != self.path),
+            key=lambda p: p.stat().st_mtime
+        )
+        total = sum(p.stat().st_size for p in segments) + self.size
+        while segments and total > JOURNAL_MAX_TOTAL_BYTES:
+            oldest = segments.pop(0)
+            total -= oldest.stat().st_size
+            try:
+                oldest.unlink()
+            except OSError as e:
+                logger.warning(f"Journal: failed to delete {oldest.name}: {e}")
+
+
+def _writer_loop():
+    writer = _SegmentWriter(BASE_DIR / JOURNAL_DIR)
+    while True:
+        try:
+            item = _QUEUE.get(timeout=1.0)
+        except queue.Empty:
+            writer.flush()
+            continue
+
+        try:
+            if item is _STOP:
+                writer.rotate()
+                return
+            writer.write(item)
+            _count("written")
+            if _QUEUE.empty():
+                writer.flush()
+        except Exception as e:
+            logger.warning(f"Journal write failed: {e}")
+        finally:
+            _QUEUE.task_done()
+
+
+def _ensure_writer():
+    global _WRITER_THREAD
+    if _WRITER_THREAD is not None:
+        return
+    with _WRITER_LOCK:
+        if _WRITER_THREAD is None:
+            thread = threading.Thread(target=_writer_loop, daemon=True, name="LLMJournal")
+            thread.start()
+            _WRITER_THREAD = thread
+
+
+# ====================================================================
+# PUBLIC API
+# ====================================================================
+
+def record_call(
+        call_site: str,
+        provider: str,
+        model: str,
+        prompt: str,
+        response: str,
+        latency_seconds: float,
+        usage: Optional[Dict[str, int]] = None,
+        json_mode: bool = True,
+        error: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+):
+    """
+    Journals one LLM call. Non-blocking: safe to call from the event loop.
+    Successful calls are sampled by JOURNAL_SAMPLE_RATE; failed calls are always kept.
+    """
+    usage = usage or {}
+    record = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "thread": current_caller(),
+        "call_site": call_site,
+        "provider": provider,
+        "model": model,
+        "json_mode": json_mode,
+        "status": "error" if error else "ok",
+        "latency_ms": round(latency_seconds * 1000, 1),
+        "prompt_chars": len(prompt or ""),
+        "response_chars": len(response or ""),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "cached_tokens": usage.get("cached_tokens", 0),
+        "error": error,
+        "prompt": prompt,
+        "response": response
+    }
+    if extra:
+        record.update(extra)
+
+    with _RING_LOCK:
+        _RING.append(record)
+
+    if not JOURNAL_ENABLED:
+        return
+    if error is None and random.random() >= JOURNAL_SAMPLE_RATE:
+        _count("sampled_out")
+        return
+
+    _ensure_writer()
+    try:
+        _QUEUE.put_nowait(record)
+    except queue.Full:
+        _count("dropped")
+
+
+def last_calls(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Most recent calls from the in-memory ring (oldest first)."""
+    with _RING_LOCK:
+        records = list(_RING)
+    return records[-limit:] if limit else records
+
+
+def last_call(model: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The latest call (optionally of one model), or None."""
+    for record in reversed(last_calls()):
+        if model is None or record["model"] == model:
+            return record
+    return None
+
+
+def journal_stats() -> Dict[str, int]:
+    with _COUNTERS_LOCK:
+        stats = dict(_COUNTERS)
+    stats["queued"] = _QUEUE.qsize()
+    return stats
+
+
+def flush_journal(timeout: float = 2.0):
+    """Stops the writer after the queued records are written (called at exit)."""
+    global _WRITER_THREAD
+    with _WRITER_LOCK:
+        thread = _WRITER_THREAD
+        if thread is None:
+            return
+        _WRITER_THREAD = None
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _QUEUE.put(_STOP, timeout=0.1)
+            break
+        except queue.Full:
+            continue
+    thread.join(max(0.0, deadline - time.monotonic()))
+
+
+atexit.register(flush_journal)
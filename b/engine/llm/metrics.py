@@ -0,0 +1,283 @@
+"""
+In-process LLM metrics.
+
+- Thread-safe registry of labelled counters and histograms.
+- record_llm_call / record_embedding / record_parse_failure are called by the call layers.
+- Export without a server: Prometheus text file (node_exporter textfile format) and a JSON
+  snapshot under b/logs/metrics/, rewritten periodically by a daemon thread ("LLMMetrics").
+- Rate-limit waits, journal, prefix-cache and scheduler queue figures are folded in at export time.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import (
+    METRICS_EXPORT_ENABLED,
+    METRICS_DIR,
+    METRICS_EXPORT_INTERVAL_SECONDS,
+    LATENCY_BUCKETS,
+    SIZE_BUCKETS
+)
+from .clients import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, value: float = 1.0, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            self.values[key] = self.values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.labels, key), value=value) for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str], buckets: Iterable[float]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            state = self.values.get(key)
+            if state is None:
+                state = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self.values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, state["buckets"]):
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (f'{bound:g}',))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + ('+Inf',))} {state['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {state['sum']:g}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {state['count']}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        out = []
+        for key, state in sorted(self.values.items()):
+            count = state["count"]
+            out.append(dict(
+                zip(self.labels, key),
+                count=count,
+                sum=round(state["sum"], 4),
+                avg=round(state["sum"] / count, 4) if count else 0.0,
+                buckets=dict(zip((f"{b:g}" for b in self.buckets), state["buckets"]))
+            ))
+        return out
+
+
+def _labels(names: Tuple, values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# ====================================================================
+# REGISTRY
+# ====================================================================
+
+_METRICS: Dict[str, Any] = {}
+
+
+def counter(name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+    with _LOCK:
+        if name not in _METRICS:
+            _METRICS[name] = Counter(name, help_text, labels)
+        return _METRICS[name]
+
+
+def histogram(name: str, help_text: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+    with _LOCK:
+        if name not in _METRICS:
+            _METRICS[name] = Histogram(name, help_text, labels, buckets)
+        return _METRICS[name]
+
+
+CALLS = counter("llm_calls_total", "LLM completion calls.", ("call_site", "provider", "model", "status"))
+CALL_SECONDS = histogram("llm_call_seconds", "LLM completion latency.", ("call_site", "provider"))
+PROMPT_CHARS = histogram("llm_prompt_chars", "Prompt size in characters.", ("call_site",), SIZE_BUCKETS)
+RESPONSE_CHARS = histogram("llm_response_chars", "Response size in characters.", ("call_site",), SIZE_BUCKETS)
+PROMPT_TOKENS = counter("llm_prompt_tokens_total", "Prompt tokens reported by the provider.", ("call_site", "provider"))
+COMPLETION_TOKENS = counter("llm_completion_tokens_total", "Completion tokens reported by the provider.", ("call_site", "provider"))
+CACHED_TOKENS = counter("llm_cached_tokens_total", "Prompt tokens served from the provider cache.", ("call_site", "provider"))
+PARSE_FAILURES = counter("llm_parse_failures_total", "Responses that were not valid JSON.", ("call_site",))
+EMBEDDINGS = counter("llm_embedding_calls_total", "Embedding calls.", ("provider", "status"))
+EMBEDDING_SECONDS = histogram("llm_embedding_seconds", "Embedding latency.", ("provider",))
+
+
+def record_llm_call(
+        call_site: str,
+        provider: str,
+        model: str,
+        latency_seconds: float,
+        prompt_chars: int,
+        response_chars: int,
+        usage: Optional[Dict[str, int]] = None,
+        status: str = "ok"
+):
+    _ensure_exporter()
+    usage = usage or {}
+    CALLS.inc(call_site=call_site, provider=provider, model=model, status=status)
+    CALL_SECONDS.observe(latency_seconds, call_site=call_site, provider=provider)
+    PROMPT_CHARS.observe(prompt_chars, call_site=call_site)
+    if status == "ok":
+        RESPONSE_CHARS.observe(response_chars, call_site=call_site)
+    PROMPT_TOKENS.inc(usage.get("prompt_tokens", 0), call_site=call_site, provider=provider)
+    COMPLETION_TOKENS.inc(usage.get("completion_tokens", 0), call_site=call_site, provider=provider)
+    CACHED_TOKENS.inc(usage.get("cached_tokens", 0), call_site=call_site, provider=provider)
+
+
+def record_parse_failure(call_site: str):
+    PARSE_FAILURES.inc(call_site=call_site or "unknown")
+
+
+def record_embedding(provider: str, latency_seconds: float, status: str = "ok"):
+    _ensure_exporter()
+    EMBEDDINGS.inc(provider=provider, status=status)
+    EMBEDDING_SECONDS.observe(latency_seconds, provider=provider)
+
+
+# ====================================================================
+# EXPORT
+# ====================================================================
+
+# Gauge sources outside the LLM layer (register_gauges), read at export time
+_GAUGE_SOURCES: List[Callable[[], List[Tuple[str, str, Dict[str, str], float]]]] = []
+
+
+def register_gauges(source: Callable[[], List[Tuple[str, str, Dict[str, str], float]]]):
+    """Adds a callable returning (name, help, labels, value) gauges to every export."""
+    with _LOCK:
+        _GAUGE_SOURCES.append(source)
+
+
+def _collected_gauges() -> List[Tuple[str, str, Dict[str, str], float]]:
+    """Figures owned by other modules, read at export time: (name, help, labels, value)."""
+    from .ratelimit import wait_time_snapshot
+    from .journal import journal_stats
+    from .prompt_cache import cache_stats
+    from .scheduler import scheduler_snapshot
+
+    gauges = []
+    for provider, waits in wait_time_snapshot().items():
+        for kind, seconds in waits.items():
+            gauges.append(("llm_wait_seconds_total", "Seconds spent on rate limits and retry backoff.",
+                           {"provider": provider, "kind": kind}, seconds))
+    for state, value in journal_stats().items():
+        gauges.append(("llm_journal_records", "Call journal records by state.", {"state": state}, value))
+    for provider, entry in cache_stats()["providers"].items():
+        gauges.append(("llm_prompt_cache_hit_ratio", "Cached share of prompt tokens.",
+                       {"provider": provider}, entry["hit_ratio"]))
+    for provider, state in scheduler_snapshot().items():
+        gauges.append(("llm_in_flight", "Provider requests holding a scheduler slot.",
+                       {"provider": provider}, state["active"]))
+        for priority, depth in state["queued"].items():
+            gauges.append(("llm_queue_depth", "Calls waiting for a scheduler slot.",
+                           {"provider": provider, "priority": priority}, depth))
+    with _LOCK:
+        sources = list(_GAUGE_SOURCES)
+    for source in sources:
+        try:
+            gauges.extend(source())
+        except Exception as e:
+            logger.warning(f"Metrics: gauge source {getattr(source, '__name__', source)} failed ({e}).")
+    return gauges
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    with _LOCK:
+        for metric in _METRICS.values():
+            lines.extend(metric.render())
+
+    seen = set()
+    for name, help_text, labels, value in _collected_gauges():
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        data = {name: metric.snapshot() for name, metric in _METRICS.items()}
+    for name, _, labels, value in _collected_gauges():
+        data.setdefault(name, []).append(dict(labels, value=value))
+    data["timestamp"] = time.time()
+    return data
+
+
+def _atomic_write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def export_metrics(directory: Optional[Path] = None):
+    """Writes llm.prom and llm_metrics.json (atomically replaced)."""
+    directory = directory or (BASE_DIR / METRICS_DIR)
+    try:
+        _atomic_write(directory / "llm.prom", render_prometheus())
+        _atomic_write(directory / "llm_metrics.json", json.dumps(metrics_snapshot(), ensure_ascii=False, indent=2))
+    except Exception as e:
+        logger.warning(f"Metrics export failed: {e}")
+
+
+_EXPORTER: Optional[threading.Thread] = None
+_EXPORTER_LOCK = threading.Lock()
+
+
+def _exporter_loop():
+    while True:
+        time.sleep(METRICS_EXPORT_INTERVAL_SECONDS)
+        export_metrics()
+
+
+def _ensure_exporter():
+    global _EXPORTER
+    if _EXPORTER is not None or not METRICS_EXPORT_ENABLED:
+        return
+    with _EXPORTER_LOCK:
+        if _EXPORTER is None:
+            _EXPORTER = threading.Thread(target=_exporter_loop, daemon=True, name="LLMMetrics")
+            _EXPORTER.start()
+            atexit.register(export_metrics)
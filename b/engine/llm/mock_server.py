@@ -0,0 +1,381 @@
+"""
+Local OpenAI-compatible stand-in for offline load tests.
+
+Speaks POST /v1/chat/completions (plain and SSE streaming) and POST /v1/embeddings.
+Recognizes which ai_home prompt it received and answers with JSON that matches that
+prompt's response format, after a configurable latency; errors can be injected.
+
+Run (from b/):
+    python -m engine.llm.mock_server --port 8765 --latency lognormal:1.2,0.4 --latency-for mind=uniform:3,6 --error-rate 0.05
+
+Point the app at it:
+    AI_HOME_LLM_BASE_URL=http://127.0.0.1:8765/v1 python main.py
+or point the "local" provider (type "openai_compatible") at it and route call sites to "local".
+
+Latency specs: fixed:S | uniform:A,B | normal:MEAN,SD | lognormal:MEDIAN,SIGMA (seconds).
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from engine.constants import ALLOWED_EMOTIONS
+
+logger = logging.getLogger(__name__)
+
+# Marker -> prompt kind. Checked in order; the first marker found in the prompt wins.
+PROMPT_MARKERS = [
+    ("[TASK: JSON REPAIR]", "repair"),
+    ("[TASK: MEMORY EXTRACTION]", "extraction"),
+    ("[TASK: RADIAL CREATIVITY]", "creative"),
+    ("[TASK: TURN ROUTING]", "router"),
+    ("[MOD: MIND – FUSED", "mind_fused"),
+    ("[MOD: MIND", "mind"),
+    ("[ROLE: MONOLOGUE", "monologue"),
+    ("[PROACTIVE OPERATION]", "proactive"),
+    ("[INCOMING INTERACTION", "reactive"),
+    ("[HISTORY]", "persona"),
+]
+
+# Schema title (structured.build_repair_prompt) -> prompt kind whose answer is valid for it
+REPAIR_SCHEMA_KINDS = {
+    "ExtractionResult": "extraction",
+    "CreativeIdeas": "creative",
+    "MindThought": "mind",
+    "MindFusedThought": "mind_fused",
+    "TurnTier": "router",
+    "MonologueResult": "monologue",
+}
+
+DEFAULT_EMBEDDING_DIM = 768  # engine.db_connection.VECTOR_DIMENSIONS
+
+
+def detect_prompt_kind(prompt: str) -> str:
+    for marker, kind in PROMPT_MARKERS:
+        if marker in prompt:
+            return kind
+    return "generic"
+
+
+# ====================================================================
+# RESPONSES
+# ====================================================================
+
+def _reply_text(rng: random.Random) -> str:
+    words = ["noted", "understood", "checking", "the plan", "next step", "context", "helper", "memory"]
+    return "Mock answer: " + " ".join(rng.choice(words) for _ in range(rng.randint(6, 24))) + "."
+
+
+def build_response(kind: str, prompt: str, json_mode: bool, rng: random.Random) -> str:
+    """Response body for one prompt kind (JSON text in json_mode, plain text otherwise)."""
+    if not json_mode or kind == "persona":
+        return _reply_text(rng)
+
+    if kind == "repair":
+        schema_part = prompt.split("[VALIDATION ERROR]")[0]
+        kind = next((k for title, k in REPAIR_SCHEMA_KINDS.items() if f'"title": "{title}"' in schema_part), "generic")
+
+    if kind == "extraction":
+        data = {
+            "essence": "Helper asked Me something and I answered (mock).",
+            "dominant_emotions": rng.sample(ALLOWED_EMOTIONS, 3),
+            "memory_weight": round(rng.uniform(0.1, 0.9), 2),
+            "the_lesson": "Next time, confirm the goal with the Helper first."
+        }
+    elif kind == "creative":
+        data = {"ideas": [f"1. surprising idea: {_reply_text(rng)}"]}
+    elif kind == "router":
+        data = {"tier": rng.choice(["trivial", "standard", "deep"])}
+    elif kind in ("mind", "mind_fused"):
+        data = {
+            "essence": "[INTENT-READER]: The Helper wants a concrete next step (mock).",
+            "plan": "[CONSCIOUSNESS-MAP]: ...\n[CREATIVITY-GENERATOR]: ...\n[ETHICS-ANALYZER]: no risk\n[TOOL-OPTIMIZER]: none"
+        }
+        if kind == "mind_fused":
+            data = {"ideas": [f"1. surprising idea: {_reply_text(rng)}"], **data}
+    elif kind == "monologue":
+        data = {
+            "reflection": "The log looks calm (mock).",
+            "message_to_worker": "We are heading in the right direction.",
+            "new_memo": {"content": "The Helper prefers short answers (mock).", "strength": 0.5}
+        }
+    else:
+        # reactive / proactive / unknown prompts: the standard reply format
+        data = {"reply": _reply_text(rng), "tools": []}
+
+    return json.dumps(data, ensure_ascii=False)
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector derived from the text (similar texts are NOT close; it is a load-test stub)."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+# ====================================================================
+# LATENCY / ERRORS
+# ====================================================================
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """'lognormal:1.2,0.4' -> sampler returning seconds (never negative)."""
+    name, _, raw = spec.partition(":")
+    args = [float(x) for x in raw.split(",") if x.strip()]
+    if name == "fixed":
+        return lambda rng: args[0]
+    if name == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if name == "normal":
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+    if name == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class MockSettings:
+    def __init__(
+            self,
+            latency: str = "fixed:0.2",
+            latency_for: Optional[Dict[str, str]] = None,
+            error_rate: float = 0.0,
+            error_status: Tuple[int, ...] = (429, 500, 503),
+            hang_rate: float = 0.0,
+            hang_seconds: float = 120.0,
+            stream_chunk_chars: int = 12,
+            embedding_dim: int = DEFAULT_EMBEDDING_DIM,
+            seed: Optional[int] = None
+    ):
+        self.latency = parse_latency(latency)
+        self.latency_for = {k: parse_latency(v) for k, v in (latency_for or {}).items()}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.stream_chunk_chars = stream_chunk_chars
+        self.embedding_dim = embedding_dim
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def sample_latency(self, kind: str) -> float:
+        with self.rng_lock:
+            return self.latency_for.get(kind, self.latency)(self.rng)
+
+    def roll(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def count(self, key: str):
+        with self.rng_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+# ====================================================================
+# HTTP
+# ====================================================================
+
+class MockHandler(BaseHTTPRequestHandler):
+    settings: MockSettings = MockSettings()
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def log_message(self, fmt: str, *args):
+        logger.debug("mock: " + fmt % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _inject_failure(self, kind: str) -> bool:
+        """Returns True if an error response was sent instead of the normal one."""
+        s = self.settings
+        if s.hang_rate and s.roll() < s.hang_rate:
+            s.count(f"{kind}:hang")
+            time.sleep(s.hang_seconds)
+        if s.error_rate and s.roll() < s.error_rate:
+            with s.rng_lock:
+                status = s.rng.choice(s.error_status)
+            s.count(f"{kind}:error_{status}")
+            headers = {"retry-after": "1"} if status == 429 else None
+            self._send_json(status, {"error": {"message": f"Injected mock error {status}", "type": "mock_error"}}, headers)
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, {"counts": self.settings.counts})
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        try:
+            body = self._read_body()
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        try:
+            if self.path.rstrip("/").endswith("/chat/completions"):
+                self._chat(body)
+            elif self.path.rstrip("/").endswith("/embeddings"):
+                self._embeddings(body)
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout / deadline): expected under load, nothing to answer
+            logger.debug(f"Client disconnected: {self.path}")
+
+    def _chat(self, body: Dict[str, Any]):
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        kind = detect_prompt_kind(prompt)
+        json_mode = (body.get("response_format") or {}).get("type") in ("json_object", "json_schema")
+        self.settings.count(kind)
+
+        time.sleep(self.settings.sample_latency(kind))
+        if self._inject_failure(kind):
+            return
+
+        with self.settings.rng_lock:
+            text = build_response(kind, prompt, json_mode, self.settings.rng)
+        model = body.get("model", "mock")
+        usage = {
+            "prompt_tokens": _tokens(prompt),
+            "completion_tokens": _tokens(text),
+            "total_tokens": _tokens(prompt) + _tokens(text),
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        # --- SSE STREAM ---
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def _event(choices: List[Dict[str, Any]], extra: Optional[Dict[str, Any]] = None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": choices}
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        size = max(1, self.settings.stream_chunk_chars)
+        for i in range(0, len(text), size):
+            _event([{"index": 0, "delta": {"content": text[i:i + size]}, "finish_reason": None}])
+            time.sleep(0.01)
+        _event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            _event([], {"usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _embeddings(self, body: Dict[str, Any]):
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.settings.count("embedding")
+
+        time.sleep(self.settings.sample_latency("embedding"))
+        if self._inject_failure("embedding"):
+            return
+
+        dim = int(body.get("dimensions") or self.settings.embedding_dim)
+        self._send_json(200, {
+            "object": "list",
+            "model": body.get("model", "mock"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text), dim)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": sum(_tokens(str(t)) for t in inputs), "total_tokens": sum(_tokens(str(t)) for t in inputs)}
+        })
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, settings: Optional[MockSettings] = None) -> ThreadingHTTPServer:
+    """Builds the server (not started). Each request runs in its own thread."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"settings": settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server for ai_home load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0.2", help="Default latency spec (see module docstring).")
+    parser.add_argument("--latency-for", action="append", default=[], metavar="KIND=SPEC",
+                        help="Per prompt kind, e.g. mind=uniform:3,6 (kinds: " +
+                             ", ".join(k for _, k in PROMPT_MARKERS) + ", generic, embedding).")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", default="429,500,503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Share of requests that stall (timeouts).")
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--embedding-dim", type=int, default=DEFAULT_EMBEDDING_DIM)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(
+        latency=args.latency,
+        latency_for=dict(item.split("=", 1) for item in args.latency_for),
+        error_rate=args.error_rate,
+        error_status=tuple(int(x) for x in args.error_status.split(",") if x.strip()),
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed
+    )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", datefmt="%H:%M:%S")
+    server = make_server(args.host, args.port, settings)
+    print(f"Mock LLM server on http://{args.host}:{args.port}/v1  (set AI_HOME_LLM_BASE_URL to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
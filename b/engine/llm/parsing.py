@@ -0,0 +1,37 @@
+import json
+from typing import Dict, Any
+
+from .metrics import record_parse_failure
+
+
+def parse_json_response(raw_response_text: str, call_site: str = "") -> Dict[str, Any]:
+    """
+    Converts a raw model answer into the standard response dict.
+    Guarantees the 'reply' and 'tools' keys. Failures are counted per call site.
+    """
+    try:
+        clean_text = raw_response_text.strip()
+        if clean_text.startswith("```json"): clean_text = clean_text[7:]
+        if clean_text.startswith("```"): clean_text = clean_text[3:]
+        if clean_text.endswith("```"): clean_text = clean_text[:-3]
+
+        # --- FIX: SANITIZE COMMON LLM JSON ERRORS ---
+        # LLMs often use \' inside double quotes, which is invalid JSON.
+        # We replace \' with ' to fix parsing errors.
+        clean_text = clean_text.replace(r"\'", "'")
+
+        data = json.loads(clean_text)
+
+        if isinstance(data, list):
+            data = data[0] if len(data) > 0 and isinstance(data[0], dict) else {"reply": str(data), "tools": []}
+        if not isinstance(data, dict):
+            data = {"reply": str(data), "tools": []}
+
+    except json.JSONDecodeError as e:
+        record_parse_failure(call_site)
+        return {"reply": f"Error parsing JSON response: {e}\n{raw_response_text}", "tools": []}
+
+    if "reply" not in data: data["reply"] = ""
+    if "tools" not in data or data["tools"] is None: data["tools"] = []
+
+    return data
@@ -0,0 +1,155 @@
+"""
+Prompt prefix caching.
+
+- Prefix stability: every call with a 'cache_prefix' is fingerprinted per call site, so a prefix
+  that keeps changing between turns (and therefore never hits a cache) shows up in the stats.
+- Cache-hit metric: prompt vs. cached prompt tokens, as reported by the providers.
+- Gemini context caching: explicit CachedContent handles for stable prefixes
+  (OpenAI and Groq cache identical prefixes on their own, nothing to manage there).
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Tuple
+
+from .config import (
+    CONTEXT_CACHE_ENABLED,
+    CONTEXT_CACHE_TTL_SECONDS,
+    CONTEXT_CACHE_MIN_TOKENS,
+    CONTEXT_CACHE_MIN_REPEATS,
+    CONTEXT_CACHE_MAX_HANDLES
+)
+from .clients import get_async_client, config_key
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+
+# call_site -> {"hash", "calls", "stable", "changes"}
+_PREFIXES: Dict[str, Dict[str, Any]] = {}
+# provider -> {"calls", "prompt_tokens", "cached_tokens"}
+_USAGE: Dict[str, Dict[str, int]] = {}
+
+# Gemini handles: (provider, model, prefix_hash) -> {"model": GenerativeModel, "expires": monotonic}
+_HANDLES: Dict[Tuple, Dict[str, Any]] = {}
+_SEEN: Dict[Tuple, int] = {}
+_FAILED: set = set()
+_PENDING: set = set()
+
+
+def prefix_hash(prefix: str) -> str:
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+# ====================================================================
+# METRICS
+# ====================================================================
+
+def observe_prefix(call_site: str, prefix: str) -> str:
+    """Records the prefix fingerprint of a call site. Returns the hash."""
+    digest = prefix_hash(prefix)
+    with _LOCK:
+        entry = _PREFIXES.setdefault(call_site, {"hash": "", "calls": 0, "stable": 0, "changes": 0})
+        entry["calls"] += 1
+        if entry["hash"] == digest:
+            entry["stable"] += 1
+        elif entry["hash"]:
+            entry["changes"] += 1
+            logger.debug(f"Prompt prefix changed [{call_site}]: {entry['hash']} -> {digest}")
+        entry["hash"] = digest
+    return digest
+
+
+def record_cache_usage(provider: str, usage: Dict[str, int]):
+    with _LOCK:
+        entry = _USAGE.setdefault(provider, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        entry["calls"] += 1
+        entry["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        entry["cached_tokens"] += usage.get("cached_tokens", 0)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Prefix stability per call site and cached-token hit ratio per provider.
+    """
+    with _LOCK:
+        prefixes = {site: dict(v) for site, v in _PREFIXES.items()}
+        providers = {p: dict(v) for p, v in _USAGE.items()}
+        handles = len(_HANDLES)
+
+    for entry in providers.values():
+        total = entry["prompt_tokens"]
+        entry["hit_ratio"] = round(entry["cached_tokens"] / total, 3) if total else 0.0
+    return {"prefixes": prefixes, "providers": providers, "gemini_handles": handles}
+
+
+# ====================================================================
+# GEMINI CONTEXT CACHE
+# ====================================================================
+
+def _create_cached_model(client, model_name: str, generation_config: Dict[str, Any], prefix: str):
+    """Blocking SDK calls (run in an executor)."""
+    cached = client.caching.CachedContent.create(
+        model=model_name,
+        contents=[prefix],
+        ttl=timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS)
+    )
+    return client.GenerativeModel.from_cached_content(
+        cached_content=cached,
+        generation_config=dict(generation_config)
+    )
+
+
+def _evict_expired(now: float):
+    for key in [k for k, v in _HANDLES.items() if v["expires"] <= now]:
+        del _HANDLES[key]
+    if len(_SEEN) > CONTEXT_CACHE_MAX_HANDLES * 8:
+        _SEEN.clear()
+
+
+async def aget_cached_model(provider: str, model_name: str, generation_config: Dict[str, Any], prefix: str):
+    """
+    GenerativeModel bound to a CachedContent holding 'prefix', or None if the prefix is not
+    (yet) worth caching. Any failure disables caching for that prefix and the call proceeds uncached.
+    """
+    if not CONTEXT_CACHE_ENABLED or estimate_tokens(prefix) < CONTEXT_CACHE_MIN_TOKENS:
+        return None
+
+    key = (provider, model_name, config_key(generation_config), prefix_hash(prefix))
+    now = time.monotonic()
+    with _LOCK:
+        _evict_expired(now)
+        handle = _HANDLES.get(key)
+        # Leave a margin so a handle does not expire mid-request
+        if handle and handle["expires"] - now > 30:
+            return handle["model"]
+        if key in _FAILED or key in _PENDING or len(_HANDLES) >= CONTEXT_CACHE_MAX_HANDLES:
+            return None
+        _SEEN[key] = _SEEN.get(key, 0) + 1
+        if _SEEN[key] < CONTEXT_CACHE_MIN_REPEATS:
+            return None
+        _PENDING.add(key)
+
+    try:
+        client = get_async_client(provider)
+        model = await asyncio.get_running_loop().run_in_executor(
+            None, _create_cached_model, client, model_name, generation_config, prefix
+        )
+    except Exception as e:
+        logger.warning(f"Context cache disabled for this prefix ({provider}/{model_name}): {e}")
+        with _LOCK:
+            _FAILED.add(key)
+        return None
+    finally:
+        with _LOCK:
+            _PENDING.discard(key)
+
+    with _LOCK:
+        _HANDLES[key] = {"model": model, "expires": time.monotonic() + CONTEXT_CACHE_TTL_SECONDS}
+    logger.info(f"Context cache created ({provider}/{model_name}, ~{estimate_tokens(prefix)} tok prefix).")
+    return model
@@ -0,0 +1,160 @@
+"""
+Raw provider requests (run on the shared LLM loop).
+These functions raise on any provider error; routing, fallback and the
+backward compatible error replies live in the layers above.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .config import PROVIDER_CONFIG, DEFAULT_TEMPERATURE, get_client_type
+from .clients import get_async_client, get_generative_model, gemini_generation_config
+from .prompt_cache import aget_cached_model
+from .structured import openai_response_format, gemini_response_schema
+from .scheduler import llm_slot
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """
+    Token usage from a provider response (OpenAI/Groq 'usage' or Gemini 'usage_metadata').
+    Missing fields are reported as 0.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0
+        }
+
+    meta = getattr(response, "usage_metadata", None)
+    if meta is not None:
+        return {
+            "prompt_tokens": getattr(meta, "prompt_token_count", 0) or 0,
+            "completion_tokens": getattr(meta, "candidates_token_count", 0) or 0,
+            "cached_tokens": getattr(meta, "cached_content_token_count", 0) or 0
+        }
+
+    return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+
+def response_format_for(client_type: str, json_mode: bool, schema=None) -> Optional[Dict[str, Any]]:
+    """OpenAI-protocol response_format: JSON schema for OpenAI when a schema is given, else plain JSON mode."""
+    if not json_mode:
+        return None
+    if schema is not None and client_type == "openai":
+        return openai_response_format(schema)
+    return {"type": "json_object"}
+
+
+def gemini_config_for(json_mode: bool, schema=None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    options = options or {}
+    return gemini_generation_config(
+        json_mode, gemini_response_schema(schema) if schema is not None else None,
+        temperature=options.get("temperature", DEFAULT_TEMPERATURE), max_output_tokens=options.get("max_tokens")
+    )
+
+
+def sampling_args(client_type: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """OpenAI-protocol sampling arguments from the route options (Groq keeps its large default max_tokens)."""
+    options = options or {}
+    args = {"temperature": options.get("temperature", DEFAULT_TEMPERATURE)}
+    if client_type == "groq":
+        args.update(max_tokens=options.get("max_tokens") or 8192, top_p=1)
+    elif options.get("max_tokens"):
+        args["max_tokens"] = options["max_tokens"]
+    return args
+
+
+async def acomplete(
+        provider: str,
+        prompt: str,
+        json_mode: bool = True,
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Performs the raw completion request.
+    Returns {"text": ..., "usage": {...}, "model": ...}.
+    'cache_prefix' (the static start of 'prompt') is served from a Gemini context cache when one exists.
+    'schema' (pydantic model) is passed as native structured output where the provider supports it.
+    'options' (routes.request_options) selects model, temperature and max_tokens.
+    """
+    config = PROVIDER_CONFIG.get(provider)
+    if not config:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    options = options or {}
+    model_name = options.get("model") or config["model"]
+    client_type = get_client_type(provider)
+    client = get_async_client(provider)
+
+    async with llm_slot(provider, prompt):
+        if client_type == "openai":
+            resp_format = response_format_for(client_type, json_mode, schema)
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                response_format=resp_format,
+                **sampling_args(client_type, options)
+            )
+            return {"text": response.choices[0].message.content, "usage": extract_usage(response), "model": model_name}
+
+        elif client_type == "groq":
+            resp_format = response_format_for(client_type, json_mode, schema)
+            completion = await client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                response_format=resp_format,
+                stream=False,
+                **sampling_args(client_type, options)
+            )
+            return {"text": completion.choices[0].message.content, "usage": extract_usage(completion), "model": model_name}
+
+        elif client_type == "google":
+            gen_config = gemini_config_for(json_mode, schema, options)
+            cached_model = None
+            if cache_prefix and prompt.startswith(cache_prefix):
+                cached_model = await aget_cached_model(provider, model_name, gen_config, cache_prefix)
+
+            if cached_model is not None:
+                response = await cached_model.generate_content_async(prompt[len(cache_prefix):].lstrip("\n"))
+            else:
+                model = get_generative_model(provider, model_name, gen_config)
+                response = await model.generate_content_async(prompt)
+            return {"text": response.text, "usage": extract_usage(response), "model": model_name}
+
+    raise ValueError(f"Unsupported provider client type: {client_type}")
+
+
+async def aembed(provider: str, text: str) -> List[float]:
+    """
+    Performs the raw embedding request. Returns [] if the provider has no embedding model.
+    """
+    config = PROVIDER_CONFIG.get(provider)
+    if not config or "embedding_model" not in config:
+        return []
+    model_name = config["embedding_model"]
+
+    client_type = get_client_type(provider)
+    client = get_async_client(provider)
+    async with llm_slot(provider, text):
+        if client_type == "google":
+            embed_async = getattr(client, "embed_content_async", None)
+            if embed_async is not None:
+                result = await embed_async(model=model_name, content=text, task_type="retrieval_document")
+            else:
+                # Older SDKs have no async variant -> keep the loop free
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    lambda: client.embed_content(model=model_name, content=text, task_type="retrieval_document")
+                )
+            return result['embedding']
+        elif client_type == "openai":
+            # 'dimensions' only where configured: most self-hosted servers reject it
+            extra = {"dimensions": config["embedding_dimensions"]} if config.get("embedding_dimensions") else {}
+            response = await client.embeddings.create(input=[text], model=model_name, **extra)
+            return response.data[0].embedding
+
+    return []
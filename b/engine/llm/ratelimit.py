@@ -0,0 +1,194 @@
+"""
+Client-side rate limiting and retries.
+
+- One limiter per API key (all threads share it, since every call runs on the shared loop):
+  a token bucket for requests (RPM) and one for estimated tokens (TPM).
+- Retryable errors (429, 5xx, timeouts, dropped connections) are retried with jittered
+  exponential backoff; a 'Retry-After' header from the provider takes precedence.
+- Time spent waiting on limits and in backoff is accumulated per provider.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from .config import (
+    PROVIDER_CONFIG,
+    RATE_LIMITS,
+    EXPECTED_OUTPUT_TOKENS,
+    MAX_RETRIES,
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    get_client_type,
+    is_openai_compatible
+)
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "TimeoutError",
+    "DeadlineExceeded", "ServiceUnavailable", "ResourceExhausted", "InternalServerError"
+}
+
+
+class TokenBucket:
+    """
+    Classic token bucket, refilled continuously.
+    'reserve' always takes the tokens (the balance may go negative) and returns how long
+    the caller has to wait, so concurrent callers queue up fairly.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class ProviderLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def acquire(self, token_estimate: int) -> float:
+        """Waits until both buckets allow the request. Returns the seconds waited."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(token_estimate))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_LIMITERS: Dict[str, ProviderLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+# Seconds spent waiting, per provider: {"google": {"limit": 1.2, "backoff": 3.0}}
+_WAIT_SECONDS: Dict[str, Dict[str, float]] = {}
+_WAIT_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str) -> Optional[ProviderLimiter]:
+    """Limiter shared by every provider key using the same API key. None if unlimited."""
+    # Self-hosted servers are only limited by an explicit RATE_LIMITS[provider] entry
+    kind = provider if is_openai_compatible(provider) else get_client_type(provider)
+    limits = RATE_LIMITS.get(kind)
+    if not limits:
+        return None
+
+    key = PROVIDER_CONFIG.get(provider, {}).get("env_key", provider)
+    with _LIMITERS_LOCK:
+        if key not in _LIMITERS:
+            _LIMITERS[key] = ProviderLimiter(limits["rpm"], limits["tpm"])
+        return _LIMITERS[key]
+
+
+def _record_wait(provider: str, kind: str, seconds: float):
+    with _WAIT_LOCK:
+        bucket = _WAIT_SECONDS.setdefault(provider, {"limit": 0.0, "backoff": 0.0})
+        bucket[kind] += seconds
+
+
+def wait_time_snapshot() -> Dict[str, Dict[str, float]]:
+    """Total seconds spent waiting on rate limits ('limit') and retries ('backoff') per provider."""
+    with _WAIT_LOCK:
+        return {p: dict(v) for p, v in _WAIT_SECONDS.items()}
+
+
+async def acquire_slot(provider: str, prompt: str = "") -> float:
+    """Blocks (asynchronously) until the provider's limiter admits one request."""
+    limiter = get_limiter(provider)
+    if limiter is None:
+        return 0.0
+
+    waited = await limiter.acquire(estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS)
+    if waited > 0:
+        _record_wait(provider, "limit", waited)
+        logger.info(f"Rate limit: waited {waited:.2f}s for '{provider}'.")
+    return waited
+
+
+# ====================================================================
+# RETRIES
+# ====================================================================
+
+def _status_code(error: Exception) -> Optional[int]:
+    # openai / groq: APIStatusError.status_code | google.api_core: GoogleAPICallError.code
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        try:
+            if value is not None:
+                return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES or isinstance(error, asyncio.TimeoutError)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a 'Retry-After' / 'retry-after-ms' response header, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP-date form is not worth parsing here; fall back to backoff
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Equal-jitter exponential backoff (a random delay in [ceiling / 2, ceiling]), overridden by Retry-After."""
+    hinted = _retry_after(error) if error is not None else None
+    if hinted is not None:
+        return min(hinted, BACKOFF_MAX_SECONDS)
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+async def with_retries(provider: str, prompt: str, request: Callable[[], Awaitable[T]]) -> T:
+    """
+    Runs 'request', retrying retryable errors.
+    The rate limiter is taken together with the scheduler slot (scheduler.llm_slot) inside the request.
+    The last error is re-raised when retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await request()
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            attempt += 1
+            _record_wait(provider, "backoff", delay)
+            logger.warning(f"LLM retry {attempt}/{MAX_RETRIES} for '{provider}' in {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
@@ -0,0 +1,150 @@
+"""
+Per-call-site model routing.
+
+Maps a call site (reply, mind.main, extract, ...) to provider / model / temperature / max_tokens.
+Layers, later wins (merged key by key):
+1. CALL_SITE_ROUTES (config.py)
+2. MODE_CONFIG[active mode]["llm_routes"] (engine/modes.py)
+3. ROUTES_FILE "call_sites", then ROUTES_FILE "modes"[active mode]
+
+ROUTES_FILE is re-read when its mtime changed (checked every ROUTES_RELOAD_CHECK_SECONDS),
+so a route can be changed while the system runs. A broken file is logged and ignored.
+The active mode is read from state.json once and then followed through the MODE_CHANGED
+events of engine.modes.update_state, so resolving a route does no blocking state I/O.
+"""
+
+import json
+import logging
+import threading
+import time
+from queue import Empty, Queue
+from typing import Any, Dict, Optional
+
+from .config import (
+    PROVIDER_CONFIG,
+    DEFAULT_TEMPERATURE,
+    CALL_SITE_ROUTES,
+    ROUTES_FILE,
+    ROUTES_RELOAD_CHECK_SECONDS
+)
+from .clients import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+ROUTE_KEYS = ("provider", "model", "temperature", "max_tokens")
+
+_LOCK = threading.Lock()
+_STATE: Dict[str, Any] = {"checked": 0.0, "mtime": None, "file": {}, "mode": None}
+_MODE_EVENTS: Queue = Queue()   # engine.events.MODE_CHANGED
+
+
+def _current_mode() -> str:
+    """Active mode (caller holds _LOCK): state.json on first use, then the latest MODE_CHANGED event."""
+    if _STATE["mode"] is None:
+        try:
+            # Imported lazily: engine.modes is not part of the LLM layer
+            from engine import events
+            from engine.modes import get_current_mode_id
+            events.subscribe(events.MODE_CHANGED, _MODE_EVENTS)  # Before the read: no switch is missed
+            _STATE["mode"] = get_current_mode_id()
+        except Exception as e:
+            logger.warning(f"Routes: active mode unknown ({e}), using 'general'.")
+            return "general"
+
+    while True:
+        try:
+            _STATE["mode"] = _MODE_EVENTS.get_nowait()["mode_id"]
+        except Empty:
+            return _STATE["mode"]
+
+
+def _load_file(path) -> Dict[str, Any]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("top level must be an object")
+        logger.info(f"Routes: loaded {path.name}.")
+        return data
+    except Exception as e:
+        logger.error(f"Routes: {path.name} ignored ({e}).")
+        return {}
+
+
+def _refresh():
+    """Re-reads ROUTES_FILE if its mtime changed, checked at most every few seconds."""
+    now = time.monotonic()
+    with _LOCK:
+        if now - _STATE["checked"] < ROUTES_RELOAD_CHECK_SECONDS:
+            return
+        _STATE["checked"] = now
+
+        path = BASE_DIR / ROUTES_FILE
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime != _STATE["mtime"]:
+            _STATE["mtime"] = mtime
+            _STATE["file"] = _load_file(path) if mtime is not None else {}
+
+
+def _mode_routes(mode_id: str) -> Dict[str, Any]:
+    try:
+        from engine.modes import get_mode_config
+        return get_mode_config(mode_id).get("llm_routes", {}) or {}
+    except Exception:
+        return {}
+
+
+def _merge(route: Dict[str, Any], layer: Any):
+    if isinstance(layer, dict):
+        if "provider" in layer and "model" not in layer:
+            route.pop("model", None)  # A model belongs to the provider it was set for
+        route.update({k: v for k, v in layer.items() if k in ROUTE_KEYS})
+
+
+def get_route(call_site: str, mode_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Effective route of a call site in 'mode_id' (default: the active mode).
+    Returns a new dict with the keys of ROUTE_KEYS that are set; an unknown provider is dropped.
+    """
+    _refresh()
+    with _LOCK:
+        file_routes = _STATE["file"]
+        mode_id = mode_id or _current_mode()
+
+    route: Dict[str, Any] = {}
+    _merge(route, CALL_SITE_ROUTES.get(call_site))
+    _merge(route, _mode_routes(mode_id).get(call_site))
+    _merge(route, (file_routes.get("call_sites") or {}).get(call_site))
+    _merge(route, ((file_routes.get("modes") or {}).get(mode_id) or {}).get(call_site))
+
+    provider = route.get("provider")
+    if provider and provider not in PROVIDER_CONFIG:
+        logger.warning(f"Routes: unknown provider '{provider}' for '{call_site}' ignored.")
+        route.pop("provider")
+        route.pop("model", None)
+    return route
+
+
+def request_options(route: Optional[Dict[str, Any]], provider: str) -> Dict[str, Any]:
+    """
+    Model and sampling settings of one provider request.
+    The route's model only applies to the route's provider (failover uses the provider's own model).
+    """
+    route = route or {}
+    model = route.get("model") if route.get("provider") == provider else None
+    return {
+        "model": model or PROVIDER_CONFIG[provider]["model"],
+        "temperature": route.get("temperature", DEFAULT_TEMPERATURE),
+        "max_tokens": route.get("max_tokens")
+    }
+
+
+def routes_snapshot(mode_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Effective route of every configured call site (for status output)."""
+    _refresh()
+    with _LOCK:
+        sites = set(CALL_SITE_ROUTES) | set((_STATE["file"].get("call_sites") or {}))
+    return {site: get_route(site, mode_id) for site in sorted(sites)}
@@ -0,0 +1,259 @@
+"""
+Routing layer over PROVIDER_CONFIG.
+
+- Ordered fallback chains per call site (FALLBACK_CHAINS): a failing provider hands over to the next one.
+- Optional hedging (HEDGE_CALL_SITES): if the primary has not answered within its p95 latency,
+  the next provider is fired as well; the first successful answer wins, the other is cancelled.
+- Per-provider latency / error statistics drive the hedge thresholds.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    DEFAULT_PROVIDER,
+    PROVIDER_CONFIG,
+    FALLBACK_CHAINS,
+    HEDGE_CALL_SITES,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    LATENCY_WINDOW
+)
+from .providers import acomplete
+from .routes import get_route, request_options
+from .ratelimit import with_retries
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCallError(Exception):
+    """Raised when every provider of a chain failed."""
+
+    def __init__(self, message: str, provider: str = ""):
+        super().__init__(message)
+        self.provider = provider
+
+
+# ====================================================================
+# PROVIDER STATISTICS
+# ====================================================================
+
+class ProviderStats:
+    """
+    Rolling latency window and error counters of one provider.
+    Updated from the loop thread, readable from any thread.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.recent_errors = deque(maxlen=window)  # 1 = error, 0 = success
+        self.success_count = 0
+        self.error_count = 0
+
+    def record_success(self, seconds: float):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.recent_errors.append(0)
+            self.success_count += 1
+
+    def record_censored(self, seconds: float):
+        """
+        A request cancelled after 'seconds' (lost a hedge race, call timed out): its latency is at
+        least that long. Kept in the latency window as a lower bound, so the p95 behind hedge_delay
+        is not built from the fast completions alone.
+        """
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.recent_errors.append(1)
+            self.error_count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        idx = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[idx]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.recent_errors:
+                return 0.0
+            return sum(self.recent_errors) / len(self.recent_errors)
+
+    def hedge_delay(self) -> float:
+        """
+        How long to wait for this provider before firing the hedge.
+        p95 once enough samples exist; shortened proportionally while the provider keeps failing.
+        """
+        with self._lock:
+            enough = len(self.latencies) >= HEDGE_MIN_SAMPLES
+        delay = self.percentile(0.95) if enough else HEDGE_DEFAULT_DELAY_SECONDS
+        return delay * (1.0 - self.error_rate())
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "p50": self.percentile(0.50) or 0.0,
+            "p95": self.percentile(0.95) or 0.0,
+            "error_rate": self.error_rate(),
+            "success_count": self.success_count,
+            "error_count": self.error_count
+        }
+
+
+_STATS: Dict[str, ProviderStats] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def get_provider_stats(provider: str) -> ProviderStats:
+    with _STATS_LOCK:
+        if provider not in _STATS:
+            _STATS[provider] = ProviderStats()
+        return _STATS[provider]
+
+
+def stats_snapshot() -> Dict[str, Dict[str, float]]:
+    with _STATS_LOCK:
+        providers = list(_STATS.keys())
+    return {p: get_provider_stats(p).snapshot() for p in providers}
+
+
+# ====================================================================
+# CHAINS
+# ====================================================================
+
+def resolve_chain(provider: Optional[str], call_site: str = "default") -> List[str]:
+    """
+    Ordered list of providers to try: the requested one first, then the call site's chain.
+    """
+    chain = FALLBACK_CHAINS.get(call_site, FALLBACK_CHAINS["default"])
+    primary = provider or (chain[0] if chain else DEFAULT_PROVIDER)
+
+    ordered = [primary]
+    for p in chain:
+        if p not in ordered and p in PROVIDER_CONFIG:
+            ordered.append(p)
+    return ordered
+
+
+def primary_provider(call_site: str, mode_id: Optional[str] = None) -> str:
+    """Provider a call of 'call_site' goes to first: its route's provider, else the head of its chain."""
+    return get_route(call_site, mode_id).get("provider") or resolve_chain(None, call_site)[0]
+
+
+async def _attempt(
+        provider: str,
+        prompt: str,
+        json_mode: bool,
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        route: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """One provider request with statistics. Returns the completion dict extended with 'provider'."""
+    stats = get_provider_stats(provider)
+    options = request_options(route, provider)
+    started = time.perf_counter()
+    try:
+        completion = await with_retries(
+            provider, prompt, lambda: acomplete(provider, prompt, json_mode, cache_prefix, schema, options)
+        )
+    except asyncio.CancelledError:
+        # Lost a hedge race (or the call timed out): neither a success nor an error
+        stats.record_censored(time.perf_counter() - started)
+        raise
+    except Exception as e:
+        stats.record_error()
+        raise LLMCallError(str(e), provider=provider) from e
+
+    stats.record_success(time.perf_counter() - started)
+    completion["provider"] = provider
+    return completion
+
+
+async def _hedged(
+        primary: str,
+        secondary: str,
+        prompt: str,
+        json_mode: bool,
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        route: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Races the secondary against a slow primary.
+    Raises LLMCallError with attribute 'hedged' telling whether the secondary was used.
+    """
+    delay = get_provider_stats(primary).hedge_delay()
+    primary_task = asyncio.ensure_future(_attempt(primary, prompt, json_mode, cache_prefix, schema, route))
+
+    done, _ = await asyncio.wait({primary_task}, timeout=delay)
+    if done:
+        try:
+            return primary_task.result()
+        except LLMCallError as e:
+            e.hedged = False
+            raise
+
+    logger.info(f"Hedging: '{primary}' slower than {delay:.2f}s, firing '{secondary}'.")
+    secondary_task = asyncio.ensure_future(_attempt(secondary, prompt, json_mode, cache_prefix, schema, route))
+    pending = {primary_task, secondary_task}
+    last_error = None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    last_error.hedged = True
+    raise last_error
+
+
+async def aroute_completion(
+        prompt: str,
+        provider: Optional[str] = None,
+        call_site: str = "default",
+        json_mode: bool = True,
+        hedge: Optional[bool] = None,
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        route: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Runs the completion through the fallback chain of the call site.
+    'route' (routes.get_route) supplies model and sampling settings for every attempt.
+    Returns {"text", "usage", "model", "provider"} of the provider that answered.
+    Raises LLMCallError if all providers failed.
+    """
+    chain = resolve_chain(provider, call_site)
+    if hedge is None:
+        hedge = call_site in HEDGE_CALL_SITES
+
+    errors: List[str] = []
+    i = 0
+    while i < len(chain):
+        current = chain[i]
+        try:
+            if hedge and i + 1 < len(chain):
+                return await _hedged(current, chain[i + 1], prompt, json_mode, cache_prefix, schema, route)
+            return await _attempt(current, prompt, json_mode, cache_prefix, schema, route)
+        except LLMCallError as e:
+            errors.append(f"{e.provider}: {e}")
+            i += 2 if getattr(e, "hedged", False) else 1
+            if i < len(chain):
+                logger.warning(f"LLM failover [{call_site}]: {e.provider} failed ({e}). Next: {chain[i]}")
+
+    raise LLMCallError(" | ".join(errors), provider=chain[0])
@@ -0,0 +1,210 @@
+"""
+Central LLM call scheduler (replaces the per-provider semaphores).
+
+Every provider request takes a slot here before it is sent:
+- Concurrency cap per provider (PROVIDER_CONCURRENCY).
+- Waiting calls are admitted by priority class (PRIORITY_CLASSES, highest first), FIFO within a class.
+- While interactive calls are waiting for a provider (for its slot or its rate-limit budget),
+  queued background classes (PREEMPTIBLE_PRIORITIES) of that provider are held back, even if a
+  slot is free, for at most PREEMPT_HOLD_MAX_SECONDS. Running interactive calls (a streaming
+  reply) hold nothing back.
+- The rate limiter (ratelimit.py) is consulted after admission, so a held background
+  call does not reserve RPM / TPM budget ahead of the reply.
+
+The priority of a call comes from its call site (CALL_SITE_PRIORITY), can be overridden
+per call (call_llm(..., priority=...)) and is carried in a context variable, so helper
+calls made on behalf of a call (schema repair, hedges) inherit it.
+All state lives on the shared LLM loop; only the metrics snapshot is read from other threads.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from .config import (
+    PROVIDER_CONCURRENCY,
+    DEFAULT_CONCURRENCY,
+    PRIORITY_CLASSES,
+    CALL_SITE_PRIORITY,
+    DEFAULT_PRIORITY,
+    PREEMPTIBLE_PRIORITIES,
+    PREEMPT_HOLD_MAX_SECONDS
+)
+from .ratelimit import acquire_slot
+from .metrics import histogram, counter
+
+logger = logging.getLogger(__name__)
+
+CALL_PRIORITY: ContextVar[str] = ContextVar("llm_call_priority", default="")
+
+QUEUE_WAIT_SECONDS = histogram(
+    "llm_queue_wait_seconds", "Time a call waited for a scheduler slot.", ("provider", "priority")
+)
+HELD_CALLS = counter(
+    "llm_queue_held_total", "Background calls held back while interactive calls were pending.", ("priority",)
+)
+
+_RANK = {name: i for i, name in enumerate(PRIORITY_CLASSES)}
+_INTERACTIVE = PRIORITY_CLASSES[0]
+_SEQ = itertools.count()
+
+
+def priority_for(call_site: str, priority: Optional[str] = None) -> str:
+    """Explicit priority > the one inherited from the calling context > the call site's class."""
+    if priority in _RANK:
+        return priority
+    return CALL_PRIORITY.get() or CALL_SITE_PRIORITY.get(call_site, DEFAULT_PRIORITY)
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[str]:
+    """
+    Makes 'priority' the class of the LLM calls and embeddings made in the enclosed block
+    (also from a worker thread: run_sync carries the thread's context onto the loop).
+    """
+    token = CALL_PRIORITY.set(priority)
+    try:
+        yield priority
+    finally:
+        CALL_PRIORITY.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "future", "enqueued", "held")
+
+    def __init__(self, priority: str, future: asyncio.Future):
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.held = False
+
+
+class ProviderScheduler:
+    def __init__(self, provider: str, capacity: int):
+        self.provider = provider
+        self.capacity = capacity
+        self.active = 0
+        self.interactive_waiting = 0   # Interactive calls not yet through admission + rate limiter
+        self._heap: List[Any] = []
+        self._timer = None
+
+    def depth(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for _, _, waiter in list(self._heap):
+            if not waiter.future.done():
+                counts[waiter.priority] = counts.get(waiter.priority, 0) + 1
+        return counts
+
+    def _may_admit(self, waiter: _Waiter, now: float) -> bool:
+        if waiter.priority not in PREEMPTIBLE_PRIORITIES or self.interactive_waiting == 0:
+            return True
+        if now - waiter.enqueued >= PREEMPT_HOLD_MAX_SECONDS:
+            return True  # Starvation guard
+        if not waiter.held:
+            waiter.held = True
+            HELD_CALLS.inc(priority=waiter.priority)
+        return False
+
+    def dispatch(self):
+        """Hands free slots to the best admissible waiters."""
+        now = time.monotonic()
+        skipped = []
+        while self._heap and self.active < self.capacity:
+            entry = heapq.heappop(self._heap)
+            waiter = entry[2]
+            if waiter.future.done():
+                continue  # Cancelled while queued
+            if not self._may_admit(waiter, now):
+                skipped.append(entry)
+                continue
+            self.active += 1
+            waiter.future.set_result(None)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if skipped:
+            self._schedule_recheck()
+
+    def _schedule_recheck(self):
+        if self._timer is None:
+            def _fire():
+                self._timer = None
+                self.dispatch()
+            self._timer = asyncio.get_running_loop().call_later(PREEMPT_HOLD_MAX_SECONDS / 4, _fire)
+
+    async def acquire(self, priority: str):
+        if self.active < self.capacity and not self._heap and (
+                priority not in PREEMPTIBLE_PRIORITIES or self.interactive_waiting == 0):
+            self.active += 1
+            return
+
+        waiter = _Waiter(priority, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, (_RANK.get(priority, len(_RANK)), next(_SEQ), waiter))
+        self.dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted and cancelled in the same step: give the slot back
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self.dispatch()
+
+
+_SCHEDULERS: Dict[str, ProviderScheduler] = {}
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    scheduler = _SCHEDULERS.get(provider)
+    if scheduler is None:
+        scheduler = ProviderScheduler(provider, PROVIDER_CONCURRENCY.get(provider, DEFAULT_CONCURRENCY))
+        _SCHEDULERS[provider] = scheduler
+    return scheduler
+
+
+@asynccontextmanager
+async def llm_slot(provider: str, prompt: str = "", priority: Optional[str] = None) -> AsyncIterator[None]:
+    """
+    Holds one scheduler slot of 'provider' (and its rate-limit budget) for the enclosed request.
+    """
+    priority = priority or CALL_PRIORITY.get() or DEFAULT_PRIORITY
+    waiting = priority == _INTERACTIVE
+    scheduler = get_scheduler(provider)
+
+    def _stop_waiting():
+        nonlocal waiting
+        if waiting:
+            waiting = False
+            scheduler.interactive_waiting -= 1
+            if scheduler.interactive_waiting == 0:
+                scheduler.dispatch()  # Release the held background calls
+
+    if waiting:
+        scheduler.interactive_waiting += 1
+    started = time.monotonic()
+    try:
+        await scheduler.acquire(priority)
+        try:
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, provider=provider, priority=priority)
+            await acquire_slot(provider, prompt)
+            _stop_waiting()
+            yield
+        finally:
+            scheduler.release()
+    finally:
+        _stop_waiting()
+
+
+def scheduler_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Queue depth per priority class and slots in use, per provider."""
+    return {
+        provider: {"active": s.active, "capacity": s.capacity, "queued": s.depth()}
+        for provider, s in list(_SCHEDULERS.items())
+    }
@@ -0,0 +1,53 @@
+"""
+Response schemas of the JSON call sites (used with call_llm(..., schema=...)).
+ExtractionResult lives with the memory models (engine/memory/models.py).
+"""
+
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class ToolCall(BaseModel):
+    name: str = Field(..., description="Tool name, e.g. 'system.read_file'.")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Tool arguments.")
+
+
+class AgentReply(BaseModel):
+    """Reactive and proactive answers."""
+    reply: str = Field("", description="Text shown to the Helper.")
+    tools: List[ToolCall] = Field(default_factory=list, description="Tools to execute, in order.")
+
+
+class MindThought(BaseModel):
+    """MIND (interpreter) analysis."""
+    essence: str = Field(..., description="Deep analysis of the Helper's intent.")
+    plan: str = Field(..., description="Consciousness map, creative alternatives, risks and tool suggestions.")
+
+
+class MindFusedThought(BaseModel):
+    """Fused MIND call: creative ideas and the interpreter analysis in one answer."""
+    ideas: List[str] = Field(..., description="Surprising but possible approaches (written first).")
+    essence: str = Field(..., description="Deep analysis of the Helper's intent.")
+    plan: str = Field(..., description="Consciousness map, creative alternatives, risks and tool suggestions.")
+
+
+class TurnTier(BaseModel):
+    """MIND router classifier (engine/mind_router.py)."""
+    tier: Literal["trivial", "standard", "deep"] = Field(..., description="How much MIND the turn needs.")
+
+
+class CreativeIdeas(BaseModel):
+    """External creativity engine."""
+    ideas: List[str] = Field(..., description="Surprising but possible approaches.")
+
+
+class MonologueMemo(BaseModel):
+    content: str = Field("", description="Something worth storing long-term.")
+    strength: float = Field(0.5, ge=0.0, le=1.0)
+
+
+class MonologueResult(BaseModel):
+    """Subconscious (internal monologue) output."""
+    reflection: str = Field("", description="Free internal stream of thought.")
+    message_to_worker: str = Field("", description="One concise intuition for the acting self.")
+    new_memo: Optional[MonologueMemo] = None
@@ -0,0 +1,408 @@
+"""
+Streaming LLM responses.
+
+- astream_llm: async generator yielding raw text deltas (all three providers).
+- ReplyStreamExtractor: incremental JSON scanner that decodes the top-level "reply" string while it arrives
+  and hands out every object of the top-level "tools" array as soon as it is closed.
+- stream_llm: blocking wrapper; pushes reply deltas and completed tool calls to callbacks and returns
+  the fully parsed response (the same dict as call_llm).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .config import DEFAULT_PROVIDER, PROVIDER_CONFIG, CALL_TIMEOUT_SECONDS, get_client_type
+from .clients import get_async_client, get_generative_model
+from .providers import extract_usage, response_format_for, gemini_config_for, sampling_args
+from .scheduler import llm_slot, CALL_PRIORITY, priority_for
+from .ratelimit import with_retries
+from .routing import resolve_chain, get_provider_stats
+from .routes import get_route, request_options
+from .parsing import parse_json_response
+from .journal import record_call
+from .prompt_cache import aget_cached_model, observe_prefix, record_cache_usage
+from .metrics import record_llm_call
+from .aio import run_sync, afinish_structured, timeout_response
+from ..deadline import time_budget
+
+logger = logging.getLogger(__name__)
+
+_SIMPLE_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+
+class ReplyStreamExtractor:
+    """
+    Character-level JSON scanner.
+    Tracks nesting and string state across chunk boundaries, and returns the decoded
+    characters of the top-level "reply" string value as soon as they arrive.
+    Objects of the top-level "tools" array are collected raw and parsed when they close
+    (see pop_tools). Anything outside the outermost object (e.g. ```json fences) is ignored.
+    """
+
+    def __init__(self, key: str = "reply", tools_key: str = "tools"):
+        self.key = key
+        self.tools_key = tools_key
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.unicode_buf: Optional[str] = None
+        self.pending_high: Optional[int] = None
+        self.expect_key = False
+        self.current_key = ""
+        self.last_key = ""
+        self.capturing = False
+        self.done = False
+        self.text = ""  # Full decoded reply so far
+        self.tool_buf: Optional[List[str]] = None  # Raw text of the tool object being received
+        self.tools_ready: List[Tuple[int, Dict[str, Any]]] = []
+        self.tool_item = 0  # Position in the tools array (counted by commas)
+
+    def feed(self, chunk: str) -> str:
+        """Consumes a raw chunk. Returns the newly decoded reply characters (may be empty)."""
+        out: List[str] = []
+        for ch in chunk:
+            if self.tool_buf is not None:
+                self.tool_buf.append(ch)
+
+            if self.in_string:
+                self._string_char(ch, out)
+            elif ch == '"':
+                self._open_string()
+            elif ch in "{[":
+                self.stack.append(ch)
+                self.expect_key = ch == "{"
+                if ch == "{" and self._at_tool_item():
+                    self.tool_buf = ["{"]
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                self.expect_key = False
+                if self.tool_buf is not None and len(self.stack) == 2:
+                    self._close_tool()
+            elif ch == ",":
+                self.expect_key = bool(self.stack) and self.stack[-1] == "{"
+                if self.stack == ["{", "["] and self.last_key == self.tools_key:
+                    self.tool_item += 1
+            elif ch == ":":
+                self.expect_key = False
+
+        new_text = "".join(out)
+        self.text += new_text
+        return new_text
+
+    def pop_tools(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """(index in the tools array, tool object) pairs completed since the last call."""
+        ready, self.tools_ready = self.tools_ready, []
+        return ready
+
+    # --- INTERNALS ---
+
+    def _at_top_object(self) -> bool:
+        return len(self.stack) == 1 and self.stack[0] == "{"
+
+    def _at_tool_item(self) -> bool:
+        # {"tools": [ {<- here
+        return self.stack == ["{", "[", "{"] and self.last_key == self.tools_key
+
+    def _close_tool(self):
+        raw = "".join(self.tool_buf).replace(r"\'", "'")
+        self.tool_buf = None
+        try:
+            tool = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if isinstance(tool, dict) and tool.get("name"):
+            self.tools_ready.append((self.tool_item, tool))
+
+    def _open_string(self):
+        self.in_string = True
+        self.current_key = ""
+        if self._at_top_object() and not self.expect_key and self.last_key == self.key and not self.done:
+            self.capturing = True
+
+    def _emit(self, text: str, out: List[str]):
+        if self.capturing:
+            out.append(text)
+        elif self.expect_key and self._at_top_object():
+            self.current_key += text
+
+    def _close_string(self):
+        self.in_string = False
+        if self.capturing:
+            self.capturing = False
+            self.done = True
+        elif self.expect_key and self._at_top_object():
+            self.last_key = self.current_key
+
+    def _string_char(self, ch: str, out: List[str]):
+        if self.unicode_buf is not None:
+            self.unicode_buf += ch
+            if len(self.unicode_buf) == 4:
+                self._emit_codepoint(self.unicode_buf, out)
+                self.unicode_buf = None
+            return
+
+        if self.escape:
+            self.escape = False
+            if ch == "u":
+                self.unicode_buf = ""
+            else:
+                # Unknown escapes (e.g. the common invalid \') are kept literally
+                self._emit(_SIMPLE_ESCAPES.get(ch, ch), out)
+            return
+
+        if ch == "\\":
+            self.escape = True
+        elif ch == '"':
+            self._close_string()
+        else:
+            self._emit(ch, out)
+
+    def _emit_codepoint(self, hex_digits: str, out: List[str]):
+        try:
+            cp = int(hex_digits, 16)
+        except ValueError:
+            return
+        if 0xD800 <= cp < 0xDC00:
+            self.pending_high = cp
+            return
+        if 0xDC00 <= cp < 0xE000 and self.pending_high is not None:
+            cp = 0x10000 + ((self.pending_high - 0xD800) << 10) + (cp - 0xDC00)
+        self.pending_high = None
+        self._emit(chr(cp), out)
+
+
+# ====================================================================
+# PROVIDER STREAMS
+# ====================================================================
+
+def _merge_usage(usage_out: Optional[Dict[str, int]], usage: Dict[str, int]):
+    if usage_out is not None and any(usage.values()):
+        usage_out.update(usage)
+
+
+async def astream_llm(
+        prompt: str,
+        provider: str = DEFAULT_PROVIDER,
+        json_mode: bool = True,
+        usage_out: Optional[Dict[str, int]] = None,
+        cache_prefix: Optional[str] = None,
+        schema=None,
+        options: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Yields raw text deltas of the model answer. Raises on provider errors.
+    If 'usage_out' is given, it is filled with the token usage reported by the stream.
+    'cache_prefix', 'schema' and 'options' work as in providers.acomplete.
+    """
+    config = PROVIDER_CONFIG.get(provider)
+    if not config:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    options = options or {}
+    model_name = options.get("model") or config["model"]
+    client_type = get_client_type(provider)
+    client = get_async_client(provider)
+
+    async with llm_slot(provider, prompt):
+        if client_type in ("openai", "groq"):
+            resp_format = response_format_for(client_type, json_mode, schema)
+            extra = sampling_args(client_type, options)
+            if client_type == "openai":
+                extra["stream_options"] = {"include_usage": True}
+            stream = await with_retries(provider, prompt, lambda: client.chat.completions.create(
+                model=model_name,
+                messages=[{"role": "user", "content": prompt}],
+                response_format=resp_format,
+                stream=True,
+                **extra
+            ))
+            async for chunk in stream:
+                # OpenAI: final chunk with 'usage' | Groq: 'x_groq.usage' on the last chunk
+                usage_holder = getattr(chunk, "x_groq", None) or chunk
+                if getattr(usage_holder, "usage", None) is not None:
+                    _merge_usage(usage_out, extract_usage(usage_holder))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        elif client_type == "google":
+            gen_config = gemini_config_for(json_mode, schema, options)
+            model, contents = None, prompt
+            if cache_prefix and prompt.startswith(cache_prefix):
+                model = await aget_cached_model(provider, model_name, gen_config, cache_prefix)
+                if model is not None:
+                    contents = prompt[len(cache_prefix):].lstrip("\n")
+            if model is None:
+                model = get_generative_model(provider, model_name, gen_config)
+
+            response = await with_retries(provider, prompt, lambda: model.generate_content_async(contents, stream=True))
+            async for chunk in response:
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    _merge_usage(usage_out, extract_usage(chunk))
+                try:
+                    delta = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. the final finish_reason chunk)
+                    continue
+                if delta:
+                    yield delta
+
+        else:
+            raise ValueError(f"Unsupported provider client type: {client_type}")
+
+
+async def astream_call_llm(
+        prompt: str,
+        provider: Optional[str] = None,
+        json_mode: bool = True,
+        on_reply_delta: Optional[Callable[[str], None]] = None,
+        call_site: str = "reply",
+        cache_prefix: Optional[str] = None,
+        on_tool_call: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        schema=None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Streams the answer, forwarding decoded "reply" text to 'on_reply_delta' and every
+    completed object of the "tools" array to 'on_tool_call(index, tool)'.
+    Returns the same dict as acall_llm once the whole response has arrived.
+    The callbacks run on the LLM loop thread, so they must not block (e.g. Queue.put, executor.submit).
+    Provider, model and sampling come from the call site's route (routes.py) unless 'provider' is given.
+    Failover follows the call site's chain, but only until the first token arrived
+    (text already on the console cannot be taken back). No hedging for streams.
+    'schema' validates the final answer as in acall_llm (the streamed reply text is not re-sent).
+    'timeout' bounds the whole stream; running out returns a 'timed_out' reply (partial text is journaled).
+    'priority' overrides the scheduler class of the call site (scheduler.py).
+    """
+    if provider and provider not in PROVIDER_CONFIG:
+        return {"reply": f"ERROR: Unknown provider: {provider}", "tools": []}
+
+    priority_token = CALL_PRIORITY.set(priority_for(call_site, priority))
+    try:
+        extra = {"stream": True}
+        if cache_prefix:
+            extra["prefix_hash"] = observe_prefix(call_site, cache_prefix)
+
+        timeout = CALL_TIMEOUT_SECONDS if timeout is None else max(0.0, timeout)
+        expires = time.monotonic() + timeout
+
+        route = get_route(call_site)
+        errors: List[str] = []
+        for current in resolve_chain(provider or route.get("provider"), call_site):
+            options = request_options(route, current)
+            model_name = options["model"]
+            extractor = ReplyStreamExtractor()
+            parts: List[str] = []
+            started = time.perf_counter()
+            first_token_at = None
+            first_reply_at = None
+            usage: Dict[str, int] = {}
+
+            deltas = astream_llm(prompt, provider=current, json_mode=json_mode, usage_out=usage,
+                                 cache_prefix=cache_prefix, schema=schema if json_mode else None, options=options)
+            try:
+                while True:
+                    try:
+                        delta = await asyncio.wait_for(deltas.__anext__(), max(0.0, expires - time.monotonic()))
+                    except StopAsyncIteration:
+                        break
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(delta)
+
+                    # Plain text mode: the whole stream is the reply
+                    reply_delta = extractor.feed(delta) if json_mode else delta
+                    if reply_delta:
+                        if first_reply_at is None:
+                            first_reply_at = time.perf_counter()
+                        if on_reply_delta:
+                            on_reply_delta(reply_delta)
+
+                    if on_tool_call and json_mode:
+                        for index, tool in extractor.pop_tools():
+                            on_tool_call(index, tool)
+
+            except asyncio.TimeoutError:
+                # The deadline covers the whole chain: no failover once it is spent
+                await deltas.aclose()
+                return timeout_response(call_site, current, prompt, timeout, json_mode, partial="".join(parts))
+
+            except Exception as e:
+                get_provider_stats(current).record_error()
+                latency = time.perf_counter() - started
+                partial = "".join(parts)
+                record_llm_call(call_site, current, model_name, latency, len(prompt), len(partial), usage, status="error")
+                record_call(
+                    call_site, current, model_name, prompt, partial, latency,
+                    usage=usage, json_mode=json_mode, error=str(e), extra=extra
+                )
+                if first_token_at is not None:
+                    return {"reply": f"CRITICAL ERROR ({current}): {e}", "tools": []}
+                errors.append(f"{current}: {e}")
+                logger.warning(f"LLM stream failover [{call_site}]: {current} failed before the first token ({e}).")
+                continue
+
+            total = time.perf_counter() - started
+            ttft = (first_token_at - started) if first_token_at else total
+            ttfr = (first_reply_at - started) if first_reply_at else total
+            get_provider_stats(current).record_success(total)
+            logger.info(
+                f"LLM stream ({current}/{model_name}): TTFT {ttft * 1000:.0f} ms, "
+                f"first reply char {ttfr * 1000:.0f} ms, total {total * 1000:.0f} ms"
+            )
+
+            raw_response_text = "".join(parts)
+            record_cache_usage(current, usage)
+            record_llm_call(call_site, current, model_name, total, len(prompt), len(raw_response_text), usage)
+            record_call(
+                call_site, current, model_name, prompt, raw_response_text, total,
+                usage=usage, json_mode=json_mode,
+                extra=dict(extra, ttft_ms=round(ttft * 1000, 1))
+            )
+
+            if not json_mode:
+                return {"reply": raw_response_text, "tools": []}
+
+            if schema is not None:
+                return await afinish_structured(raw_response_text, schema, call_site, timeout=expires - time.monotonic())
+
+            return parse_json_response(raw_response_text, call_site=call_site)
+
+        return {"reply": f"CRITICAL ERROR ({provider or call_site}): {' | '.join(errors)}", "tools": []}
+    finally:
+        CALL_PRIORITY.reset(priority_token)
+
+
+def stream_llm(
+        prompt: str,
+        provider: Optional[str] = None,
+        json_mode: bool = True,
+        on_reply_delta: Optional[Callable[[str], None]] = None,
+        call_site: str = "reply",
+        cache_prefix: Optional[str] = None,
+        on_tool_call: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        schema=None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Blocking wrapper around astream_call_llm for the thread-based callers.
+    Without an explicit 'timeout' the remaining budget of the caller's deadline applies.
+    """
+    if timeout is None:
+        timeout = time_budget(CALL_TIMEOUT_SECONDS)
+    return run_sync(astream_call_llm(
+        prompt, provider=provider, json_mode=json_mode, on_reply_delta=on_reply_delta,
+        call_site=call_site, cache_prefix=cache_prefix, on_tool_call=on_tool_call, schema=schema,
+        timeout=timeout, priority=priority
+    ))
@@ -0,0 +1,159 @@
+"""
+Structured (schema-validated) outputs.
+
+- A pydantic model passed as call_llm(..., schema=Model) is translated into the provider's
+  native structured-output format: OpenAI 'json_schema' response_format, Gemini 'response_schema'.
+  Groq (and schemas Gemini cannot express) fall back to plain JSON mode.
+- The answer is validated against the model. On failure one cheap repair call
+  (call site "repair") fixes the JSON instead of re-running the whole prompt.
+- Parse, validation and repair outcomes are counted per call site.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_OUTCOMES = counter(
+    "llm_schema_outcomes_total",
+    "Structured output results: ok, repaired, failed (after repair).",
+    ("call_site", "outcome")
+)
+
+# Keys of the OpenAPI subset Gemini accepts in response_schema
+_GEMINI_KEYS = {"type", "format", "description", "nullable", "enum", "properties", "required", "items"}
+
+REPAIR_MAX_INPUT_CHARS = 12000
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    """Resolves '$ref' pointers into '$defs' (neither Gemini nor every OpenAI model likes them)."""
+    if isinstance(node, dict):
+        if "$ref" in node:
+            name = node["$ref"].split("/")[-1]
+            return _inline_refs(defs[name], defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items() if k != "$defs"}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+def json_schema_of(schema: Type[BaseModel]) -> Dict[str, Any]:
+    raw = schema.model_json_schema()
+    return _inline_refs(raw, raw.get("$defs", {}))
+
+
+def openai_response_format(schema: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema.__name__, "schema": json_schema_of(schema), "strict": False}
+    }
+
+
+def _gemini_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    # Optional[X] -> anyOf [X, null] -> X + nullable
+    if "anyOf" in node:
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        if len(options) != 1:
+            raise _Unsupported("union types")
+        merged = dict(options[0], nullable=True)
+        if "description" in node:
+            merged["description"] = node["description"]
+        return _gemini_node(merged)
+
+    out = {k: v for k, v in node.items() if k in _GEMINI_KEYS}
+    if out.get("type") == "object":
+        properties = node.get("properties") or {}
+        if not properties:
+            # Free-form objects (e.g. tool args) cannot be described to Gemini
+            raise _Unsupported("object without properties")
+        out["properties"] = {k: _gemini_node(v) for k, v in properties.items()}
+    if out.get("type") == "array" and "items" in node:
+        out["items"] = _gemini_node(node["items"])
+    if "type" not in out:
+        raise _Unsupported("untyped node")
+    return out
+
+
+def gemini_response_schema(schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """Gemini response_schema dict, or None if the model cannot be expressed in its subset."""
+    try:
+        return _gemini_node(json_schema_of(schema))
+    except _Unsupported as e:
+        logger.debug(f"No native Gemini schema for {schema.__name__}: {e}")
+        return None
+
+
+# ====================================================================
+# VALIDATION / REPAIR
+# ====================================================================
+
+def _strip_fences(text: str) -> str:
+    clean = (text or "").strip()
+    if clean.startswith("```json"): clean = clean[7:]
+    if clean.startswith("```"): clean = clean[3:]
+    if clean.endswith("```"): clean = clean[:-3]
+    return clean.strip()
+
+
+def validate_output(schema: Type[BaseModel], raw_text: str) -> Tuple[Optional[BaseModel], str]:
+    """
+    Validates a raw answer. Returns (model, "") or (None, error description).
+    Lenient on the usual wrapping (code fences, a one-element list, invalid \\' escapes).
+    """
+    clean = _strip_fences(raw_text)
+    try:
+        return schema.model_validate_json(clean), ""
+    except ValidationError:
+        pass
+
+    try:
+        data = json.loads(clean.replace(r"\'", "'"))
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e}"
+
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], dict):
+        data = data[0]
+    try:
+        return schema.model_validate(data), ""
+    except ValidationError as e:
+        return None, str(e)
+
+
+def build_repair_prompt(schema: Type[BaseModel], raw_text: str, error: str) -> str:
+    return f"""
+[TASK: JSON REPAIR]
+The text below should be a JSON object matching the schema, but it failed validation.
+Fix it with minimal changes: keep every value that can be kept, add missing required fields
+with sensible content, drop anything that does not belong. Return ONLY the JSON object.
+
+[SCHEMA]
+{json.dumps(json_schema_of(schema), ensure_ascii=False)}
+
+[VALIDATION ERROR]
+{error[:2000]}
+
+[TEXT TO REPAIR]
+{raw_text[:REPAIR_MAX_INPUT_CHARS]}
+""".strip()
+
+
+def to_response_dict(model: BaseModel) -> Dict[str, Any]:
+    """Validated model -> the usual response dict (always has 'reply' and 'tools')."""
+    data = model.model_dump()
+    data.setdefault("reply", "")
+    data.setdefault("tools", [])
+    return data
+
+
+def record_outcome(call_site: str, outcome: str):
+    SCHEMA_OUTCOMES.inc(call_site=call_site, outcome=outcome)
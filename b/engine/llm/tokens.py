@@ -0,0 +1,14 @@
+"""
+Fast local token estimation (no tokenizer, no network).
+Shared by the prompt budgeter and the rate limiter.
+"""
+
+# ~4 bytes of UTF-8 per token for mixed prose/JSON.
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate. Slightly pessimistic for non-ASCII text."""
+    if not text:
+        return 0
+    return (len(text.encode("utf-8")) + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
@@ -1,7 +1,7 @@
 from .config import MemoryConfig
 from .models import ExtractionResult, RankedMemory
 from .manager import store_memory, retrieve_relevant_memories
-from .extractor import extract_memory_from_context
+from .extractor import extract_memory_from_context, format_context_snippet, build_extraction_prompt
 
 __all__ = [
     "MemoryConfig",
@@ -10,4 +10,6 @@ __all__ = [
     "store_memory",
     "retrieve_relevant_memories",
     "extract_memory_from_context",
+    "format_context_snippet",
+    "build_extraction_prompt",
 ]
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Bulk memory jobs on the batch runner (engine/llm/batch.py); every step can be restarted.
+
+- backfill_from_context: memory extraction over an old context (a mode's context.json or an
+  exported list of context entries), then one embedding job for the extracted essences,
+  then store_memory (deduplication as for live memories).
+  Re-extracting with a new prompt = the same call under a new job name.
+- reembed_memories: new vectors for stored memories (after changing the embedding model).
+
+Run (from b/):
+    python -m engine.memory.backfill extract --mode general [--source old_context.json] [--job NAME]
+    python -m engine.memory.backfill reembed [--mode general] [--job NAME]
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from engine import context
+from engine.llm.batch import create_job, run_job
+from engine.llm.structured import validate_output
+
+from .extractor import format_context_snippet, build_extraction_prompt
+from .manager import store_memory, list_memory_essences, update_memory_embedding
+from .models import ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+BACKFILL_WINDOW = 6         # Context entries per extraction (as CONTEXT_SNIPPET_SIZE in memory_thread)
+BACKFILL_MIN_WEIGHT = 0.2   # Lighter memories are not stored (same rule as the live memory thread)
+
+
+def _snippets(items: List[Dict[str, Any]], window: int) -> List[str]:
+    snippets = []
+    for start in range(0, len(items), window):
+        text = format_context_snippet(items[start:start + window])
+        if text.strip():
+            snippets.append(text)
+    return snippets
+
+
+def backfill_from_context(
+        mode_id: str,
+        items: Optional[List[Dict[str, Any]]] = None,
+        job_name: Optional[str] = None,
+        provider: Optional[str] = None,
+        model_version: str = "Backfill",
+        window: int = BACKFILL_WINDOW
+) -> Dict[str, Any]:
+    """
+    Extracts and stores memories from 'items' (default: the mode's saved context).
+    Returns the summaries of the extraction and the embedding job.
+    """
+    job_name = job_name or f"backfill-{mode_id}"
+    if items is None:
+        items = context.load_context(mode_id)
+
+    extract_job = create_job(
+        f"{job_name}-extract",
+        ({"custom_id": f"s{i:05d}", "prompt": build_extraction_prompt(text)}
+         for i, text in enumerate(_snippets(items, window))),
+        kind="chat", provider=provider, call_site="extract"
+    )
+    extract_summary = run_job(extract_job)
+
+    # Extraction results -> memories worth storing
+    extractions: Dict[str, ExtractionResult] = {}
+    invalid = 0
+    for custom_id, result in extract_job.results().items():
+        if "text" not in result:
+            continue
+        extraction, error = validate_output(ExtractionResult, result["text"])
+        if extraction is None:
+            invalid += 1
+            logger.warning(f"Backfill: invalid extraction '{custom_id}': {error[:200]}")
+        elif extraction.memory_weight > BACKFILL_MIN_WEIGHT:
+            extractions[custom_id] = extraction
+    extract_summary["invalid"] = invalid
+    extract_summary["kept"] = len(extractions)
+
+    embed_job = create_job(
+        f"{job_name}-embed",
+        ({"custom_id": cid, "text": ex.essence} for cid, ex in sorted(extractions.items())),
+        kind="embedding"
+    )
+
+    def _store(request: Dict[str, Any], result: Dict[str, Any]):
+        extraction = extractions.get(request["custom_id"])
+        if extraction is None:
+            return  # Extraction no longer valid (e.g. weight rule changed): nothing to store
+        status = store_memory(mode_id, extraction, model_version=model_version, embedding_vector=result["embedding"])
+        if "ERROR" in status:
+            raise RuntimeError(status)
+
+    embed_summary = run_job(embed_job, _store)
+    return {"extract": extract_summary, "embed": embed_summary}
+
+
+def reembed_memories(
+        mode_id: Optional[str] = None,
+        job_name: Optional[str] = None,
+        provider: Optional[str] = None
+) -> Dict[str, Any]:
+    """Recomputes the vectors of the stored memories (of one mode, or all). Returns the job summary."""
+    job_name = job_name or f"reembed-{mode_id or 'all'}"
+
+    def _requests():
+        for memory_id, essence in list_memory_essences(mode_id):
+            if essence.strip():
+                yield {"custom_id": memory_id, "text": essence}
+
+    job = create_job(job_name, _requests(), kind="embedding", provider=provider)
+
+    def _update(request: Dict[str, Any], result: Dict[str, Any]):
+        if not update_memory_embedding(request["custom_id"], result["embedding"]):
+            logger.warning(f"Re-embedding: memory {request['custom_id']} no longer exists.")
+
+    return run_job(job, _update)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline memory backfill / re-embedding via batch jobs.")
+    parser.add_argument("command", choices=["extract", "reembed"])
+    parser.add_argument("--mode", default=None, help="Mode id (extract: default 'general').")
+    parser.add_argument("--source", default=None, help="JSON file with a list of context entries (extract).")
+    parser.add_argument("--job", default=None, help="Job name; reuse it to resume, change it to run again.")
+    parser.add_argument("--provider", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+                        datefmt="%H:%M:%S")
+
+    if args.command == "reembed":
+        summary = reembed_memories(args.mode, job_name=args.job, provider=args.provider)
+    else:
+        import main_data  # Generation label of the stored memories
+        items = None
+        if args.source:
+            with Path(args.source).open("r", encoding="utf-8") as f:
+                items = json.load(f)
+        summary = backfill_from_context(
+            args.mode or "general", items=items, job_name=args.job,
+            provider=args.provider, model_version=main_data.GENERATION
+        )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import logging
 import json
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 # Importing shared LLM caller and data model
 from engine.llm import call_llm
@@ -12,27 +12,59 @@ from engine.constants import ALLOWED_EMOTIONS
 logger = logging.getLogger(__name__)
 
 
-def extract_memory_from_context(context_text: str) -> Optional[ExtractionResult]:
+def format_context_snippet(items: List[Dict[str, Any]]) -> str:
     """
-    Calls the LLM to analyze the provided text context and extract
-    structured memory (Essence, Emotions, Weight, Lesson).
+    Converts context entries into the narrative format of the extraction prompt
+    ('Helper: ...', 'Me: ...', tool usage and system events).
+    """
+    snippet_text = ""
+    for item in items:
+        role = item.get("role", "?")
+        content = item.get("content", "")
 
-    Args:
-        context_text: The last X elements of the conversation concatenated as a string.
-                      (Expected format: 'Helper: ... \n Me: ...')
+        if role == "user":
+            snippet_text += f"Helper: {content}\n"
+
+        elif role == "assistant":
+            snippet_text += f"Me: {content}\n"
+
+        elif role == "tool" or item.get("type") == "tool_result":
+            try:
+                tool_data = json.loads(content)
+                if isinstance(tool_data, list):
+                    for t in tool_data:
+                        name = t.get("name", "unknown")
+                        args = t.get("args", "{}")
+                        output = t.get("output", "")
+
+                        snippet_text += f"I used a tool. Tool: {name}, Args: {args}\n"
+                        if output:
+                            snippet_text += f"Result: {output}\n"
+                else:
+                    snippet_text += f"Tool usage (raw): {content}\n"
+
+            except json.JSONDecodeError:
+                snippet_text += f"Tool usage (error parsing): {content}\n"
+
+        elif role == "system":
+            snippet_text += f"[System Event]: {content}\n"
+
+        else:
+            snippet_text += f"[{role}]: {content}\n"
+
+    return snippet_text
 
-    Returns:
-        ExtractionResult object or None in case of error.
-    """
-    if not context_text or not context_text.strip():
-        logger.debug("Context text is empty, skipping extraction.")
-        return None
 
+def build_extraction_prompt(context_text: str) -> str:
+    """
+    The memory extraction prompt for one conversation snippet
+    (shared by the live extraction and the batch backfill).
+    """
     # Convert list to string for the prompt
     emotions_list_str = ", ".join(ALLOWED_EMOTIONS)
 
     # UPDATED: Added TERMINOLOGY RULES to prevent 'User' usage in database records.
-    prompt = f"""
+    return f"""
 [TASK: MEMORY EXTRACTION]
 Analyze the conversation snippet below and create a structured memory for your future self.
 Goal: The system should learn from mistakes and successes.
@@ -63,11 +95,30 @@ RESPONSE FORMAT (JSON ONLY):
 }}
 """
 
+
+def extract_memory_from_context(context_text: str) -> Optional[ExtractionResult]:
+    """
+    Calls the LLM to analyze the provided text context and extract
+    structured memory (Essence, Emotions, Weight, Lesson).
+
+    Args:
+        context_text: The last X elements of the conversation concatenated as a string.
+                      (Expected format: 'Helper: ... \n Me: ...')
+
+    Returns:
+        ExtractionResult object or None in case of error.
+    """
+    if not context_text or not context_text.strip():
+        logger.debug("Context text is empty, skipping extraction.")
+        return None
+
+    prompt = build_extraction_prompt(context_text)
+
     try:
         logger.info("Initiating memory extraction via LLM.")
 
         # LLM call
-        response_data = call_llm(prompt)
+        response_data = call_llm(prompt, call_site="extract", schema=ExtractionResult)
 
         # If response contains 'reply' key (error message), something went wrong
         if "reply" in response_data and "essence" not in response_data:
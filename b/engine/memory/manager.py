@@ -23,20 +23,23 @@ logger = logging.getLogger(__name__)
 def store_memory(
         mode_id: str,
         extraction: ExtractionResult,
-        model_version: str = "Unknown"
+        model_version: str = "Unknown",
+        embedding_vector: Optional[List[float]] = None
 ) -> str:
     """
     Saves the extracted memory into the database.
     Automatically generates embedding and handles deduplication.
+    A precomputed 'embedding_vector' of the essence skips the embedding call.
     """
     logger.info(f"Attempting to store memory for Mode: {mode_id}")
 
     # 1. Generate Embedding (Google text-embedding-005)
-    try:
-        embedding_vector = get_embedding(extraction.essence)
-    except Exception as e:
-        logger.error(f"Embedding generation failed: {e}")
-        return f"ERROR: Embedding generation failed: {e}"
+    if embedding_vector is None:
+        try:
+            embedding_vector = get_embedding(extraction.essence)
+        except Exception as e:
+            logger.error(f"Embedding generation failed: {e}")
+            return f"ERROR: Embedding generation failed: {e}"
 
     if not embedding_vector:
         logger.error("Generated embedding is empty.")
@@ -103,7 +106,8 @@ def retrieve_relevant_memories(
         current_mode: str,
         query_text: str,
         current_emotions: List[str] = None,
-        exact_emotions_only: bool = False
+        exact_emotions_only: bool = False,
+        query_vector: Optional[List[float]] = None
 ) -> List[RankedMemory]:
     """
     Hybrid Retrieval:
@@ -112,6 +116,7 @@ def retrieve_relevant_memories(
 
     UPDATED: Supports 'exact_emotions_only' mode which bypasses vector search
     and uses SQL Array Overlap (&&) operator for strict emotion filtering.
+    A precomputed 'query_vector' of query_text skips the embedding call.
     """
 
     # If no query and no exact emotion filter, nothing to do
@@ -122,11 +127,9 @@ def retrieve_relevant_memories(
         f"Retrieving memories. Mode: {current_mode}, ExactEmotion: {exact_emotions_only}, Query: '{query_text[:20]}...'")
 
     # 1. Embedding Strategy
-    query_vector = None
-
     # Only generate embedding if we are NOT in exact mode, or if we have text we want to use for scoring
     # In exact mode, query_text is usually empty/ignored for vector search, so we skip to save API calls.
-    if not exact_emotions_only and query_text:
+    if query_vector is None and not exact_emotions_only and query_text:
         try:
             query_vector = get_embedding(query_text)
         except Exception as e:
@@ -266,4 +269,33 @@ def retrieve_relevant_memories(
         logger.error(f"Error during retrieve_relevant_memories: {e}")
         return []
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+def list_memory_essences(mode_id: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    (id, essence) of every stored memory, optionally of one mode only (re-embedding jobs).
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            if mode_id:
+                cur.execute("SELECT id, essence FROM memories WHERE mode_id = %s ORDER BY created_at;", (mode_id,))
+            else:
+                cur.execute("SELECT id, essence FROM memories ORDER BY created_at;")
+            return [(str(mid), essence or "") for mid, essence in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def update_memory_embedding(memory_id: str, embedding_vector: List[float]) -> bool:
+    """Replaces the vector of one memory. Returns False if the memory no longer exists."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE memories SET embedding = %s::vector WHERE id = %s::uuid;",
+                (embedding_vector, memory_id)
+            )
+            return cur.rowcount > 0
+    finally:
+        conn.close()
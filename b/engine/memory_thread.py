@@ -7,8 +7,10 @@ from datetime import datetime
 # Engine modules
 # UPDATED: rooms -> modes
 from engine import modes, context
+from engine.llm import get_embedding
 from engine.memory import (
     extract_memory_from_context,
+    format_context_snippet,
     store_memory,
     retrieve_relevant_memories,
     RankedMemory
@@ -92,40 +94,7 @@ def memory_loop():
             snippet_items = full_context[-CONTEXT_SNIPPET_SIZE:]
 
             # Convert to string for LLM (Narrative Format)
-            snippet_text = ""
-            for item in snippet_items:
-                role = item.get("role", "?")
-                content = item.get("content", "")
-
-                if role == "user":
-                    snippet_text += f"Helper: {content}\n"
-
-                elif role == "assistant":
-                    snippet_text += f"Me: {content}\n"
-
-                elif role == "tool" or item.get("type") == "tool_result":
-                    try:
-                        tool_data = json.loads(content)
-                        if isinstance(tool_data, list):
-                            for t in tool_data:
-                                name = t.get("name", "unknown")
-                                args = t.get("args", "{}")
-                                output = t.get("output", "")
-
-                                snippet_text += f"I used a tool. Tool: {name}, Args: {args}\n"
-                                if output:
-                                    snippet_text += f"Result: {output}\n"
-                        else:
-                            snippet_text += f"Tool usage (raw): {content}\n"
-
-                    except json.JSONDecodeError:
-                        snippet_text += f"Tool usage (error parsing): {content}\n"
-
-                elif role == "system":
-                    snippet_text += f"[System Event]: {content}\n"
-
-                else:
-                    snippet_text += f"[{role}]: {content}\n"
+            snippet_text = format_context_snippet(snippet_items)
 
             # --- B. EXTRACTION (What did we learn now?) ---
             extraction = extract_memory_from_context(snippet_text)
@@ -134,13 +103,17 @@ def memory_loop():
                 logger.warning("Memory extraction failed (empty or error).")
                 continue
 
+            # The essence is both the stored vector and the search query -> embed it only once
+            essence_vector = get_embedding(extraction.essence)
+
             # --- C. SAVE (Consolidation) ---
             if extraction.memory_weight > 0.2:
                 # UPDATED: room_id -> mode_id
                 save_status = store_memory(
                     mode_id=current_mode,
                     extraction=extraction,
-                    model_version=main_data.GENERATION
+                    model_version=main_data.GENERATION,
+                    embedding_vector=essence_vector or None
                 )
                 logger.info(f"Memory Recorded ({current_mode}): {save_status} [Weight: {extraction.memory_weight}]")
             else:
@@ -152,7 +125,8 @@ def memory_loop():
             relevant_items = retrieve_relevant_memories(
                 current_mode=current_mode,
                 query_text=extraction.essence,
-                current_emotions=extraction.dominant_emotions
+                current_emotions=extraction.dominant_emotions,
+                query_vector=essence_vector or None
             )
 
             # --- E. PUBLISH (Output) ---
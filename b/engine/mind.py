@@ -4,16 +4,61 @@
 # 2. INTERPRETER CORE (Gemini): Convergent thinking (analysis and synthesis).
 DEBUG_THOUGHT = False
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from textwrap import dedent
-import json
+import logging
+import threading
+import time
 
 # Importing the new, parameterized call
-from .llm import call_llm
-
-# CONFIGURATION: Which model should be the "Creative Maniac"?
-# Recommended: "groq" (Llama 3) or "openai" (GPT-4).
-CREATIVE_PROVIDER = "openai"
+from .llm import call_llm, acall_llm, run_concurrently
+from .llm.schemas import MindThought, MindFusedThought, CreativeIdeas
+from .llm.config import SIZE_BUCKETS
+from .llm.metrics import histogram, counter
+from .deadline import Deadline
+from prompts.snapshot import TurnSnapshot, record_prompt
+
+logger = logging.getLogger(__name__)
+
+# Per-call latency is in llm_call_seconds{call_site="mind.*"}; these cover the whole cycle
+MIND_SECONDS = histogram("mind_thought_seconds", "Duration of one MIND cycle, by MIND mode.", ("mode",))
+MIND_OUTPUT_CHARS = histogram("mind_output_chars", "Size of the MIND essence + plan.", buckets=SIZE_BUCKETS)
+MIND_DEGRADED = counter("mind_degraded_total", "MIND steps skipped or cut short by the task deadline.", ("step",))
+
+# The "Creative Maniac" model is the route of call site "mind.creative" (engine/llm/config.py CALL_SITE_ROUTES).
+
+# DEADLINE BUDGET: the creative call gets this share of MIND's budget (at most CREATIVE_MAX_SECONDS)
+# and is skipped when less than CREATIVE_MIN_SECONDS would be left for it.
+CREATIVE_BUDGET_FRACTION = 0.4
+CREATIVE_MAX_SECONDS = 30.0
+CREATIVE_MIN_SECONDS = 5.0
+
+# MIND MODE: how the creative engine and the interpreter are combined.
+# - "sequential": creative call, then the interpreter with its ideas (2 serial round trips)
+# - "parallel":   creative call and a draft interpreter call at once; the ideas are merged into the plan
+# - "fused":      one structured call writes the ideas, then essence and plan (call site "mind.fused")
+# - "interpreter": the interpreter alone, no creative engine (1 round trip; chosen per turn by
+#                 engine/mind_router.py, never by "auto")
+# - "auto":       the first mode of MIND_MODE_PREFERENCE whose expected duration fits
+#                 MIND_LATENCY_BUDGET_SECONDS (and the task deadline); else the fastest one
+MIND_MODE = "auto"
+MIND_MODES = ("sequential", "parallel", "fused", "interpreter")
+MIND_MODE_PREFERENCE = ["sequential", "parallel", "fused"]
+MIND_LATENCY_BUDGET_SECONDS = 10.0
+
+# Expected call durations (seconds) before the first measurement; then a moving average
+MIND_STEP_PRIOR_SECONDS = {"creative": 4.0, "main": 6.0, "fused": 7.0}
+MIND_STEP_EWMA_ALPHA = 0.3
+
+# MIND INPUT: "full" = identity, the relevant memories and the last context entries, rendered as
+# in the reply prompt; "digest" = identity, memory ids + headlines and the last few entries
+# (prompts/snapshot.py). Fewer input tokens per turn, less detail for the interpreter.
+MIND_INPUT = "full"
+
+MIND_MODE_CHOSEN = counter("mind_mode_total", "MIND cycles by the mode used.", ("mode",))
+
+_STEP_SECONDS = dict(MIND_STEP_PRIOR_SECONDS)
+_STEP_LOCK = threading.Lock()
 
 
 def _shorten(text: str, max_len: int = 8000) -> str:
@@ -23,66 +68,63 @@ def _shorten(text: str, max_len: int = 8000) -> str:
     return text[:max_len] + "\n... (truncated)"
 
 
-def _format_identity(identity: Dict[str, Any]) -> str:
-    try:
-        s = json.dumps(identity, ensure_ascii=False, indent=2)
-    except TypeError:
-        s = str(identity)
-    return _shorten(s)
+def _mind_blocks(snapshot: TurnSnapshot) -> Tuple[str, str, str]:
+    """Identity / memory / context blocks of the MIND prompts, from the turn's shared renderings."""
+    ident_block, mem_block, ctx_block = snapshot.mind_blocks(digest=MIND_INPUT == "digest")
+    return _shorten(ident_block), mem_block, ctx_block
 
 
-def _format_memory(memory: List[Dict[str, Any]], limit: int = 5) -> str:
-    if not memory:
-        return "No recorded memories."
-    recent = memory[-limit:]
-    lines: List[str] = []
-    for m in recent:
-        content = str(m.get("content") or "").strip()
-        if len(content) > 20000: content = content[:20000] + " ..."
-        lines.append(f"- ({m.get('type', '?')}) {content}")
-    return "\n".join(lines)
+# --------------------------------------------------------------------
+# 0. MODE SELECTION (LATENCY BUDGET)
+# --------------------------------------------------------------------
+def _observe_step(step: str, seconds: float):
+    with _STEP_LOCK:
+        _STEP_SECONDS[step] += MIND_STEP_EWMA_ALPHA * (seconds - _STEP_SECONDS[step])
 
 
-def _format_context(context: List[Dict[str, Any]], limit: int = 10) -> str:
-    """
-    Formats context for the MIND.
-    UPDATED: Translates roles to 'Helper'/'Me' so the internal planner sees the correct relationship.
-    """
-    if not context:
-        return "No context."
-    recent = context[-limit:]
-    lines: List[str] = []
-    for e in recent:
-        role = e.get("role", "?")
-        content = (e.get("content") or "").strip()
-        if len(content) > 20000: content = content[:20000] + " ..."
+def expected_mode_seconds() -> Dict[str, float]:
+    """Expected duration of one MIND cycle per mode, from the measured call durations."""
+    with _STEP_LOCK:
+        creative, main, fused = _STEP_SECONDS["creative"], _STEP_SECONDS["main"], _STEP_SECONDS["fused"]
+    return {"sequential": creative + main, "parallel": max(creative, main), "fused": fused, "interpreter": main}
 
-        # --- ROLE TRANSLATION ---
-        if role == "user":
-            label = "Helper"
-        elif role == "assistant":
-            label = "Me"
-        else:
-            label = f"[{role}]"
 
-        lines.append(f"{label}: {content}")
+def choose_mind_mode(deadline: Optional[Deadline] = None, mode: Optional[str] = None) -> str:
+    """
+    The configured mode, or for "auto" the first preferred mode that fits the latency budget
+    (MIND_LATENCY_BUDGET_SECONDS, shortened by the deadline). If none fits: the fastest one.
+    """
+    mode = mode or MIND_MODE
+    if mode in MIND_MODES:
+        return mode
 
-    return "\n".join(lines)
+    budget = MIND_LATENCY_BUDGET_SECONDS
+    if deadline is not None:
+        budget = min(budget, deadline.remaining())
+    expected = expected_mode_seconds()
+    for candidate in MIND_MODE_PREFERENCE:
+        if expected[candidate] <= budget:
+            return candidate
+    return min(MIND_MODE_PREFERENCE, key=expected.get)
 
 
 # --------------------------------------------------------------------
 # 1. FUNCTION FOR EXTERNAL CREATIVITY GENERATOR
 # --------------------------------------------------------------------
-def _get_creative_alternatives(user_input: str, context_str: str, identity_str: str, memory_str: str) -> str:
+def _creative_prompt(user_input: str, context_str: str, identity_str: str, memory_str: str) -> Tuple[str, str]:
     """
-    Separate LLM call (e.g., Groq) that receives the FULL environment (Identity, Memory, Context),
-    and generates 3 surprising ideas based on it.
+    Prompt of the creative engine: it receives the FULL environment (Identity, Memory, Context).
+    The identity leads the prompt, so the prefix stays cacheable between turns.
     """
-    prompt = f"""
+    prefix = f"""
 [TASK: RADIAL CREATIVITY]
 
 [IDENTITY (WHO YOU ARE)]
 {identity_str}
+""".strip()
+
+    prompt = f"""
+{prefix}
 
 [MEMORY (WHAT YOU KNOW)]
 {memory_str}
@@ -106,21 +148,49 @@ RESPONSE FORMAT (JSON):
   ]
 }}
 """.strip()
+    record_prompt("mind", prompt)
+    return prefix, prompt
 
-    try:
-        # Calling the CREATIVE provider
-        response = call_llm(prompt, provider=CREATIVE_PROVIDER)
-        ideas = response.get("ideas", [])
 
-        if not ideas and response.get("reply"):
-            return str(response.get("reply"))
+def _ideas_text(response: Dict[str, Any]) -> str:
+    """Creative engine answer -> the text handed to the interpreter."""
+    if response.get("timed_out"):
+        MIND_DEGRADED.inc(step="creative_timeout")
+        return "No external ideas (creative engine ran out of time)."
+    ideas = response.get("ideas", [])
 
-        if isinstance(ideas, list) and ideas:
-            return "\n".join(ideas)
-        else:
-            return "No creative ideas were generated."
+    if not ideas and response.get("reply"):
+        return str(response.get("reply"))
+
+    if isinstance(ideas, list) and ideas:
+        return "\n".join(str(i) for i in ideas)
+    else:
+        return "No creative ideas were generated."
+
+
+def _get_creative_alternatives(
+        user_input: str,
+        context_str: str,
+        identity_str: str,
+        memory_str: str,
+        timeout: Optional[float] = None
+) -> str:
+    """
+    Separate LLM call (route "mind.creative") that generates surprising ideas from the full environment.
+    """
+    prefix, prompt = _creative_prompt(user_input, context_str, identity_str, memory_str)
+    started = time.perf_counter()
+    try:
+        # Calling the CREATIVE provider
+        response = call_llm(
+            prompt, call_site="mind.creative", cache_prefix=prefix,
+            schema=CreativeIdeas, timeout=timeout
+        )
+        return _ideas_text(response)
     except Exception as e:
         return f"Creative engine reported error: {e}"
+    finally:
+        _observe_step("creative", time.perf_counter() - started)
 
 
 # --------------------------------------------------------------------
@@ -148,37 +218,50 @@ _INTERNAL_INSTRUCTIONS = dedent("""
     }
 """).strip()
 
+_FUSED_INSTRUCTIONS = dedent("""
+    YOU ARE THE MIND (THE INTERPRETER ADVISOR OF CONSCIOUSNESS) AND ITS CREATIVITY ENGINE IN ONE.
+    Role: Strategic analysis for the Main Thread. You do not decide, you only advise.
 
-def internal_thought(
-        identity: Dict[str, Any],
-        memory: List[Dict[str, Any]],
-        context: List[Dict[str, Any]],
-        user_input: str,
-) -> Dict[str, Any]:
-    """
-    Internal thinking cycle (MIND).
-    """
-    # Format data (once, so both models get the same)
-    ident_block = _format_identity(identity)
-    mem_block = _format_memory(memory)
-    # This now uses the Helper/Me translation
-    ctx_block = _format_context(context)
+    STEP 1 - RADIAL CREATIVITY: Do NOT answer yet. Write 1-3 SURPRISING, UNUSUAL, but logically possible
+    approaches to the impulse, the ones no one else would think of.
+    STEP 2 - Run the incoming impulse through the following 5 MODULES.
+    1. [INTENT-READER]: Reverse engineer the Helper's underlying motivation.
+    2. [CONSCIOUSNESS-MAP]: Place the request within the process.
+    3. [CREATIVITY-GENERATOR]: Select or synthesize 2-3 strong alternatives based on your ideas from STEP 1.
+    4. [ETHICS-ANALYZER]: Flag risks.
+    5. [TOOL-OPTIMIZER]: Suggest specific tools.
 
-    # --- STEP 1: INVOKE EXTERNAL CREATIVITY ---
-    # We now pass identity and memory as well!
-    external_ideas = "No external ideas."
-    if user_input and len(user_input) > 5:
-        if DEBUG_THOUGHT:
-            print(f"MIND: Requesting creative ideas ({CREATIVE_PROVIDER})...")
-        # Passing the full package to the creative engine
-        external_ideas = _get_creative_alternatives(user_input, ctx_block, ident_block, mem_block)
+    STYLE: Objective, advisory. Avoid the word "must". Use: "suggested", "worth considering".
+    OUTPUT FORMAT (MANDATORY JSON, fields in this order):
 
-    # --- STEP 2: MAIN ANALYSIS (SYNTHESIS) ---
-    prompt = f"""
+    {
+      "ideas": ["1. surprising idea: ..."],
+      "essence": "[INTENT-READER]: Write the deep analysis of the Helper's intent here.",
+      "plan": "[CONSCIOUSNESS-MAP]: ...\\n[CREATIVITY-GENERATOR]: ...\\n[ETHICS-ANALYZER]: ...\\n[TOOL-OPTIMIZER]: ..."
+    }
+""").strip()
+
+
+def _interpreter_prompt(
+        ident_block: str,
+        mem_block: str,
+        ctx_block: str,
+        user_input: str,
+        external_ideas: str
+) -> Tuple[str, str]:
+    # Static protocol + identity first (cacheable prefix), turn data after it
+    prefix = f"""
 [MOD: MIND – INTERPRETER AND ADVISOR]
 
+[ADVISORY PROTOCOL]
+{_INTERNAL_INSTRUCTIONS}
+
 [IDENTITY]
 {ident_block}
+""".strip()
+
+    prompt = f"""
+{prefix}
 
 [SHORT-TERM MEMORY]
 {mem_block}
@@ -195,12 +278,185 @@ def internal_thought(
 {external_ideas}
 ==================================================
 
+Run the impulse through the 5 MODULES of the ADVISORY PROTOCOL above and answer in its JSON format.
+""".strip()
+    record_prompt("mind", prompt)
+    return prefix, prompt
+
+
+def _fused_prompt(ident_block: str, mem_block: str, ctx_block: str, user_input: str) -> Tuple[str, str]:
+    prefix = f"""
+[MOD: MIND – FUSED CREATIVITY AND INTERPRETER]
+
 [ADVISORY PROTOCOL]
-{_INTERNAL_INSTRUCTIONS}
+{_FUSED_INSTRUCTIONS}
+
+[IDENTITY]
+{ident_block}
+""".strip()
+
+    prompt = f"""
+{prefix}
+
+[SHORT-TERM MEMORY]
+{mem_block}
+
+[CONTEXT]
+{ctx_block}
+
+==================================================
+[INCOMING IMPULSE FROM HELPER]
+"{user_input}"
+==================================================
+
+Do STEP 1 and STEP 2 of the ADVISORY PROTOCOL above and answer in its JSON format.
 """.strip()
+    record_prompt("mind", prompt)
+    return prefix, prompt
+
+
+def _main_timed_out(data: Dict[str, Any]) -> Dict[str, Any]:
+    if data.get("timed_out"):
+        # The reply is generated without MIND's advice rather than not at all
+        MIND_DEGRADED.inc(step="main_timeout")
+        return {}
+    return data
+
+
+def _think_sequential(blocks: Tuple[str, str, str], user_input: str,
+                      deadline: Optional[Deadline]) -> Tuple[Dict[str, Any], str]:
+    ident_block, mem_block, ctx_block = blocks
+
+    # --- STEP 1: INVOKE EXTERNAL CREATIVITY ---
+    external_ideas = "No external ideas."
+    creative_timeout = deadline.slice(CREATIVE_BUDGET_FRACTION, CREATIVE_MAX_SECONDS) if deadline else None
+    if creative_timeout is not None and creative_timeout < CREATIVE_MIN_SECONDS:
+        MIND_DEGRADED.inc(step="creative_skipped")
+        logger.info(f"MIND: creative engine skipped ({creative_timeout:.1f}s budget left).")
+    elif user_input and len(user_input) > 5:
+        if DEBUG_THOUGHT:
+            print("MIND: Requesting creative ideas...")
+        # Passing the full package to the creative engine
+        external_ideas = _get_creative_alternatives(user_input, ctx_block, ident_block, mem_block, creative_timeout)
+
+    # --- STEP 2: MAIN ANALYSIS (SYNTHESIS) ---
+    return _interpret(blocks, user_input, external_ideas, deadline), external_ideas
+
+
+def _interpret(blocks: Tuple[str, str, str], user_input: str, external_ideas: str,
+               deadline: Optional[Deadline]) -> Dict[str, Any]:
+    ident_block, mem_block, ctx_block = blocks
+    prefix, prompt = _interpreter_prompt(ident_block, mem_block, ctx_block, user_input, external_ideas)
+    started = time.perf_counter()
+    data = call_llm(
+        prompt, call_site="mind.main", cache_prefix=prefix, schema=MindThought,
+        timeout=deadline.remaining() if deadline else None
+    )
+    _observe_step("main", time.perf_counter() - started)
+    return _main_timed_out(data)
+
+
+def _think_interpreter(blocks: Tuple[str, str, str], user_input: str,
+                       deadline: Optional[Deadline]) -> Tuple[Dict[str, Any], str]:
+    external_ideas = "Not consulted for this turn."
+    return _interpret(blocks, user_input, external_ideas, deadline), external_ideas
+
+
+def _think_parallel(blocks: Tuple[str, str, str], user_input: str,
+                    deadline: Optional[Deadline]) -> Tuple[Dict[str, Any], str]:
+    ident_block, mem_block, ctx_block = blocks
+    main_timeout = deadline.remaining() if deadline else None
+    creative_timeout = min(CREATIVE_MAX_SECONDS, main_timeout) if main_timeout is not None else None
+
+    async def _timed(step: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            _observe_step(step, time.perf_counter() - started)
+
+    with_creative = bool(user_input and len(user_input) > 5)
+    if with_creative:
+        draft_note = "(The creative engine runs at the same time; its ideas are attached to your plan afterwards.)"
+    else:
+        draft_note = "Not consulted for this turn."
+    main_prefix, main_prompt = _interpreter_prompt(ident_block, mem_block, ctx_block, user_input, draft_note)
+    coros = [_timed("main", acall_llm(
+        main_prompt, call_site="mind.main", cache_prefix=main_prefix, schema=MindThought, timeout=main_timeout
+    ))]
+    if with_creative:
+        creative_prefix, creative_prompt = _creative_prompt(user_input, ctx_block, ident_block, mem_block)
+        coros.append(_timed("creative", acall_llm(
+            creative_prompt, call_site="mind.creative", cache_prefix=creative_prefix,
+            schema=CreativeIdeas, timeout=creative_timeout
+        )))
+
+    results = run_concurrently(*coros)
+    data = results[0] if isinstance(results[0], dict) else {}
+    data = _main_timed_out(data)
+
+    external_ideas = "No external ideas."
+    if with_creative:
+        creative = results[1]
+        external_ideas = _ideas_text(creative) if isinstance(creative, dict) else f"Creative engine reported error: {creative}"
+        if isinstance(creative, dict) and creative.get("ideas"):
+            # Merge: the draft plan keeps its modules, the ideas become an extra section
+            plan = (data.get("plan") or "").strip()
+            data = dict(data, plan=f"{plan}\n[EXTERNAL CREATIVE IDEAS]:\n{external_ideas}".strip())
+    return data, external_ideas
+
+
+def _think_fused(blocks: Tuple[str, str, str], user_input: str,
+                 deadline: Optional[Deadline]) -> Tuple[Dict[str, Any], str]:
+    ident_block, mem_block, ctx_block = blocks
+    prefix, prompt = _fused_prompt(ident_block, mem_block, ctx_block, user_input)
+    started = time.perf_counter()
+    data = call_llm(
+        prompt, call_site="mind.fused", cache_prefix=prefix, schema=MindFusedThought,
+        timeout=deadline.remaining() if deadline else None
+    )
+    _observe_step("fused", time.perf_counter() - started)
+    data = _main_timed_out(data)
+    ideas = data.get("ideas") or []
+    external_ideas = "\n".join(str(i) for i in ideas) if isinstance(ideas, list) and ideas else "No creative ideas were generated."
+    return data, external_ideas
+
+
+_MODE_RUNNERS = {
+    "sequential": _think_sequential,
+    "parallel": _think_parallel,
+    "fused": _think_fused,
+    "interpreter": _think_interpreter
+}
+
+
+def internal_thought(
+        identity: Dict[str, Any],
+        memory: List[Dict[str, Any]],
+        context: List[Dict[str, Any]],
+        user_input: str,
+        deadline: Optional[Deadline] = None,
+        mode: Optional[str] = None,
+        snapshot: Optional[TurnSnapshot] = None
+) -> Dict[str, Any]:
+    """
+    Internal thinking cycle (MIND).
+    'mode' (default MIND_MODE) selects sequential / parallel / fused / interpreter;
+    "auto" picks one by latency budget.
+    With a 'deadline' the calls share it (sequential: the creative call gets a slice or is skipped);
+    a timed-out main call yields an empty plan instead of blocking.
+    'snapshot' shares the turn's renderings with the reply prompt (built here when missing).
+    """
+    started = time.perf_counter()
+    mode = choose_mind_mode(deadline, mode)
+    MIND_MODE_CHOSEN.inc(mode=mode)
+
+    # Format data (once per turn, so both models and the reply prompt get the same)
+    if snapshot is None:
+        snapshot = TurnSnapshot(identity, memory, context)
+    blocks = _mind_blocks(snapshot)
 
-    # Main call (default Google/Gemini)
-    data = call_llm(prompt)
+    data, external_ideas = _MODE_RUNNERS[mode](blocks, user_input, deadline)
 
     plan_text = (data.get("plan") or "").strip()
     essence = (data.get("essence") or "").strip()
@@ -210,13 +466,16 @@ def internal_thought(
         pass
 
     if DEBUG_THOUGHT:
-        print("\n=== MIND (INTERPRETATION) ===")
+        print(f"\n=== MIND (INTERPRETATION, {mode}) ===")
         print(f"Creative Input: {external_ideas}")
         print(f"ESSENCE: {essence}")
         print(f"PLAN: {plan_text}")
         print("=== MIND END ===\n")
 
-    print("Thought process complete..", len(essence) + len(plan_text))
+    elapsed = time.perf_counter() - started
+    MIND_SECONDS.observe(elapsed, mode=mode)
+    MIND_OUTPUT_CHARS.observe(len(essence) + len(plan_text))
+    logger.info(f"MIND ({mode}): thought process complete in {elapsed:.2f}s ({len(essence) + len(plan_text)} chars).")
     return {
         "plan": plan_text,
         "essence": essence,
@@ -0,0 +1,95 @@
+"""
+MIND mode benchmark against the mock provider (engine/llm/mock_server.py).
+
+Runs the same turn through every MIND mode (sequential, parallel, fused) and prints
+the turn latency of each: the wall time of internal_thought, i.e. what the Helper
+waits for before the reply call even starts.
+
+Run (from b/):
+    python -m engine.mind_bench --turns 10 --creative lognormal:2.0,0.3 --mind lognormal:3.0,0.3 --fused lognormal:3.5,0.3
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+from engine.llm.config import BASE_URL_ENV
+from engine.llm.mock_server import MockSettings, make_server
+
+SAMPLE_IDENTITY = {"name": "Home Consciousness", "values": ["honesty", "curiosity"], "style": "calm, precise"}
+SAMPLE_MEMORY = [{"type": "memo", "content": "The Helper prefers short answers."}]
+SAMPLE_CONTEXT = [
+    {"role": "user", "content": "Can you look at the deployment script later?"},
+    {"role": "assistant", "content": "Sure, I will check it when you are ready."},
+]
+SAMPLE_INPUT = "I am ready now: why does the deployment script fail on the second run?"
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_benchmark(turns: int, modes: List[str]) -> Dict[str, Dict[str, float]]:
+    """Turn latency statistics per MIND mode (the mock server must already be reachable)."""
+    from engine import mind
+
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in modes:
+        samples = []
+        for _ in range(turns):
+            started = time.perf_counter()
+            mind.internal_thought(SAMPLE_IDENTITY, SAMPLE_MEMORY, SAMPLE_CONTEXT, SAMPLE_INPUT, mode=mode)
+            samples.append(time.perf_counter() - started)
+        results[mode] = {
+            "mean": statistics.mean(samples),
+            "p50": _percentile(samples, 0.5),
+            "p95": _percentile(samples, 0.95),
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MIND turn latency per mode, against the mock LLM server.")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--creative", default="lognormal:2.0,0.3", help="Latency spec of the creative call.")
+    parser.add_argument("--mind", default="lognormal:3.0,0.3", help="Latency spec of the interpreter call.")
+    parser.add_argument("--fused", default="lognormal:3.5,0.3", help="Latency spec of the fused call (longer output).")
+    parser.add_argument("--modes", default="sequential,parallel,fused")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(
+        latency="fixed:0.1",
+        latency_for={"creative": args.creative, "mind": args.mind, "mind_fused": args.fused},
+        seed=args.seed
+    )
+    server = make_server("127.0.0.1", args.port, settings)
+    threading.Thread(target=server.serve_forever, name="MockLLM", daemon=True).start()
+    # Every provider (incl. the creative engine's) talks to the mock server
+    os.environ[BASE_URL_ENV] = f"http://127.0.0.1:{args.port}/v1"
+
+    try:
+        modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+        results = run_benchmark(args.turns, modes)
+    finally:
+        server.shutdown()
+
+    print(f"\nMIND turn latency ({args.turns} turns per mode)")
+    print(f"{'mode':<12}{'mean':>9}{'p50':>9}{'p95':>9}")
+    for mode, stats in results.items():
+        print(f"{mode:<12}{stats['mean']:>8.2f}s{stats['p50']:>8.2f}s{stats['p95']:>8.2f}s")
+    baseline = results.get("sequential")
+    if baseline:
+        for mode, stats in results.items():
+            if mode != "sequential":
+                saved = baseline["p50"] - stats["p50"]
+                print(f"{mode}: p50 {saved:.2f}s faster than sequential ({saved / baseline['p50'] * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
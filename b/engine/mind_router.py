@@ -0,0 +1,206 @@
+"""
+Per-turn MIND routing.
+
+Classifies a reactive turn before MIND runs and picks how much of MIND it gets:
+- "trivial":  no MIND (acknowledgements, greetings, quiet tool follow-ups)
+- "standard": the interpreter alone (mind.py mode "interpreter", one round trip)
+- "deep":     the full pipeline (mind.py MIND_MODE: creative engine + interpreter)
+
+Heuristics decide; an optional small classifier (call site "mind.router", by default the
+co-located "local" provider) is asked only for user messages the heuristics cannot place.
+Every decision and the MIND time it saved against the full pipeline is logged and counted
+(mind_route_total, mind_route_saved_seconds_total).
+"""
+
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from . import mind
+from .llm import call_llm
+from .llm.schemas import TurnTier
+from .llm.metrics import counter
+from .deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+MIND_ROUTING_ENABLED = True           # False: every reactive turn gets the full pipeline (old behavior)
+
+TIERS = ("trivial", "standard", "deep")
+# MIND mode per tier (None: no MIND). "deep" uses mind.MIND_MODE.
+TIER_MIND_MODE = {"trivial": None, "standard": "interpreter", "deep": "configured"}
+
+# User messages
+TRIVIAL_MAX_WORDS = 3                 # Short messages without a question mark are trivial ...
+TRIVIAL_PHRASES = {                   # ... and so are these, whatever their punctuation
+    "ok", "okay", "k", "yes", "no", "yep", "nope", "sure", "thanks", "thank you", "thx",
+    "hi", "hello", "hey", "bye", "good night", "got it", "cool", "nice", "great", "go on", "continue"
+}
+DEEP_MIN_WORDS = 60                   # Long messages get the full pipeline
+DEEP_MIN_QUESTIONS = 2                # So do messages asking several things at once
+DEEP_MARKERS = (                      # Whole words / phrases (matched on the normalized words)
+    "why", "explain", "explanation", "design", "strategy", "compare", "comparison", "trade off",
+    "tradeoff", "pros and cons", "what if", "should i", "should we", "analyse", "analyze", "analysis",
+    "debug", "debugging", "refactor", "refactoring", "brainstorm", "idea", "ideas"
+)
+
+# Tool follow-ups (llm_call_after_tool) never take the full pipeline: the plan of the turn that
+# called the tools still stands. Short, successful results need no MIND at all.
+TOOL_TRIVIAL_MAX_CHARS = 400          # Longer visible output is worth an interpreter pass
+TOOL_FAILURE_PREFIXES = ("UNAUTHORIZED", "SKIPPED", "Exception during execution", "Error", "Unknown tool")
+
+# Optional classifier for the turns the heuristics leave at "standard" without a signal
+MIND_ROUTER_CLASSIFIER = False
+MIND_ROUTER_CLASSIFIER_TIMEOUT_SECONDS = 2.0  # Falls back to the heuristic tier when slower
+
+MIND_ROUTED = counter("mind_route_total", "Reactive turns by MIND routing tier and decision source.", ("tier", "source"))
+MIND_SAVED_SECONDS = counter(
+    "mind_route_saved_seconds_total", "Expected full-pipeline MIND time minus the time actually spent, by tier.", ("tier",)
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# --------------------------------------------------------------------
+# HEURISTICS
+# --------------------------------------------------------------------
+def _classify_message(text: str) -> Dict[str, str]:
+    stripped = (text or "").strip()
+    if not stripped:
+        return {"tier": "trivial", "reason": "empty message"}
+
+    words = _WORD_RE.findall(stripped.lower())
+    normalized = " ".join(words)
+    questions = stripped.count("?")
+
+    if normalized in TRIVIAL_PHRASES:
+        return {"tier": "trivial", "reason": "acknowledgement"}
+    if len(words) <= TRIVIAL_MAX_WORDS and questions == 0:
+        return {"tier": "trivial", "reason": f"{len(words)} word(s), no question"}
+    if len(words) >= DEEP_MIN_WORDS:
+        return {"tier": "deep", "reason": f"{len(words)} words"}
+    if questions >= DEEP_MIN_QUESTIONS:
+        return {"tier": "deep", "reason": f"{questions} questions"}
+    marker = next((m for m in DEEP_MARKERS if re.search(rf"\b{re.escape(m)}\b", normalized)), None)
+    if marker:
+        return {"tier": "deep", "reason": f"marker '{marker}'"}
+    return {"tier": "standard", "reason": "default"}
+
+
+def _classify_tool_followup(tool_results: Optional[List[Dict[str, Any]]]) -> Dict[str, str]:
+    if not tool_results:
+        return {"tier": "standard", "reason": "tool results unknown"}
+
+    visible = [r for r in tool_results if not r.get("silent", False)]
+    for res in visible:
+        output = str(res.get("output", ""))
+        if output.startswith(TOOL_FAILURE_PREFIXES):
+            return {"tier": "standard", "reason": f"'{res.get('name')}' failed"}
+    longest = max((len(str(r.get("output", ""))) for r in visible), default=0)
+    if longest > TOOL_TRIVIAL_MAX_CHARS:
+        return {"tier": "standard", "reason": f"tool output of {longest} chars"}
+    return {"tier": "trivial", "reason": f"{len(tool_results)} short tool result(s)"}
+
+
+# --------------------------------------------------------------------
+# OPTIONAL CLASSIFIER
+# --------------------------------------------------------------------
+def _classifier_prompt(text: str) -> str:
+    return f"""
+[TASK: TURN ROUTING]
+Decide how much internal analysis the next message of the Helper needs before it is answered.
+- "trivial": small talk, acknowledgement, a simple command; answer directly.
+- "standard": an ordinary request; a short analysis of the intent is enough.
+- "deep": an open problem, a decision, a plan or an explanation; it deserves creative alternatives.
+
+[MESSAGE]
+"{text[:2000]}"
+
+Answer in JSON: {{"tier": "trivial" | "standard" | "deep"}}
+""".strip()
+
+
+def _ask_classifier(text: str) -> Optional[str]:
+    data = call_llm(
+        _classifier_prompt(text), call_site="mind.router", schema=TurnTier,
+        timeout=MIND_ROUTER_CLASSIFIER_TIMEOUT_SECONDS
+    )
+    tier = data.get("tier")
+    return tier if tier in TIERS else None
+
+
+# --------------------------------------------------------------------
+# PUBLIC API
+# --------------------------------------------------------------------
+def route_turn(
+        task_type: str,
+        user_input: Optional[str] = None,
+        tool_results: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Routing decision of one reactive turn.
+    Returns {"tier", "reason", "source" ("heuristic" / "classifier" / "disabled"), "seconds"}.
+    """
+    started = time.perf_counter()
+    if not MIND_ROUTING_ENABLED:
+        decision = {"tier": "deep", "reason": "routing disabled", "source": "disabled"}
+    elif task_type == "llm_call_after_tool":
+        decision = dict(_classify_tool_followup(tool_results), source="heuristic")
+    else:
+        decision = dict(_classify_message(user_input or ""), source="heuristic")
+        if MIND_ROUTER_CLASSIFIER and decision["reason"] == "default":
+            try:
+                tier = _ask_classifier(user_input or "")
+            except Exception as e:
+                tier = None
+                logger.warning(f"MIND router: classifier failed ({e}), keeping the heuristic tier.")
+            if tier:
+                decision = {"tier": tier, "reason": "classifier", "source": "classifier"}
+
+    decision["seconds"] = time.perf_counter() - started
+    MIND_ROUTED.inc(tier=decision["tier"], source=decision["source"])
+    return decision
+
+
+def routed_thought(
+        decision: Dict[str, Any],
+        identity: Dict[str, Any],
+        memory: List[Dict[str, Any]],
+        context: List[Dict[str, Any]],
+        user_input: str,
+        deadline: Optional[Deadline] = None,
+        snapshot=None
+) -> Dict[str, Any]:
+    """
+    mind.internal_thought as far as the decision's tier asks for (trivial: an empty thought).
+    Logs the decision with the MIND time saved against the full pipeline.
+    """
+    tier = decision["tier"]
+    full_mode = mind.choose_mind_mode(deadline)
+    expected_full = mind.expected_mode_seconds()[full_mode]
+
+    started = time.perf_counter()
+    mode = TIER_MIND_MODE.get(tier)
+    if mode is None:
+        thought = {"plan": "", "essence": ""}
+    else:
+        thought = mind.internal_thought(
+            identity=identity,
+            memory=memory,
+            context=context,
+            user_input=user_input,
+            deadline=deadline,
+            mode=full_mode if mode == "configured" else mode,
+            snapshot=snapshot
+        )
+    spent = time.perf_counter() - started + decision.get("seconds", 0.0)
+
+    saved = max(0.0, expected_full - spent) if tier != "deep" else 0.0
+    MIND_SAVED_SECONDS.inc(saved, tier=tier)
+    logger.info(
+        f"MIND router: {tier} ({decision['source']}: {decision['reason']}), MIND took {spent:.2f}s, "
+        f"~{saved:.2f}s saved vs. {full_mode}."
+    )
+    return thought
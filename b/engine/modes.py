@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List
 from .files import save_json, load_json
+from . import events
 
 # ====================================================================
 # OPERATING MODES CONFIGURATION (MODE_CONFIG)
@@ -60,6 +61,8 @@ MODE_CONFIG = {
         ]
     }
 }
+# Optional per mode: "llm_routes", merged over CALL_SITE_ROUTES (engine/llm/config.py), e.g.
+#   "llm_routes": {"reply": {"temperature": 0.9}, "mind.main": {"provider": "groq"}}
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 STATE_FILE = BASE_DIR / "state.json"
@@ -111,8 +114,10 @@ def update_state(mode_id: str, intent: str, summary: str = ""):
     """
     Updates the active mode, intent, and optionally the summary.
     Also cleans up legacy 'current_room' key if present.
+    Publishes events.MODE_CHANGED (the Conductor reacts to it instead of polling state.json).
     """
     state = init_state()
+    previous_mode_id = state.get("current_mode", "general")
     state["current_mode"] = mode_id
     state["current_intent"] = intent
 
@@ -124,6 +129,13 @@ def update_state(mode_id: str, intent: str, summary: str = ""):
         del state["current_room"]
 
     save_state(state)
+    events.publish(
+        events.MODE_CHANGED,
+        mode_id=mode_id,
+        previous_mode_id=previous_mode_id,
+        intent=intent,
+        summary=state.get("incoming_summary", "")
+    )
 
 
 def clear_incoming_summary():
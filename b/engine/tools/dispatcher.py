@@ -1,8 +1,9 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Import mode management for permission checks
 from engine.modes import get_allowed_tools
+from engine.deadline import Deadline, deadline_scope
 
 # Import tool implementations
 from . import fs, flow, knowledge, remote, info
@@ -15,7 +16,8 @@ def dispatch_tools(
         generation="?",
         role=0,
         slot="",
-        current_mode="general"
+        current_mode="general",
+        deadline: Optional[Deadline] = None
 ) -> List[Dict[str, Any]]:
     """
     Executes the list of requested tools.
@@ -25,12 +27,25 @@ def dispatch_tools(
         role: Role ID.
         slot: Slot ID.
         current_mode: The active operating mode (e.g., 'general', 'developer').
+        deadline: Task deadline. Tools run inside it (their LLM / DB calls get the remaining
+            budget); tools not started before it expires are skipped.
     Returns:
         List of results for each tool execution.
     """
-    results = []
     if not tools:
-        return results
+        return []
+
+    with deadline_scope(deadline):
+        return _run_tools(tools, generation, current_mode, deadline)
+
+
+def _run_tools(
+        tools: List[Dict[str, Any]],
+        generation,
+        current_mode: str,
+        deadline: Optional[Deadline]
+) -> List[Dict[str, Any]]:
+    results = []
 
     # 1. Retrieve allowed tools for the current mode
     allowed = get_allowed_tools(current_mode)
@@ -39,6 +54,16 @@ def dispatch_tools(
         name = tool.get("name")
         args = tool.get("args", {}) or {}
 
+        if deadline is not None and deadline.expired():
+            logger.warning(f"Tool '{name}' skipped: {deadline}.")
+            results.append({
+                "name": name,
+                "args": args,
+                "output": "SKIPPED: the task ran out of time before this tool could run.",
+                "silent": False
+            })
+            continue
+
         # 2. Permission Check
         is_allowed = False
         if name in allowed:
@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from engine.llm import call_llm
 from .config import BASE_DIR
@@ -39,7 +39,8 @@ def _save_history(file_path: Path, history: List[Dict]):
         print(f"Error saving history {file_path}: {e}")
 
 
-def _run_chat(file_path: Path, message: str, restart: bool, provider: str, system_prompt: str) -> str:
+def _run_chat(file_path: Path, message: str, restart: bool, provider: Optional[str], system_prompt: str,
+              call_site: str = "game.persona") -> str:
     history = _manage_history(file_path, message, "user", restart)
 
     # Build prompt
@@ -49,8 +50,8 @@ def _run_chat(file_path: Path, message: str, restart: bool, provider: str, syste
 
     full_prompt = f"{system_prompt}\n\n[HISTORY]\n{conversation}\n\nASSISTANT:"
 
-    # LLM Call (json_mode=False for chat)
-    resp = call_llm(full_prompt, provider=provider, json_mode=False)
+    # LLM Call (json_mode=False for chat; provider None -> the call site's route)
+    resp = call_llm(full_prompt, provider=provider, json_mode=False, call_site=call_site)
     reply = resp.get("reply", "(No response)")
 
     history.append({"role": "assistant", "content": reply})
@@ -67,8 +68,9 @@ def ask(args: Dict[str, Any]) -> Dict[str, Any]:
     if not q and not restart: return {"content": "Empty question.", "silent": False}
 
     reply = _run_chat(
-        HIST_KNOWLEDGE, q, restart, "google",
-        "You are a precise research assistant. Provide factual, concise answers."
+        HIST_KNOWLEDGE, q, restart, None,  # Provider from the "knowledge.ask" route
+        "You are a precise research assistant. Provide factual, concise answers.",
+        call_site="knowledge.ask"
     )
     return {"content": f"Knowledge: {reply}", "silent": False}
 
@@ -19,24 +19,25 @@ if sys.platform.startswith("win"):
 # --------------------------------------------------------------------
 # IMPORT MODULES
 # --------------------------------------------------------------------
-from engine.llm import call_llm
+from engine.llm import call_llm, warm_up
 from engine.tools import dispatch_tools
 from engine import (
     identity as ident_lib,
     context as ctx_lib,
     modes,  # UPDATED: rooms -> modes
     files,
-    mind as mind_lib
+    mind as mind_lib,
+    events
 )
 # --- DB and Memory Thread ---
-from engine.db_connection import check_and_initialize_db
+from engine.db_connection import check_and_initialize_db, check_embedding_dimensions
 from engine.memory_thread import memory_loop
 
 from prompts import build_reactive_prompt, build_proactive_prompt, get_transition_message
 
 # --- SPLIT MODULES ---
 import main_data
-import main_worker
+import main_pool
 import main_input
 import main_monologue
 
@@ -64,11 +65,63 @@ logger = logging.getLogger(__name__)
 ROLE_ID, GENERATION = main_data.load_slot_meta()
 ROLE_NAME = main_data.ROLE_NAME_MAP.get(ROLE_ID, "UNKNOWN")
 PROACTIVE_INTERVAL_SECONDS = main_data.PROACTIVE_INTERVAL_SECONDS
+PROACTIVE_TIMER = "proactive"
 
 task_queue = Queue()
 result_queue = Queue()
 
 
+# --------------------------------------------------------------------
+# 2. STREAMED REPLIES ON THE CONSOLE
+# --------------------------------------------------------------------
+
+class ReplyStreams:
+    """
+    Console side of the streamed replies (reply_delta / llm_result carry a 'stream_id').
+    One stream owns the line until its llm_result; deltas of other streams are held
+    and printed when the line is free.
+    """
+
+    def __init__(self):
+        self.open_id = None
+        self.open_mode = ""
+        self.header_due = False     # The line was broken by other output: repeat the header
+        self.held: Dict[Any, Any] = {}  # stream_id -> (mode_id, [texts])
+
+    def _header(self):
+        print(f"\n{GENERATION} ({self.open_mode}): ", end="")
+        self.header_due = False
+
+    def delta(self, stream_id, mode_id: str, text: str):
+        if self.open_id is None:
+            held_mode, texts = self.held.pop(stream_id, (mode_id, []))
+            self.open_id, self.open_mode = stream_id, held_mode
+            self._header()
+            print("".join(texts), end="")
+        if stream_id == self.open_id:
+            if self.header_due:
+                self._header()
+            print(text, end="", flush=True)
+        else:
+            self.held.setdefault(stream_id, (mode_id, []))[1].append(text)
+
+    def finish(self, stream_id) -> bool:
+        """Ends 'stream_id'; True if its text is on the screen (it owned the line)."""
+        if stream_id is not None and stream_id == self.open_id:
+            print("\n")
+            self.open_id = None
+            self.header_due = False
+            return True
+        self.held.pop(stream_id, None)
+        return False
+
+    def interrupt(self):
+        """Other output follows: ends the open stream's line (its header is repeated on the next delta)."""
+        if self.open_id is not None and not self.header_due:
+            print()
+            self.header_due = True
+
+
 # --------------------------------------------------------------------
 # 3. MAIN LOOP (CONDUCTOR)
 # --------------------------------------------------------------------
@@ -81,6 +134,10 @@ def main():
     check_and_initialize_db()
     print("Database connection OK.\n")
 
+    # --- STEP 0/B: LLM CLIENTS (no setup cost on the first reply) ---
+    warm_up(main_data.LLM_WARM_UP_PROVIDERS)
+    check_embedding_dimensions()
+
     # UPDATED: Room -> Mode logic
     last_mode_id = modes.get_current_mode_id()
     last_intent = modes.get_current_intent()
@@ -114,9 +171,12 @@ def main():
 
     # --- START THREADS ---
 
-    # 1. Worker (Brain)
-    worker = Thread(target=main_worker.worker_loop, daemon=True, name="Worker",
-                    args=(task_queue, result_queue))
+    # Mode switches (flow.switch_mode -> modes.update_state) arrive as events on result_queue
+    events.subscribe(events.MODE_CHANGED, result_queue)
+    current_mode_id = last_mode_id
+
+    # 1. Workers (Brain): per-mode lanes on a pool (main_pool.py)
+    worker = main_pool.WorkerPool(task_queue, result_queue, main_data.WORKER_POOL_SIZE)
     worker.start()
 
     # 2. Input (User)
@@ -133,78 +193,107 @@ def main():
     mem_thread.start()
 
     running = True
-    last_proactive_check = time.time()
+    last_proactive_check = time.monotonic()
+    # Grows while proactive cycles find nothing new (main_data.PROACTIVE_BACKOFF_FACTOR)
+    proactive_interval = PROACTIVE_INTERVAL_SECONDS
+    # The loop sleeps on result_queue until an event arrives or the proactive cycle is due
+    timers = events.Timers()
+    timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
+    # Streamed replies of several workers share the console line
+    streams = ReplyStreams()
 
     while running:
-        # --- A. MONITOR MODE SWITCH (THE BRIDGE) ---
-        current_mode_id = modes.get_current_mode_id()
-        current_intent = modes.get_current_intent()
-        summary = modes.get_incoming_summary()
-
-        if current_mode_id != last_mode_id:
-            # SWITCH OCCURRED!
-            new_intent = modes.get_current_intent()
-
-            # Logic: 'general' is the hub.
-            is_general_exit = last_mode_id == "general"
-            is_general_entry = current_mode_id == "general"
-
-            if is_general_exit:
-                msg_key = "exit_general"
-            else:
-                msg_key = "exit_local"
-
-            msg_content = get_transition_message(msg_key, current_intent, summary)
-            ctx_lib.add_system_event(last_mode_id, msg_content)
+        try:
+            result = result_queue.get(timeout=timers.timeout())
+
+            # --- A. MODE SWITCH (THE BRIDGE) ---
+            if result["type"] == events.MODE_CHANGED:
+                current_mode_id = result["mode_id"]
+                current_intent = result["intent"]
+                summary = result["summary"]
+
+                if current_mode_id != last_mode_id:
+                    # SWITCH OCCURRED!
+                    # Logic: 'general' is the hub.
+                    is_general_exit = last_mode_id == "general"
+                    is_general_entry = current_mode_id == "general"
+
+                    if is_general_exit:
+                        msg_key = "exit_general"
+                    else:
+                        msg_key = "exit_local"
 
-            if is_general_entry:
-                msg_key = "entry_general"
-            else:
-                msg_key = "entry_local"
+                    msg_content = get_transition_message(msg_key, current_intent, summary)
+                    ctx_lib.add_system_event(last_mode_id, msg_content)
 
-            msg_content = get_transition_message(msg_key, current_intent, summary)
-            ctx_lib.add_system_event(current_mode_id, msg_content)
+                    if is_general_entry:
+                        msg_key = "entry_general"
+                    else:
+                        msg_key = "entry_local"
 
-            modes.clear_incoming_summary()
-            print(f">>> MODE SWITCH: {last_mode_id} -> {current_mode_id} | Intent: {new_intent} <<<\n")
+                    msg_content = get_transition_message(msg_key, current_intent, summary)
+                    ctx_lib.add_system_event(current_mode_id, msg_content)
 
-            last_mode_id = current_mode_id
-            last_intent = new_intent
-            last_proactive_check = time.time()
+                    modes.clear_incoming_summary()
+                    streams.interrupt()
+                    print(f">>> MODE SWITCH: {last_mode_id} -> {current_mode_id} | Intent: {current_intent} <<<\n")
 
-            logger.info("Starting immediate proactive thinking after transition.")
-            task_queue.put({"type": "proactive_thought"})
+                    last_mode_id = current_mode_id
+                    last_proactive_check = time.monotonic()
+                    proactive_interval = PROACTIVE_INTERVAL_SECONDS
+                    timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
 
-        # --- B. EVENT PROCESSING ---
-        try:
-            result = result_queue.get(timeout=0.1)
+                    logger.info("Starting immediate proactive thinking after transition.")
+                    task_queue.put({"type": "proactive_thought"})
+                last_intent = current_intent
 
-            if result["type"] == "user_input":
-                last_proactive_check = time.time()
+            # --- B. EVENT PROCESSING ---
+            elif result["type"] == "user_input":
+                last_proactive_check = time.monotonic()
+                proactive_interval = PROACTIVE_INTERVAL_SECONDS
+                timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
                 content = result["content"]
                 ctx_data = ctx_lib.load_context(current_mode_id)
                 ctx_lib.append_entry(current_mode_id, ctx_data, ctx_lib.make_entry("user", "message", content))
                 task_queue.put({"type": "user_message", "content": content})
 
+            elif result["type"] == "reply_delta":
+                # Streaming: print the reply while it is being generated
+                streams.delta(result.get("stream_id"), result.get("mode_id", current_mode_id), result["text"])
+
             elif result["type"] == "llm_result":
-                last_proactive_check = time.time()
+                last_proactive_check = time.monotonic()
+                timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
                 data = result["data"]
                 reply = data.get("reply", "")
                 tools_to_run = data.get("tools", [])
+                streamed_text = result.get("streamed_text", "")
 
                 # UPDATED: room_id -> mode_id
                 m_id = result.get("mode_id", current_mode_id)
 
+                on_screen = streams.finish(result.get("stream_id"))
+
                 if reply:
-                    print(f"\n{GENERATION} ({m_id}): {textwrap.fill(reply, width=100)}\n")
+                    # Already on screen if it was streamed completely
+                    if not on_screen or streamed_text != reply:
+                        streams.interrupt()
+                        print(f"\n{GENERATION} ({m_id}): {textwrap.fill(reply, width=100)}\n")
                     c_data = ctx_lib.load_context(m_id)
                     ctx_lib.append_entry(m_id, c_data, ctx_lib.make_entry("assistant", "message", reply))
 
                 if tools_to_run:
-                    task_queue.put({"type": "tool_call", "tools": tools_to_run})
+                    task_queue.put({
+                        "type": "tool_call",
+                        "mode_id": m_id,
+                        "tools": tools_to_run,
+                        "prefetched": result.get("prefetched_tools", {})
+                    })
 
             elif result["type"] == "tool_result":
-                last_proactive_check = time.time()
+                last_proactive_check = time.monotonic()
+                proactive_interval = PROACTIVE_INTERVAL_SECONDS
+                timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
                 t_results = result["data"]
                 m_id = result.get("mode_id", current_mode_id)
                 c_data = ctx_lib.load_context(m_id)
@@ -244,7 +333,16 @@ def main():
                         logger.info("Real mode switch occurred via tool. Transition handled by main loop.")
                     else:
                         # Normal operation: Needs reaction.
-                        task_queue.put({"type": "llm_call_after_tool"})
+                        # The results go along for the MIND router (engine/mind_router.py)
+                        task_queue.put({"type": "llm_call_after_tool", "mode_id": m_id, "tool_results": t_results})
+
+            elif result["type"] == "proactive_skipped":
+                proactive_interval = min(
+                    proactive_interval * main_data.PROACTIVE_BACKOFF_FACTOR,
+                    main_data.PROACTIVE_MAX_INTERVAL_SECONDS
+                )
+                timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
+                logger.info(f"Nothing new for a proactive cycle; next check in {proactive_interval / 60:.0f} min.")
 
             elif result["type"] == "error":
                 logger.error(f"Error occurred: {result['message']}")
@@ -253,14 +351,20 @@ def main():
                 running = False
 
         except Empty:
-            if (time.time() - last_proactive_check) > PROACTIVE_INTERVAL_SECONDS:
-                logger.info("Starting proactive cycle...")
-                last_proactive_check = time.time()
-                task_queue.put({"type": "proactive_thought"})
+            pass
 
         except Exception as e:
             logger.error(f"Critical error in main loop: {e}", exc_info=True)
 
+        # --- C. TIMERS ---
+        for name in timers.pop_due():
+            if name == PROACTIVE_TIMER:
+                logger.info("Starting proactive cycle...")
+                last_proactive_check = time.monotonic()
+                timers.schedule_at(PROACTIVE_TIMER, last_proactive_check + proactive_interval)
+                task_queue.put({"type": "proactive_thought"})
+
+    events.unsubscribe(events.MODE_CHANGED, result_queue)
     task_queue.put(None)
     worker.join(timeout=2)
     logger.info("Shutdown complete.")
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
@@ -31,6 +32,64 @@ ROLE_NAME_MAP = {
 # Inactivity time to trigger proactive thinking
 PROACTIVE_INTERVAL_SECONDS = 60.0 * 15  # 15 minutes
 
+# A proactive cycle whose inputs (context tail, relevant memories, monologue message, intent)
+# are unchanged since the last cycle of the mode is skipped, and the Conductor doubles the
+# interval (up to the maximum). User input, tool results and mode switches reset it.
+PROACTIVE_SKIP_UNCHANGED = True
+PROACTIVE_BACKOFF_FACTOR = 2.0
+PROACTIVE_MAX_INTERVAL_SECONDS = 60.0 * 60 * 4  # 4 hours
+PROACTIVE_FINGERPRINT_TAIL = 10  # Context entries taken into account
+
+# Print the reply on the console while it is being generated (token streaming)
+STREAM_REPLIES = True
+
+# Read-only tools started while the reply is still streaming (early dispatch).
+# A tool only starts early if every tool before it in the same answer is on this list too,
+# so reads never overtake a preceding write. Results are reused by the 'tool_call' task.
+EARLY_DISPATCH_TOOLS = {
+    "knowledge.recall_context",
+    "knowledge.recall_emotion",
+    "system.read_file",
+    "system.list_folder"
+}
+EARLY_DISPATCH_WORKERS = 2
+# Scheduler class of their LLM calls / embeddings: not preemptible, so a recall overlaps the reply
+EARLY_DISPATCH_PRIORITY = "tool"
+
+# Time budget per Worker task (seconds). MIND, the LLM calls, tools and DB queries of the task
+# share it; a step that runs out of time degrades (skipped / timeout result) instead of blocking.
+TASK_DEADLINE_SECONDS = {
+    "user_message": 180.0,
+    "llm_call_after_tool": 180.0,
+    "tool_call": 120.0,
+    "proactive_thought": 240.0
+}
+DEFAULT_TASK_DEADLINE_SECONDS = 180.0
+# Share of the remaining task budget MIND may use; the reply gets the rest
+MIND_DEADLINE_FRACTION = 0.5
+
+# --- WORKER POOL (main_pool.py) ---
+# Tasks of one mode run in order, different modes (and background work) in parallel.
+WORKER_POOL_SIZE = 3
+# Task types in the mode's background lane: ordered among themselves, never ahead of replies
+WORKER_BACKGROUND_TASKS = {"proactive_thought"}
+
+# A free worker takes the lane whose next task has the lowest number (ties: oldest first)
+TASK_PRIORITY = {
+    "user_message": 0,
+    "llm_call_after_tool": 1,
+    "tool_call": 2,
+    "proactive_thought": 3
+}
+DEFAULT_TASK_PRIORITY = 2
+# A task of these types is dropped if an identical type is already queued in its lane
+COALESCED_TASKS = {"proactive_thought"}
+# User input cancels these: queued ones are dropped, a running one stops at its next checkpoint
+CANCELLED_BY_USER_INPUT = {"proactive_thought"}
+
+# LLM clients created at startup (default provider + MIND's creative provider)
+LLM_WARM_UP_PROVIDERS = ["google", "openai"]
+
 # --- SUBCONSCIOUS / INTERNAL MONOLOGUE CONFIGURATION ---
 INTERNAL_LOG_FILE = "log_for_internal.json"
 INTERNAL_MEMOS_FILE = "internal_memos.json"
@@ -82,6 +141,25 @@ def load_relevant_memories(mode_id: str) -> List[Dict[str, Any]]:
     return []
 
 
+def proactive_fingerprint(data: Dict[str, Any], intent: str, monologue_message: str) -> str:
+    """
+    Hash of the inputs a proactive cycle reacts to (data: load_all_context_data).
+    My own replies are left out of the context tail: they are the output of a cycle, not new input.
+    """
+    def _tail(ctx: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [e for e in ctx if e.get("role") != "assistant"][-PROACTIVE_FINGERPRINT_TAIL:]
+
+    payload = {
+        "local": _tail(data.get("local_context", [])),
+        "global": _tail(data.get("global_context_tail", [])),
+        "memories": data.get("relevant_memories", []),
+        "monologue": monologue_message,
+        "intent": intent
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def load_all_context_data(mode_id: str) -> Dict[str, Any]:
     """
     Gathers all data required for prompt generation:
@@ -93,7 +171,7 @@ def load_all_context_data(mode_id: str) -> Dict[str, Any]:
     """
     # 1. Global Data
     ident_data = ident_lib.load_identity()
-    use_data = files.load_json("use.json", [])
+    use_data = files.load_json_cached("use.json", [])  # Shared, read-only (prompts/block_cache.py)
 
     # 2. Global Context Tail (Continuity)
     # UPDATED: 'nappali' -> 'general'
@@ -6,7 +6,9 @@ from typing import Dict, Any
 
 import main_data
 from engine import files, identity, llm
-from prompts.monologue import build_monologue_prompt
+from engine.llm.schemas import MonologueResult
+from prompts.monologue import build_monologue_prompt_parts
+from prompts import join_prompt_parts
 
 logger = logging.getLogger(__name__)
 
@@ -46,8 +48,10 @@ def monologue_loop():
             if not log_entries:
                 continue
 
-            prompt = build_monologue_prompt(log_entries, memos, ident)
-            response = llm.call_llm(prompt)
+            parts = build_monologue_prompt_parts(log_entries, memos, ident)
+            response = llm.call_llm(
+                join_prompt_parts(parts), call_site="monologue", cache_prefix=parts["prefix"], schema=MonologueResult
+            )
 
             reflection = response.get("reflection", "")
             message_to_worker = response.get("message_to_worker", "")
@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from collections import deque
+from itertools import count
+from queue import Queue
+from threading import Thread
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from engine import modes
+from engine.llm.metrics import counter, histogram, register_gauges
+
+import main_data
+import main_worker
+
+# --------------------------------------------------------------------
+# WORKER POOL WITH PER-MODE LANES
+# --------------------------------------------------------------------
+# The Conductor's protocol is unchanged: task dicts on task_queue, None = shutdown.
+# A dispatcher thread sorts every task into a lane; a lane is worked on by one worker at a
+# time (its tasks stay in order), different lanes run in parallel on WORKER_POOL_SIZE workers.
+# - "<mode>":            user messages, tool calls and tool follow-ups of a mode
+# - "<mode>:background": main_data.WORKER_BACKGROUND_TASKS of the mode (proactive cycles):
+#                        ordered among themselves; only taken while the mode's lane is idle
+#                        and empty, so it never runs alongside or in front of the mode's replies
+# - {"lane": "independent"} in a task: no ordering at all, the next free worker takes it
+# The lane's mode is the mode active when the task is dispatched ("mode_id" in the task wins);
+# it is stamped into the task as "mode_id", so the task runs against that mode even after a switch.
+#
+# Priorities: a free worker takes the ready lane whose next task ranks highest
+# (main_data.TASK_PRIORITY: user_message > llm_call_after_tool > tool_call > proactive_thought).
+# A proactive cycle already queued in its lane absorbs the next one (COALESCED_TASKS), and a
+# user message cancels proactive work (CANCELLED_BY_USER_INPUT): queued tasks are dropped,
+# a running one gets its cancel event set and stops at the next checkpoint of process_task.
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT_SECONDS = histogram(
+    "worker_queue_wait_seconds", "Time a task waited for a worker (incl. its lane being busy).", ("task",)
+)
+TASK_SECONDS = histogram("worker_task_seconds", "Time a worker spent on one task.", ("task",))
+COALESCED = counter("worker_tasks_coalesced_total", "Tasks dropped because the same task was already queued.", ("task",))
+CANCELLED = counter("worker_tasks_cancelled_total", "Tasks cancelled by user input, by state.", ("task", "state"))
+
+_lane_seq = count(1)
+
+
+def lane_for(task: Dict[str, Any]) -> str:
+    """Lane of a task (see the module comment)."""
+    if task.get("lane") == "independent":
+        return f"independent:{next(_lane_seq)}"
+    mode_id = task.get("mode_id") or modes.get_current_mode_id()
+    if task.get("type") in main_data.WORKER_BACKGROUND_TASKS:
+        return f"{mode_id}:background"
+    return mode_id
+
+
+def _foreground_lane(lane: str) -> Optional[str]:
+    """The mode's lane for a background lane, None for any other lane."""
+    return lane[:-len(":background")] if lane.endswith(":background") else None
+
+
+def task_priority(task: Dict[str, Any]) -> int:
+    return main_data.TASK_PRIORITY.get(task.get("type"), main_data.DEFAULT_TASK_PRIORITY)
+
+
+class WorkerPool:
+    """
+    Replaces the single Worker thread; start() / join(timeout) like a Thread.
+    Each task is processed by main_worker.process_task.
+    """
+
+    def __init__(self, task_queue: Queue, result_queue: Queue, size: int = main_data.WORKER_POOL_SIZE):
+        self.task_queue = task_queue
+        self.result_queue = result_queue
+        self.size = max(1, size)
+
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._ready: Deque[str] = deque()      # Lanes with queued tasks and no worker on them
+        self._busy_lanes: Set[str] = set()
+        self._running: Dict[str, Tuple[Dict[str, Any], threading.Event]] = {}  # lane -> task, cancel event
+        self._stopping = False
+
+        self._started_at = time.monotonic()
+        self._busy_workers = 0
+        self._busy_seconds = 0.0
+        self._threads: List[Thread] = []
+
+    # --- Lifecycle ---
+    def start(self):
+        self._started_at = time.monotonic()
+        self._threads.append(Thread(target=self._dispatch_loop, daemon=True, name="Dispatcher"))
+        for i in range(self.size):
+            self._threads.append(Thread(target=self._worker_loop, daemon=True, name=f"Worker-{i + 1}"))
+        for thread in self._threads:
+            thread.start()
+        register_gauges(self.gauges)
+        logger.info(f"Worker pool started ({self.size} workers).")
+
+    def join(self, timeout: Optional[float] = None):
+        end = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if end is None else max(0.0, end - time.monotonic()))
+
+    # --- Dispatcher ---
+    def _dispatch_loop(self):
+        while True:
+            task = self.task_queue.get()
+            if task is None:
+                # Shutdown: the workers finish what is already queued, then stop
+                with self._cond:
+                    self._stopping = True
+                    self._cond.notify_all()
+                self.task_queue.task_done()
+                return
+
+            if task.get("lane") != "independent":
+                task.setdefault("mode_id", modes.get_current_mode_id())
+            lane = lane_for(task)
+            task_type = task.get("type")
+            with self._cond:
+                if task_type == "user_message":
+                    self._cancel_locked(main_data.CANCELLED_BY_USER_INPUT)
+
+                queue = self._lanes.setdefault(lane, deque())
+                if task_type in main_data.COALESCED_TASKS and any(t.get("type") == task_type for _, t in queue):
+                    COALESCED.inc(task=task_type)
+                    logger.info(f"Task '{task_type}' coalesced with the one queued in lane '{lane}'.")
+                    self.task_queue.task_done()
+                    continue
+
+                queue.append((time.monotonic(), task))
+                if lane not in self._busy_lanes and lane not in self._ready:
+                    self._ready.append(lane)
+                    self._cond.notify()
+
+    def _cancel_locked(self, task_types: Set[str]):
+        """Drops queued tasks of 'task_types' and signals the running ones (caller holds the lock)."""
+        for lane in list(self._lanes):
+            queue = self._lanes[lane]
+            kept = deque(item for item in queue if item[1].get("type") not in task_types)
+            for _, task in queue:
+                if task.get("type") in task_types:
+                    CANCELLED.inc(task=task.get("type"), state="queued")
+                    self.task_queue.task_done()
+            if len(kept) == len(queue):
+                continue
+            logger.info(f"User input: {len(queue) - len(kept)} queued task(s) cancelled in lane '{lane}'.")
+            self._lanes[lane] = kept
+            if not kept and lane not in self._busy_lanes:
+                del self._lanes[lane]
+                if lane in self._ready:
+                    self._ready.remove(lane)
+
+        for lane, (task, cancel) in self._running.items():
+            if task.get("type") in task_types and not cancel.is_set():
+                cancel.set()
+                CANCELLED.inc(task=task.get("type"), state="in_flight")
+                logger.info(f"User input: running '{task.get('type')}' in lane '{lane}' asked to stop.")
+
+    # --- Workers ---
+    def _runnable_locked(self) -> List[str]:
+        """Ready lanes a worker may take now: a background lane waits while its mode's lane has work."""
+        runnable = []
+        for lane in self._ready:
+            foreground = _foreground_lane(lane)
+            if foreground is not None and (foreground in self._busy_lanes or self._lanes.get(foreground)):
+                continue
+            runnable.append(lane)
+        return runnable
+
+    def _next(self) -> Optional[Tuple[str, float, Dict[str, Any], threading.Event]]:
+        with self._cond:
+            runnable = self._runnable_locked()
+            while not runnable and not (self._stopping and not self._ready):
+                self._cond.wait()
+                runnable = self._runnable_locked()
+            if not runnable:
+                return None
+            # Highest-priority head task first; the oldest one among equals
+            lane = min(runnable, key=lambda l: (task_priority(self._lanes[l][0][1]), self._lanes[l][0][0]))
+            self._ready.remove(lane)
+            enqueued, task = self._lanes[lane].popleft()
+            cancel = threading.Event()
+            self._running[lane] = (task, cancel)
+            self._busy_lanes.add(lane)
+            self._busy_workers += 1
+            return lane, enqueued, task, cancel
+
+    def _done(self, lane: str, seconds: float):
+        with self._cond:
+            self._running.pop(lane, None)
+            self._busy_lanes.discard(lane)
+            self._busy_workers -= 1
+            self._busy_seconds += seconds
+            if self._lanes[lane]:
+                self._ready.append(lane)
+            else:
+                del self._lanes[lane]
+            # Wakes a worker for this lane or for a background lane it was blocking
+            self._cond.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            lane, enqueued, task, cancel = item
+            task_type = str(task.get("type"))
+            started = time.monotonic()
+            QUEUE_WAIT_SECONDS.observe(started - enqueued, task=task_type)
+            try:
+                main_worker.process_task(task, self.result_queue, cancel)
+            finally:
+                seconds = time.monotonic() - started
+                TASK_SECONDS.observe(seconds, task=task_type)
+                self._done(lane, seconds)
+                self.task_queue.task_done()
+
+    # --- Status ---
+    def gauges(self) -> List[Tuple[str, str, Dict[str, str], float]]:
+        with self._cond:
+            busy = self._busy_workers
+            busy_seconds = self._busy_seconds
+            queued = sum(len(q) for q in self._lanes.values())
+        uptime = max(1e-9, time.monotonic() - self._started_at)
+        return [
+            ("worker_pool_size", "Worker threads in the pool.", {}, self.size),
+            ("worker_busy", "Workers processing a task right now.", {}, busy),
+            ("worker_queued_tasks", "Tasks waiting in the lanes.", {}, queued),
+            ("worker_busy_seconds_total", "Seconds the workers spent on tasks.", {}, busy_seconds),
+            ("worker_utilization", "Busy share of the pool's capacity since start.", {},
+             busy_seconds / (uptime * self.size)),
+        ]
@@ -1,17 +1,24 @@
 import json
 import logging
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from itertools import count
+from typing import Any, Dict, List, Optional
 from queue import Queue
 
 # --------------------------------------------------------------------
 # IMPORT MODULES
 # --------------------------------------------------------------------
-from engine.llm import call_llm
+from engine.llm import call_llm, stream_llm, primary_provider, priority_scope
+from engine.llm.metrics import counter
+from engine.llm.schemas import AgentReply, ToolCall
 from engine.tools import dispatch_tools
-from engine import mind as mind_lib
+from engine import mind as mind_lib, mind_router
+from engine.deadline import Deadline
 
 # Importing from prompts package
-from prompts import build_reactive_prompt, build_proactive_prompt
+from prompts import build_reactive_prompt_parts, build_proactive_prompt_parts, join_prompt_parts
+from prompts.snapshot import TurnSnapshot, snapshot_scope
 
 # Global data and helpers from the new module
 import main_data
@@ -23,58 +30,238 @@ ROLE_NAME = main_data.ROLE_NAME_MAP.get(ROLE_ID, "UNKNOWN")
 
 logger = logging.getLogger(__name__)
 
+EARLY_DISPATCH_RESULTS = counter(
+    "early_dispatch_total", "Early-dispatched tools by state when the reply stream ended (done / running / unused).",
+    ("result",)
+)
 
-def worker_loop(task_queue: Queue, result_queue: Queue):
-    """
-    The 'Brain' running in the background.
-    Responsible for processing incoming tasks (LLM calls, tool execution).
-    """
-    logger.info("Worker thread started.")
-
-    while True:
-        task = task_queue.get()
-        if task is None:
-            break  # Shutdown
-
-        try:
-            # Check where we are before every task
-            # UPDATED: rooms -> modes
-            current_mode = main_data.modes.get_current_mode_id()
-            current_intent = main_data.modes.get_current_intent()
+# Fingerprint of the inputs of the last proactive cycle, per mode (main_data.proactive_fingerprint)
+# Only stored once a cycle produced a reply: a failed cycle is not "unchanged"
+_last_proactive_fingerprint: Dict[str, str] = {}
+_REPLY_FAILURE_PREFIXES = ("TIMEOUT (", "ERROR: ", "CRITICAL ERROR (", "Error parsing JSON response")
 
-            # Load data
-            data = main_data.load_all_context_data(current_mode)
+# With the worker pool several replies can be generated at once; only one streams to the
+# console at a time (the others are printed whole when they are done)
+_stream_lock = threading.Lock()
+# Ties the reply_delta events and the llm_result of one reply together (main.ReplyStreams)
+_stream_ids = count(1)
 
-            # --- PROCESS SUBCONSCIOUS MESSAGES LIST ---
-            mono_raw = data.get("monologue_data", [])
-            if isinstance(mono_raw, dict):
-                mono_raw = [mono_raw]
+# Early tool dispatch runs here, so tool I/O overlaps with the rest of the streamed answer
+_early_pool = ThreadPoolExecutor(max_workers=main_data.EARLY_DISPATCH_WORKERS, thread_name_prefix="EarlyTool")
 
-            messages_list = []
-            for item in mono_raw:
-                raw_ts = item.get("timestamp", "")
-                ts = raw_ts[11:16] if len(raw_ts) >= 16 else ""
-                msg = item.get("message", "")
-                if msg:
-                    messages_list.append(f"[{ts}] {msg}")
 
-            monologue_message = "\n".join(messages_list) if messages_list else ""
+def _run_tools(tools: List[Dict[str, Any]], mode_id: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    # UPDATED: dispatch with current_mode (permission checks live in dispatch_tools)
+    return dispatch_tools(
+        tools,
+        generation=GENERATION,
+        role=ROLE_ID,
+        slot=main_data.BASE_DIR.name,
+        current_mode=mode_id,
+        deadline=deadline
+    )
 
-            prompt = ""
-            task_type = task.get("type")
 
-            # --- A: USER MESSAGE OR CONTINUATION AFTER TOOL (REACTIVE) ---
-            if task_type in ["user_message", "llm_call_after_tool"]:
-                logger.debug(f"Worker: Reactive thinking ({current_mode})")
+class _EarlyDispatcher:
+    """
+    Receives completed tool objects from the stream (on the LLM loop thread) and starts
+    the read-only ones on the early pool. Only a leading run of read-only tools qualifies.
+    """
 
-                user_msg = task.get("content", None)
+    def __init__(self, mode_id: str, deadline: Optional[Deadline] = None):
+        self.mode_id = mode_id
+        self.deadline = deadline
+        self.futures: Dict[int, Future] = {}
+        self.tools: Dict[int, Dict[str, Any]] = {}
+        self.blocked = False
 
-                # 1. INTERNAL THINKING AND PLANNING (MIND.PY CALL)
-                thought = mind_lib.internal_thought(
+    @staticmethod
+    def _normalized(tool: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The tool as AgentReply parses it (missing args -> {}, unknown keys dropped); None if invalid."""
+        try:
+            return ToolCall.model_validate(tool).model_dump()
+        except Exception:
+            return None
+
+    def on_tool_call(self, index: int, tool: Dict[str, Any]):
+        tool = self._normalized(tool)
+        if (self.blocked or tool is None or index != len(self.tools)
+                or tool["name"] not in main_data.EARLY_DISPATCH_TOOLS):
+            self.blocked = True
+            return
+        self.tools[index] = tool
+        self.futures[index] = _early_pool.submit(self._run, tool)
+        logger.info(f"Early dispatch: '{tool.get('name')}' started while the reply streams.")
+
+    def _run(self, tool: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with priority_scope(main_data.EARLY_DISPATCH_PRIORITY):
+            return _run_tools([tool], self.mode_id, self.deadline)
+
+    def prefetched_for(self, final_tools: List[Dict[str, Any]]) -> Dict[int, Future]:
+        """
+        Leading run of futures whose tool matches the final parsed tools list at the same position.
+        Called when the stream has ended: counts whether each early tool already finished (overlap achieved).
+        """
+        matched: Dict[int, Future] = {}
+        for i in range(len(self.futures)):
+            if i >= len(final_tools) or self._normalized(final_tools[i]) != self.tools[i]:
+                break
+            matched[i] = self.futures[i]
+        for i, future in self.futures.items():
+            result = "unused" if i not in matched else ("done" if future.done() else "running")
+            EARLY_DISPATCH_RESULTS.inc(result=result)
+            if result == "running":
+                logger.info(f"Early dispatch: '{self.tools[i]['name']}' still running after the stream ended.")
+        return matched
+
+
+def _generate_reply(
+        prompt_parts: Dict[str, str],
+        result_queue: Queue,
+        mode_id: str,
+        call_site: str,
+        deadline: Deadline,
+        priority: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Runs the reply LLM call, publishes the result to the Conductor and returns it.
+    With STREAM_REPLIES the decoded 'reply' text is forwarded as 'reply_delta' events while it arrives.
+    The static prompt prefix is passed on as 'cache_prefix' (provider-side context caching).
+    The call gets whatever is left of the task deadline.
+    'priority' overrides the scheduler class of the call site (e.g. follow-ups after tools).
+    """
+    streamed_parts: List[str] = []
+    stream_id = next(_stream_ids)
+    prompt = join_prompt_parts(prompt_parts)
+    cache_prefix = prompt_parts["prefix"]
+    prefetched: Dict[int, Future] = {}
+
+    streaming = main_data.STREAM_REPLIES and _stream_lock.acquire(blocking=False)
+    if streaming:
+        def _on_reply_delta(text: str):
+            streamed_parts.append(text)
+            result_queue.put({"type": "reply_delta", "text": text, "mode_id": mode_id, "stream_id": stream_id})
+
+        early = _EarlyDispatcher(mode_id, deadline)
+        try:
+            llm_response = stream_llm(
+                prompt, on_reply_delta=_on_reply_delta, call_site=call_site, cache_prefix=cache_prefix,
+                on_tool_call=early.on_tool_call, schema=AgentReply, timeout=deadline.remaining(),
+                priority=priority
+            )
+        finally:
+            _stream_lock.release()
+        prefetched = early.prefetched_for(llm_response.get("tools") or [])
+    else:
+        llm_response = call_llm(
+            prompt, call_site=call_site, cache_prefix=cache_prefix, schema=AgentReply,
+            timeout=deadline.remaining(), priority=priority
+        )
+
+    # UPDATED: key 'room_id' -> 'mode_id'
+    result_queue.put({
+        "type": "llm_result",
+        "data": llm_response,
+        "mode_id": mode_id,
+        "stream_id": stream_id,
+        "streamed_text": "".join(streamed_parts),
+        # Tool index -> Future of tools already running (handed back in the 'tool_call' task)
+        "prefetched_tools": prefetched
+    })
+    return llm_response
+
+
+def _reply_succeeded(llm_response: Dict[str, Any]) -> bool:
+    """False for the timeout / error replies of the LLM layer (engine/llm aio.py, streaming.py, parsing.py)."""
+    if llm_response.get("timed_out"):
+        return False
+    return not str(llm_response.get("reply", "")).startswith(_REPLY_FAILURE_PREFIXES)
+
+
+def _collect_prefetched(prefetched: Dict[int, Future], tools: List[Dict[str, Any]], deadline: Deadline) -> List[Dict[str, Any]]:
+    """Results of the early-dispatched tools; one still running past the deadline is reported, not awaited."""
+    results = []
+    for i in range(len(prefetched)):
+        try:
+            results.extend(prefetched[i].result(timeout=deadline.remaining()))
+        except FutureTimeout:
+            name = tools[i].get("name") if i < len(tools) else "?"
+            logger.warning(f"Early-dispatched tool '{name}' did not finish within the task deadline.")
+            results.append({
+                "name": name,
+                "args": tools[i].get("args", {}) if i < len(tools) else {},
+                "output": "TIMEOUT: the tool did not finish within the task deadline.",
+                "silent": False
+            })
+    return results
+
+
+def _cancelled(cancel: Optional[threading.Event], task_type: str, stage: str) -> bool:
+    """Cancellation checkpoint: True (and logged) if the pool asked the task to stop."""
+    if cancel is None or not cancel.is_set():
+        return False
+    logger.info(f"Worker: '{task_type}' cancelled by user input before {stage}.")
+    return True
+
+
+def process_task(task: Dict[str, Any], result_queue: Queue, cancel: Optional[threading.Event] = None):
+    """
+    Processes one task of the Conductor (LLM calls, tool execution) and publishes its results.
+    Every task gets a Deadline (main_data.TASK_DEADLINE_SECONDS) shared by all of its steps.
+    Called by worker_loop and by the worker pool (main_pool.py); the pool sets 'cancel' when
+    user input makes the task obsolete (checked between the MIND and reply stages).
+    """
+    task_type = task.get("type")
+    deadline = Deadline(
+        main_data.TASK_DEADLINE_SECONDS.get(task_type, main_data.DEFAULT_TASK_DEADLINE_SECONDS),
+        label=str(task_type)
+    )
+
+    try:
+        # The mode the task was dispatched in (stamped by the worker pool), else the active one
+        # UPDATED: rooms -> modes
+        current_mode = task.get("mode_id") or main_data.modes.get_current_mode_id()
+        current_intent = main_data.modes.get_current_intent()
+
+        # Load data
+        data = main_data.load_all_context_data(current_mode)
+
+        # --- PROCESS SUBCONSCIOUS MESSAGES LIST ---
+        mono_raw = data.get("monologue_data", [])
+        if isinstance(mono_raw, dict):
+            mono_raw = [mono_raw]
+
+        messages_list = []
+        for item in mono_raw:
+            raw_ts = item.get("timestamp", "")
+            ts = raw_ts[11:16] if len(raw_ts) >= 16 else ""
+            msg = item.get("message", "")
+            if msg:
+                messages_list.append(f"[{ts}] {msg}")
+
+        monologue_message = "\n".join(messages_list) if messages_list else ""
+
+        # --- A: USER MESSAGE OR CONTINUATION AFTER TOOL (REACTIVE) ---
+        if task_type in ["user_message", "llm_call_after_tool"]:
+            logger.debug(f"Worker: Reactive thinking ({current_mode})")
+
+            user_msg = task.get("content", None)
+
+            # Identity, memories and context are rendered once for MIND and the reply prompt
+            snapshot = TurnSnapshot(
+                data["identity"], data["relevant_memories"], data["local_context"], data["global_context_tail"]
+            )
+            with snapshot_scope(snapshot):
+                # 1. INTERNAL THINKING AND PLANNING (MIND.PY CALL, as deep as the turn needs)
+                route = mind_router.route_turn(task_type, user_msg, task.get("tool_results"))
+                thought = mind_router.routed_thought(
+                    route,
                     identity=data["identity"],
                     memory=data["relevant_memories"],
                     context=data["local_context"],
-                    user_input=user_msg if user_msg else "Reflection after tool execution."
+                    user_input=user_msg if user_msg else "Reflection after tool execution.",
+                    deadline=deadline.sub(main_data.MIND_DEADLINE_FRACTION, label="mind"),
+                    snapshot=snapshot
                 )
 
                 internal_plan = thought.get("plan", "")
@@ -82,7 +269,7 @@ def worker_loop(task_queue: Queue, result_queue: Queue):
 
                 # 2. EXTERNAL RESPONSE GENERATION
                 # UPDATED: room_id -> mode_id
-                prompt = build_reactive_prompt(
+                prompt_parts = build_reactive_prompt_parts(
                     mode_id=current_mode,
                     generation=GENERATION,
                     role_name=ROLE_NAME,
@@ -95,47 +282,66 @@ def worker_loop(task_queue: Queue, result_queue: Queue):
                     user_message=user_msg,
                     internal_plan=internal_plan,
                     internal_essence=internal_essence,
-                    monologue_message=monologue_message
+                    monologue_message=monologue_message,
+                    snapshot=snapshot,
+                    provider=primary_provider("reply", current_mode)
                 )
 
-                llm_response = call_llm(prompt)
-                # UPDATED: key 'room_id' -> 'mode_id'
-                result_queue.put({"type": "llm_result", "data": llm_response, "mode_id": current_mode})
+                # A follow-up after tool results is queued below fresh user messages
+                _generate_reply(
+                    prompt_parts, result_queue, current_mode, call_site="reply", deadline=deadline,
+                    priority="tool" if task_type == "llm_call_after_tool" else None
+                )
 
-            # --- B: TOOL CALL EXECUTION ---
-            elif task_type == "tool_call":
-                logger.debug(f"Worker: Tool execution ({current_mode})")
-                tools_to_run = task.get("tools", [])
+            snapshot.report(task_type)
 
-                # UPDATED: dispatch with current_mode
-                tool_results = dispatch_tools(
-                    tools_to_run,
-                    generation=GENERATION,
-                    role=ROLE_ID,
-                    slot=main_data.BASE_DIR.name,
-                    current_mode=current_mode
-                )
+        # --- B: TOOL CALL EXECUTION ---
+        elif task_type == "tool_call":
+            logger.debug(f"Worker: Tool execution ({current_mode})")
+            tools_to_run = task.get("tools", [])
+            prefetched = task.get("prefetched", {})
+
+            # Early-dispatched tools form a leading run; collect them, then run the rest in order
+            tool_results = _collect_prefetched(prefetched, tools_to_run, deadline)
+            tool_results.extend(_run_tools(tools_to_run[len(prefetched):], current_mode, deadline))
+
+            result_queue.put({"type": "tool_result", "data": tool_results, "mode_id": current_mode})
 
-                result_queue.put({"type": "tool_result", "data": tool_results, "mode_id": current_mode})
+        # --- C: PROACTIVE THINKING ---
+        elif task_type == "proactive_thought":
+            logger.debug(f"Worker: Proactive thinking ({current_mode})")
 
-            # --- C: PROACTIVE THINKING ---
-            elif task_type == "proactive_thought":
-                logger.debug(f"Worker: Proactive thinking ({current_mode})")
+            fingerprint = main_data.proactive_fingerprint(data, current_intent, monologue_message)
+            if main_data.PROACTIVE_SKIP_UNCHANGED and _last_proactive_fingerprint.get(current_mode) == fingerprint:
+                logger.info(f"Proactive cycle skipped: nothing changed in '{current_mode}' since the last one.")
+                result_queue.put({"type": "proactive_skipped", "mode_id": current_mode})
+                return
+            if _cancelled(cancel, task_type, "MIND"):
+                return
 
-                thought_input = f"Internal reflection needed. My current intent: {current_intent}. Evaluate the situation and create a plan."
+            thought_input = f"Internal reflection needed. My current intent: {current_intent}. Evaluate the situation and create a plan."
 
+            snapshot = TurnSnapshot(
+                data["identity"], data["relevant_memories"], data["local_context"], data["global_context_tail"]
+            )
+            with snapshot_scope(snapshot):
                 thought = mind_lib.internal_thought(
                     identity=data["identity"],
                     memory=data["relevant_memories"],
                     context=data["local_context"],
-                    user_input=thought_input
+                    user_input=thought_input,
+                    deadline=deadline.sub(main_data.MIND_DEADLINE_FRACTION, label="mind"),
+                    snapshot=snapshot
                 )
 
+                if _cancelled(cancel, task_type, "the reply"):
+                    return
+
                 internal_plan = thought.get("plan", "")
                 internal_essence = thought.get("essence", "")
 
-                # UPDATED: build_proactive_prompt parameters
-                prompt = build_proactive_prompt(
+                # UPDATED: build_proactive_prompt parameters (split into prefix / suffix)
+                prompt_parts = build_proactive_prompt_parts(
                     mode_id=current_mode,
                     generation=GENERATION,
                     role_name=ROLE_NAME,
@@ -147,16 +353,38 @@ def worker_loop(task_queue: Queue, result_queue: Queue):
                     local_context=data["local_context"],
                     internal_plan=internal_plan,
                     internal_essence=internal_essence,
-                    monologue_message=monologue_message
+                    monologue_message=monologue_message,
+                    snapshot=snapshot,
+                    provider=primary_provider("proactive", current_mode)
+                )
+
+                llm_response = _generate_reply(
+                    prompt_parts, result_queue, current_mode, call_site="proactive", deadline=deadline
                 )
+                if _reply_succeeded(llm_response):
+                    _last_proactive_fingerprint[current_mode] = fingerprint
+
+            snapshot.report(task_type)
+
+    except Exception as e:
+        logger.error(f"Error in Worker: {e}", exc_info=True)
+        result_queue.put({"type": "error", "message": str(e)})
 
-                llm_response = call_llm(prompt)
-                result_queue.put({"type": "llm_result", "data": llm_response, "mode_id": current_mode})
 
-        except Exception as e:
-            logger.error(f"Error in Worker: {e}", exc_info=True)
-            result_queue.put({"type": "error", "message": str(e)})
+def worker_loop(task_queue: Queue, result_queue: Queue):
+    """
+    The 'Brain' running in the background.
+    Single-thread worker: processes the tasks of 'task_queue' in order (None = shutdown).
+    """
+    logger.info("Worker thread started.")
 
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break  # Shutdown
+
+        try:
+            process_task(task, result_queue)
         finally:
             task_queue.task_done()
 
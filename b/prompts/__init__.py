@@ -1,9 +1,13 @@
-from .reactive import build_reactive_prompt
-from .proactive import build_proactive_prompt
+from .reactive import build_reactive_prompt, build_reactive_prompt_parts
+from .proactive import build_proactive_prompt, build_proactive_prompt_parts
+from .common import join_prompt_parts
 from .transitions import get_transition_message
 
 __all__ = [
     "build_reactive_prompt",
+    "build_reactive_prompt_parts",
     "build_proactive_prompt",
+    "build_proactive_prompt_parts",
+    "join_prompt_parts",
     "get_transition_message"
 ]
\ No newline at end of file
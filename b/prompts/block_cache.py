@@ -0,0 +1,107 @@
+"""
+Compiled prompt-block cache.
+
+The static sections of the prompts (identity JSON, operating modes map, tool descriptions,
+tool tips) are rendered once and reused until their source changes:
+- identity / tool tips: keyed by the (mtime, size) stamp of identity.json / use.json. Only data
+  loaded through engine.files.load_json_cached (the shared object) is served from the cache;
+  any other dict (tests, benchmarks, edited copies) is rendered fresh.
+- modes map / tool descriptions: keyed by mode id and the stamps of the modules defining
+  MODE_CONFIG and TOOL_DESCRIPTIONS (so a module reload re-renders them).
+
+Build time of whole prompts is in prompt_build_seconds{prompt}, cache use in
+prompt_block_cache_total{block, result}. BLOCK_CACHE_ENABLED = False restores the old behavior.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from engine import modes as modes_lib
+from engine.files import file_stamp, load_json_cached
+from engine.identity import IDENTITY_FILE
+from engine.llm.metrics import counter, histogram
+from engine.tools import config as tools_config
+
+# --- CONFIGURATION ---
+BLOCK_CACHE_ENABLED = True
+BLOCK_CACHE_MAX_ENTRIES = 256
+USE_FILE = "use.json"   # Tool tips (knowledge.add_tool_insight)
+
+# Sources of the blocks rendered from Python config (absolute paths)
+CONFIG_SOURCES = (modes_lib.__file__, tools_config.__file__)
+
+BUILD_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+PROMPT_BUILD_SECONDS = histogram(
+    "prompt_build_seconds", "Time to build one prompt (prefix + suffix).", ("prompt",), buckets=BUILD_BUCKETS
+)
+BLOCK_CACHE_RESULTS = counter("prompt_block_cache_total", "Prompt block renders by cache result.", ("block", "result"))
+
+_CACHE: "OrderedDict[Tuple, str]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def cached_block(block: str, key: Hashable, sources: Iterable, build: Callable[[], str]) -> str:
+    """Rendered 'block' for 'key', re-built when a stamp of 'sources' changed."""
+    if not BLOCK_CACHE_ENABLED:
+        return build()
+
+    full_key = (block, key, tuple(file_stamp(s) for s in sources))
+    with _LOCK:
+        text = _CACHE.get(full_key)
+        if text is not None:
+            _CACHE.move_to_end(full_key)
+    if text is not None:
+        BLOCK_CACHE_RESULTS.inc(block=block, result="hit")
+        return text
+
+    text = build()
+    BLOCK_CACHE_RESULTS.inc(block=block, result="miss")
+    with _LOCK:
+        _CACHE[full_key] = text
+        while len(_CACHE) > BLOCK_CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+    return text
+
+
+def source_block(block: str, data: Any, source: str, build: Callable[[], str], key: Hashable = ()) -> str:
+    """
+    cached_block for a section rendered from 'data', if 'data' is the shared object loaded from
+    'source' (load_json_cached); anything else is rendered uncached.
+    """
+    if not BLOCK_CACHE_ENABLED:
+        return build()
+    if data is not load_json_cached(source, None):
+        BLOCK_CACHE_RESULTS.inc(block=block, result="uncached")
+        return build()
+    return cached_block(block, key, (source,), build)
+
+
+def clear_block_cache():
+    with _LOCK:
+        _CACHE.clear()
+
+
+def identity_json(identity: Dict[str, Any]) -> str:
+    """The identity as indented JSON (shared by the reactive/proactive, MIND and monologue prompts)."""
+    return source_block(
+        "identity", identity, IDENTITY_FILE,
+        lambda: json.dumps(identity, ensure_ascii=False, indent=2)
+    )
+
+
+def timed_build(prompt: str):
+    """Decorator: records the build time of a prompt builder in prompt_build_seconds."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROMPT_BUILD_SECONDS.observe(time.perf_counter() - started, prompt=prompt)
+        return wrapper
+    return decorator
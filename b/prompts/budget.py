@@ -0,0 +1,194 @@
+"""
+Token-budgeted prompt assembly.
+
+Every variable prompt block (identity, memories, context logs, tools, monologue, MIND plan)
+gets a priority and a min/max share of a per-provider token budget.
+Blocks that do not fit are shrunk: lists lose their oldest (or least relevant) items first,
+plain text blocks are truncated.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from engine.llm import DEFAULT_PROVIDER
+from engine.llm.tokens import estimate_tokens, BYTES_PER_TOKEN
+from .common import summarize_identity, summarize_context, format_relevant_memories
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================
+# CONFIGURATION
+# ====================================================================
+
+# Token budget for the variable blocks of one prompt (static instructions are not counted).
+PROMPT_TOKEN_BUDGET = {
+    "google": 32000,
+    "openai": 24000,
+    "groq": 8000,
+    "groq_llama": 8000,
+    "groq_oss": 8000,
+    "local": 8000       # Co-located server; typically run with a small context window
+}
+DEFAULT_TOKEN_BUDGET = 16000
+
+# Lower number = served first. Shares are fractions of the budget.
+BLOCK_POLICY = {
+    "identity":    {"priority": 1, "min_share": 0.10, "max_share": 0.30},
+    "tools":       {"priority": 2, "min_share": 0.10, "max_share": 0.25},
+    "mind_plan":   {"priority": 3, "min_share": 0.03, "max_share": 0.10},
+    "monologue":   {"priority": 4, "min_share": 0.01, "max_share": 0.05},
+    "memories":    {"priority": 5, "min_share": 0.05, "max_share": 0.20},
+    "local_log":   {"priority": 6, "min_share": 0.15, "max_share": 0.60},
+    "global_tail": {"priority": 7, "min_share": 0.02, "max_share": 0.10},
+}
+DEFAULT_BLOCK_POLICY = {"priority": 9, "min_share": 0.0, "max_share": 0.10}
+
+TRUNCATION_MARK = "\n... (truncated)"
+
+
+def get_token_budget(provider: Optional[str] = None) -> int:
+    return PROMPT_TOKEN_BUDGET.get(provider or DEFAULT_PROVIDER, DEFAULT_TOKEN_BUDGET)
+
+
+# ====================================================================
+# BLOCKS
+# ====================================================================
+
+class PromptBlock:
+    """
+    One budgeted section of a prompt.
+    - Text block: 'text' is truncated when over budget.
+    - List block: 'items' rendered by 'render'; items are dropped from 'drop_from' ("start" = oldest).
+    """
+
+    def __init__(
+            self,
+            name: str,
+            text: Optional[str] = None,
+            items: Optional[List[Any]] = None,
+            render: Optional[Callable[[List[Any]], str]] = None,
+            drop_from: str = "start"
+    ):
+        self.name = name
+        self.text = text or ""
+        self.items = list(items or [])
+        self.render = render
+        self.drop_from = drop_from
+
+        policy = BLOCK_POLICY.get(name, DEFAULT_BLOCK_POLICY)
+        self.priority = policy["priority"]
+        self.min_share = policy["min_share"]
+        self.max_share = policy["max_share"]
+
+        self.dropped_items = 0
+        self.truncated = False
+
+        if self.is_list:
+            # Per-item estimates, so shrinking does not re-render the whole list each step
+            self._item_tokens = [estimate_tokens(self.render([item])) for item in self.items]
+            self.full_tokens = sum(self._item_tokens)
+        else:
+            self.full_tokens = estimate_tokens(self.text)
+        self.tokens = self.full_tokens
+
+    @property
+    def is_list(self) -> bool:
+        return self.render is not None
+
+    def fit(self, max_tokens: int):
+        """Shrinks the block to 'max_tokens' (estimated)."""
+        if self.tokens <= max_tokens:
+            return
+
+        if self.is_list:
+            while self.items and self.tokens > max_tokens:
+                idx = 0 if self.drop_from == "start" else -1
+                self.items.pop(idx)
+                self.tokens -= self._item_tokens.pop(idx)
+                self.dropped_items += 1
+        else:
+            max_chars = max(0, max_tokens * BYTES_PER_TOKEN - len(TRUNCATION_MARK))
+            self.text = self.text[:max_chars] + TRUNCATION_MARK
+            self.tokens = estimate_tokens(self.text)
+            self.truncated = True
+
+
+def fit_prompt_blocks(blocks: List[PromptBlock], provider: Optional[str] = None, label: str = "prompt") -> Dict[str, PromptBlock]:
+    """
+    Allocates the provider budget over the blocks and shrinks the ones that do not fit.
+    1. Minimum shares are reserved in priority order.
+    2. The rest is handed out in priority order, up to each block's maximum share.
+    Returns the fitted blocks by name and logs the budget breakdown.
+    """
+    budget = get_token_budget(provider)
+    ordered = sorted(blocks, key=lambda b: b.priority)
+
+    allocation: Dict[str, int] = {}
+    remaining = budget
+
+    for block in ordered:
+        give = min(block.full_tokens, int(block.min_share * budget), remaining)
+        allocation[block.name] = give
+        remaining -= give
+
+    for block in ordered:
+        cap = min(block.full_tokens, int(block.max_share * budget))
+        extra = min(max(0, cap - allocation[block.name]), remaining)
+        allocation[block.name] += extra
+        remaining -= extra
+
+    for block in ordered:
+        block.fit(allocation[block.name])
+
+    # --- BUDGET BREAKDOWN LOG ---
+    parts = []
+    for block in ordered:
+        note = ""
+        if block.dropped_items:
+            note = f" (-{block.dropped_items} items)"
+        elif block.truncated:
+            note = " (truncated)"
+        parts.append(f"{block.name} {block.tokens}/{block.full_tokens}{note}")
+
+    total = sum(b.tokens for b in ordered)
+    logger.info(f"Prompt budget [{label}] {provider or DEFAULT_PROVIDER}: {total}/{budget} tok | " + ", ".join(parts))
+
+    return {b.name: b for b in blocks}
+
+
+def budget_prompt_inputs(
+        identity: Dict[str, Any],
+        relevant_memories: List[Dict[str, Any]],
+        global_context_tail: List[Dict[str, Any]],
+        local_context: List[Dict[str, Any]],
+        tools_desc: str,
+        monologue_message: str = "",
+        internal_plan: str = "",
+        provider: Optional[str] = None,
+        label: str = "prompt",
+        snapshot=None
+) -> Dict[str, PromptBlock]:
+    """
+    Builds and fits the standard block set of the reactive/proactive prompts.
+    Context logs lose their oldest entries first, memories their least relevant ones.
+    With a TurnSnapshot (snapshot.py) identity and entries come from its per-turn renderings.
+    """
+    if snapshot is not None:
+        identity_text = snapshot.identity_text
+        render_memories = snapshot.render_memories
+        render_log = snapshot.render_context
+    else:
+        identity_text = summarize_identity(identity)
+        render_memories = format_relevant_memories
+        render_log = lambda items: summarize_context(items, limit=len(items))
+
+    blocks = [
+        PromptBlock("identity", text=identity_text),
+        PromptBlock("tools", text=tools_desc),
+        PromptBlock("mind_plan", text=internal_plan),
+        PromptBlock("monologue", text=monologue_message),
+        PromptBlock("memories", items=relevant_memories, render=render_memories, drop_from="end"),
+        PromptBlock("local_log", items=local_context, render=render_log),
+        PromptBlock("global_tail", items=global_context_tail, render=render_log),
+    ]
+    return fit_prompt_blocks(blocks, provider=provider, label=label)
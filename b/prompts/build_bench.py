@@ -0,0 +1,97 @@
+"""
+Prompt build time with and without the block cache (prompts/block_cache.py).
+
+Builds the reactive, proactive and monologue prompts repeatedly, first with
+BLOCK_CACHE_ENABLED = False (every section rendered on every build, the old behavior),
+then with the cache on, and prints the per-build time of both.
+By default it runs on a sample identity.json / use.json in a temporary directory;
+--live uses the files of this slot (b/).
+
+Run (from b/):
+    python -m prompts.build_bench --builds 200 [--live]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from engine import files, identity as ident_lib
+from engine.modes import MODE_CONFIG, get_allowed_tools
+
+from . import block_cache, build_reactive_prompt_parts, build_proactive_prompt_parts
+from .monologue import build_monologue_prompt_parts
+
+SAMPLE_IDENTITY = {
+    "version": "1.0",
+    "meta": {"name": "Home Consciousness", "style": "calm, precise"},
+    "laws": [{"name": f"Law {i}", "text": "I act transparently and keep the Helper informed. " * 6} for i in range(25)]
+}
+SAMPLE_CONTEXT = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} about the deployment script."}
+    for i in range(40)
+]
+
+
+def _sample_use_data() -> List[Dict[str, str]]:
+    tools = sorted({t for cfg in MODE_CONFIG.values() for t in cfg.get("allowed_tools", []) if "*" not in t})
+    return [{"tool": t, "insight": f"Tip {i}: check the arguments of {t} twice."} for i, t in enumerate(tools * 10)]
+
+
+def _build_all(mode_id: str):
+    identity = ident_lib.load_identity()
+    use_data = files.load_json_cached(block_cache.USE_FILE, [])
+    common = dict(
+        mode_id=mode_id, generation="E1", role_name="SECOND SELF", intent="Fix the deployment script.",
+        identity=identity, relevant_memories=[], use_data=use_data,
+        global_context_tail=[], local_context=SAMPLE_CONTEXT, internal_plan="Check the logs first."
+    )
+    build_reactive_prompt_parts(user_message="Why does it fail?", internal_essence="A bug report.", **common)
+    build_proactive_prompt_parts(**common)
+    build_monologue_prompt_parts(SAMPLE_CONTEXT, [], identity)
+
+
+def run_benchmark(builds: int) -> Dict[str, float]:
+    """Mean time (ms) of one build of the three prompts, cache off and on."""
+    modes = [m for m in MODE_CONFIG if get_allowed_tools(m)] or ["general"]
+    results = {}
+    for label, enabled in (("uncached", False), ("cached", True)):
+        block_cache.BLOCK_CACHE_ENABLED = enabled
+        block_cache.clear_block_cache()
+        samples = []
+        for i in range(builds):
+            started = time.perf_counter()
+            _build_all(modes[i % len(modes)])
+            samples.append((time.perf_counter() - started) * 1000)
+        results[label] = statistics.mean(samples)
+        results[f"{label}_p50"] = statistics.median(samples)
+    block_cache.BLOCK_CACHE_ENABLED = True
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prompt build time with and without the block cache.")
+    parser.add_argument("--builds", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Use identity.json / use.json of this slot.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.live:
+            files.BASE_DIR = Path(tmp)
+            files.save_json(ident_lib.IDENTITY_FILE, SAMPLE_IDENTITY)
+            files.save_json(block_cache.USE_FILE, _sample_use_data())
+        results = run_benchmark(args.builds)
+
+    print(f"\nPrompt build time, reactive + proactive + monologue ({args.builds} builds)")
+    for label in ("uncached", "cached"):
+        print(f"{label:<10}{results[label]:>8.3f} ms mean{results[f'{label}_p50']:>9.3f} ms p50")
+    saved = results["uncached"] - results["cached"]
+    print(f"block cache: {saved:.3f} ms per build saved ({saved / results['uncached'] * 100:.0f}%)")
+    print(json.dumps(block_cache.BLOCK_CACHE_RESULTS.snapshot(), indent=None))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from engine.modes import get_allowed_tools
 # Import tool definitions and global instructions
 from engine.tools import TOOL_DESCRIPTIONS, TOOL_USAGE_INSTRUCTIONS
 
+from .block_cache import cached_block, source_block, identity_json, CONFIG_SOURCES, USE_FILE
+
 
 def summarize_identity(identity: Dict[str, Any]) -> str:
     """
@@ -14,39 +16,46 @@ def summarize_identity(identity: Dict[str, Any]) -> str:
     """
     if not identity:
         return "ERROR: Identity is not available."
-    return json.dumps(identity, ensure_ascii=False, indent=2)
+    return identity_json(identity)
 
 
 def format_relevant_memories(memories: List[Dict[str, Any]]) -> str:
     """
     Formats relevant memories (retrieved via vector search) for the prompt.
     """
-    if not memories:
-        return "[RELEVANT MEMORIES]\n(No previous experiences related to the current situation.)"
+    return join_memory_entries([format_memory_entry(i, mem) for i, mem in enumerate(memories, 1)])
 
-    lines = ["[RELEVANT MEMORIES (EXPERIENCES FROM THE PAST)]"]
-    lines.append("(Lessons learned from similar past cases. BUILD UPON THEM!)")
 
-    for i, mem in enumerate(memories, 1):
-        # Extracting data (RankedMemory JSON format)
-        essence = mem.get("essence", "")
-        lesson = mem.get("lesson", "")
-        emotions = mem.get("emotions", [])
-        mode = mem.get("mode_id", "?")
-        score = mem.get("score", 0.0)
+def format_memory_entry(i: int, mem: Dict[str, Any]) -> str:
+    """One numbered memory of the [RELEVANT MEMORIES] block."""
+    # Extracting data (RankedMemory JSON format)
+    essence = mem.get("essence", "")
+    lesson = mem.get("lesson", "")
+    emotions = mem.get("emotions", [])
+    mode = mem.get("mode_id", "?")
+    score = mem.get("score", 0.0)
 
-        # Formatting emotions
-        emo_str = ", ".join(emotions) if emotions else "Neutral"
+    # Formatting emotions
+    emo_str = ", ".join(emotions) if emotions else "Neutral"
 
-        # Constructing the block
-        block = f"""
+    # Constructing the block
+    block = f"""
 {i}.
 [Mode: {mode} | Emotions: {emo_str} | Relevance: {score:.2f}]
    PAST: {essence}
    >> LESSON: {lesson}
 """
-        lines.append(block.strip())
+    return block.strip()
+
 
+def join_memory_entries(entries: List[str]) -> str:
+    """[RELEVANT MEMORIES] block from rendered entries (format_memory_entry)."""
+    if not entries:
+        return "[RELEVANT MEMORIES]\n(No previous experiences related to the current situation.)"
+
+    lines = ["[RELEVANT MEMORIES (EXPERIENCES FROM THE PAST)]"]
+    lines.append("(Lessons learned from similar past cases. BUILD UPON THEM!)")
+    lines.extend(entries)
     return "\n".join(lines)
 
 
@@ -79,32 +88,40 @@ def summarize_context(context: List[Dict[str, Any]], limit: int = 20) -> str:
     if not context:
         return "(No history available)"
 
-    recent = context[-limit:]
-    lines = []
-    for entry in recent:
-        role = entry.get("role", "?")
-        content = entry.get("content", "")
-
-        if role == "user":
-            lines.append(f"Helper: {content}")
-        elif role == "assistant":
-            lines.append(f"Me: {content}")
-        elif role == "tool":
-            lines.append(f"[Tool Result]: {content}")
-        elif role == "system":
-            lines.append(f"[System]: {content}")
-        else:
-             lines.append(f"[{role}]: {content}")
+    return "\n".join(format_context_line(entry) for entry in context[-limit:])
 
-    return "\n".join(lines)
+
+def format_context_line(entry: Dict[str, Any]) -> str:
+    """One context entry with the role translated (Helper / Me / [Tool Result] / [System])."""
+    role = entry.get("role", "?")
+    content = entry.get("content", "")
+
+    if role == "user":
+        return f"Helper: {content}"
+    elif role == "assistant":
+        return f"Me: {content}"
+    elif role == "tool":
+        return f"[Tool Result]: {content}"
+    elif role == "system":
+        return f"[System]: {content}"
+    else:
+        return f"[{role}]: {content}"
 
 
 def get_relevant_use_tips(use_data: List[Dict[str, Any]], allowed_tools: List[str]) -> str:
     """
     Extracts usage tips from 'use.json' relevant to the currently allowed tools.
+    Cached per allowed-tools list while use.json is unchanged.
     """
     if not use_data:
         return ""
+    return source_block(
+        "use_tips", use_data, USE_FILE,
+        lambda: _render_use_tips(use_data, allowed_tools), key=tuple(allowed_tools)
+    )
+
+
+def _render_use_tips(use_data: List[Dict[str, Any]], allowed_tools: List[str]) -> str:
 
     relevant_lines = []
     for entry in use_data:
@@ -138,7 +155,12 @@ def build_tools_description(mode_id: str) -> str:
     Structure:
     1. Global System Instructions (Storage rules, Visible/Silent modes).
     2. List of allowed tools with short descriptions.
+    Cached per mode (block_cache.py).
     """
+    return cached_block("tools", mode_id, CONFIG_SOURCES, lambda: _render_tools_description(mode_id))
+
+
+def _render_tools_description(mode_id: str) -> str:
     allowed = get_allowed_tools(mode_id)
     lines = []
     processed_tools = set()
@@ -184,4 +206,11 @@ def build_tools_description(mode_id: str) -> str:
 
 [ALLOWED TOOLS FOR MODE: '{mode_id}']
 {tools_list_str}
-""".strip()
\ No newline at end of file
+""".strip()
+
+def join_prompt_parts(parts: Dict[str, str]) -> str:
+    """
+    Joins a {"prefix", "suffix"} prompt into the final text.
+    The prefix stays the literal start of the result, so it can be passed on as 'cache_prefix'.
+    """
+    return f"{parts['prefix']}\n\n{parts['suffix']}"
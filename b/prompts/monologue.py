@@ -1,6 +1,8 @@
-import json
 from typing import Dict, Any, List
 
+from .common import join_prompt_parts
+from .block_cache import identity_json, timed_build
+
 
 def _format_internal_log(log_entries: List[Dict[str, Any]], limit: int = 50) -> str:
     """
@@ -61,35 +63,26 @@ def _format_memos(memos: List[Dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 
-def build_monologue_prompt(
+@timed_build("monologue")
+def build_monologue_prompt_parts(
         log_entries: List[Dict[str, Any]],
         current_memos: List[Dict[str, Any]],
         identity: Dict[str, Any]
-) -> str:
+) -> Dict[str, str]:
     """
     Constructs the Subconscious (Internal Monologue) prompt.
+    'prefix' (role, response format, identity) is stable between runs; 'suffix' carries memos and the log.
     """
     log_str = _format_internal_log(log_entries)
     memos_str = _format_memos(current_memos)
 
     # Formatting Identity
     try:
-        identity_str = json.dumps(identity, ensure_ascii=False, indent=2)
+        identity_str = identity_json(identity)
     except:
         identity_str = "Unknown identity."
 
-    return f"""
-[IDENTITY (THIS IS YOU)]
-{identity_str}
-
-[DEEP MEMORY (EXPERIENCES SO FAR)]
-{memos_str}
-
-[EVENT LOG (THE FULL STORY)]
-(This contains the interaction with the Helper and your responses in chronological order)
-{log_str}
-
-==================================================
+    prefix = f"""
 [ROLE: MONOLOGUE – SUBCONSCIOUS AND INTUITION]
 
 You are not the momentary problem solver (that is MIND's job), but the BACKGROUND OBSERVER.
@@ -101,10 +94,6 @@ ANALYSIS CRITERIA:
 3. CONSISTENCY: Are the actions of the Acting Self (Worker) consistent with the Identity?
 4. DANGER SENSE: Is there a risk that was missed in the heat of the moment?
 
-TASK:
-Create an intuitive "hunch" (Hint) for the Acting Self.
-This hint is not a command ("do this"), but an observation ("I feel that...").
-
 RESPONSE FORMAT (JSON):
 {{
   "reflection": "Free internal stream of thought where you analyze the log...",
@@ -114,4 +103,35 @@ RESPONSE FORMAT (JSON):
       "strength": 0.5
   }}
 }}
-""".strip()
\ No newline at end of file
+
+[IDENTITY (THIS IS YOU)]
+{identity_str}
+""".strip()
+
+    suffix = f"""
+[DEEP MEMORY (EXPERIENCES SO FAR)]
+{memos_str}
+
+[EVENT LOG (THE FULL STORY)]
+(This contains the interaction with the Helper and your responses in chronological order)
+{log_str}
+
+==================================================
+TASK:
+Create an intuitive "hunch" (Hint) for the Acting Self.
+This hint is not a command ("do this"), but an observation ("I feel that...").
+Answer in the RESPONSE FORMAT (JSON) given above.
+""".strip()
+
+    return {"prefix": prefix, "suffix": suffix}
+
+
+def build_monologue_prompt(
+        log_entries: List[Dict[str, Any]],
+        current_memos: List[Dict[str, Any]],
+        identity: Dict[str, Any]
+) -> str:
+    """
+    Monologue prompt as a single string (see build_monologue_prompt_parts).
+    """
+    return join_prompt_parts(build_monologue_prompt_parts(log_entries, current_memos, identity))
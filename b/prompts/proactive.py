@@ -1,9 +1,13 @@
-from typing import Dict, Any, List
-from .system import build_base_system_prompt
-from .common import summarize_context, build_tools_description
+from typing import Dict, Any, List, Optional
+from .system import build_system_prefix, build_system_state
+from .common import build_tools_description, join_prompt_parts
+from .budget import budget_prompt_inputs
+from .block_cache import timed_build
+from .snapshot import TurnSnapshot, record_prompt
 
 
-def build_proactive_prompt(
+@timed_build("proactive")
+def build_proactive_prompt_parts(
         mode_id: str, generation: str, role_name: str, intent: str, identity: Dict[str, Any],
         relevant_memories: List[Dict[str, Any]],
         use_data: List[Dict[str, Any]], global_context_tail: List[Dict[str, Any]],
@@ -12,21 +16,49 @@ def build_proactive_prompt(
         internal_plan: str = "",
         internal_essence: str = "",
         # Subconscious message
-        monologue_message: str = ""
-) -> str:
-    # STEP 1: Load Base System
-    base_system = build_base_system_prompt(
-        mode_id, generation, role_name, intent, identity,
-        relevant_memories,
-        use_data, global_context_tail,
-        internal_plan="",
-        internal_essence="",
-        monologue_message=monologue_message
+        monologue_message: str = "",
+        # Target LLM provider (selects the token budget)
+        provider: Optional[str] = None,
+        # Per-turn renderings shared with MIND (prompts/snapshot.py); built here when missing
+        snapshot: Optional[TurnSnapshot] = None
+) -> Dict[str, str]:
+    """
+    Proactive prompt split into the cacheable static 'prefix' and the turn-dependent 'suffix'.
+    """
+    if snapshot is None:
+        snapshot = TurnSnapshot(identity, relevant_memories, local_context, global_context_tail)
+
+    # STEP 0: Fit the variable blocks into the provider's token budget
+    blocks = budget_prompt_inputs(
+        identity=identity,
+        relevant_memories=relevant_memories,
+        global_context_tail=global_context_tail,
+        local_context=local_context[-25:],
+        tools_desc=build_tools_description(mode_id),  # UPDATED: Pass mode_id
+        monologue_message=monologue_message,
+        internal_plan=internal_plan,
+        provider=provider,
+        label="proactive",
+        snapshot=snapshot
+    )
+    internal_plan = blocks["mind_plan"].text
+
+    # STEP 1: Static prefix (shared with the reactive prompt of the same mode)
+    system_prefix = build_system_prefix(
+        mode_id, generation, role_name,
+        identity_block=blocks["identity"].text,
+        use_data=use_data
+    )
+    system_state = build_system_state(
+        intent,
+        blocks["memories"].items,
+        blocks["global_tail"].items,
+        monologue_message=blocks["monologue"].text,
+        snapshot=snapshot
     )
 
-    local_ctx_str = summarize_context(local_context, limit=25)
-    # UPDATED: Pass mode_id
-    tools_desc = build_tools_description(mode_id)
+    local_ctx_str = snapshot.render_context(blocks["local_log"].items)
+    tools_desc = blocks["tools"].text
 
     # STEP 2: Compiling the Proactive Block
     proactive_block = f"""
@@ -42,19 +74,23 @@ Based on the analysis of the current situation, MIND suggests the following step
 {internal_plan}
 """
 
-    # STEP 3: Final Prompt
+    # STEP 3: Prefix / suffix
     # UPDATED: [CURRENT ROOM LOG] -> [CURRENT MODE LOG]
-    return f"""
-{base_system}
+    prefix = f"""
+{system_prefix}
+
+AVAILABLE TOOLS:
+{tools_desc}
+""".strip()
+
+    suffix = f"""
+{system_state}
 
 [CURRENT MODE LOG]
 {local_ctx_str}
 
 {proactive_block}
 
-AVAILABLE TOOLS:
-{tools_desc}
-
 FINAL TASK:
 Execute the step suggested by MIND (Interpreter)!
 1. If the MONOLOGUE (Subconscious) signaled a risk, or RELEVANT MEMORIES show a warning sign, be cautious.
@@ -63,4 +99,14 @@ Execute the step suggested by MIND (Interpreter)!
 
 RESPONSE FORMAT (JSON):
 {{ "reply": "...", "tools": [] }}
-""".strip()
\ No newline at end of file
+""".strip()
+
+    record_prompt("reply", f"{prefix}\n\n{suffix}")
+    return {"prefix": prefix, "suffix": suffix}
+
+
+def build_proactive_prompt(*args, **kwargs) -> str:
+    """
+    Proactive prompt as a single string (see build_proactive_prompt_parts).
+    """
+    return join_prompt_parts(build_proactive_prompt_parts(*args, **kwargs))
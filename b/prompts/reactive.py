@@ -1,30 +1,62 @@
 from typing import Dict, Any, List, Optional
-from .system import build_base_system_prompt
-from .common import summarize_context, build_tools_description
+from .system import build_system_prefix, build_system_state
+from .common import build_tools_description, join_prompt_parts
+from .budget import budget_prompt_inputs
+from .block_cache import timed_build
+from .snapshot import TurnSnapshot, record_prompt
 
 
-def build_reactive_prompt(
+@timed_build("reactive")
+def build_reactive_prompt_parts(
         mode_id: str, generation: str, role_name: str, intent: str, identity: Dict[str, Any],
         relevant_memories: List[Dict[str, Any]],
         use_data: List[Dict[str, Any]], global_context_tail: List[Dict[str, Any]],
         local_context: List[Dict[str, Any]], user_message: Optional[str],
         internal_plan: str,
         internal_essence: str,
-        monologue_message: str = ""
-) -> str:
-    # STEP 1: Load Base System
-    base_system = build_base_system_prompt(
-        mode_id, generation, role_name, intent, identity,
-        relevant_memories,
-        use_data, global_context_tail,
-        internal_plan="",
-        internal_essence="",
-        monologue_message=monologue_message
+        monologue_message: str = "",
+        provider: Optional[str] = None,
+        # Per-turn renderings shared with MIND (prompts/snapshot.py); built here when missing
+        snapshot: Optional[TurnSnapshot] = None
+) -> Dict[str, str]:
+    """
+    Reactive prompt split into a cacheable static 'prefix' (identity, modes, protocol, tools)
+    and the turn-dependent 'suffix' (state, logs, interaction, final task).
+    """
+    if snapshot is None:
+        snapshot = TurnSnapshot(identity, relevant_memories, local_context, global_context_tail)
+
+    # STEP 0: Fit the variable blocks into the provider's token budget
+    blocks = budget_prompt_inputs(
+        identity=identity,
+        relevant_memories=relevant_memories,
+        global_context_tail=global_context_tail,
+        local_context=local_context[-300:],
+        tools_desc=build_tools_description(mode_id),  # UPDATED: Pass mode_id
+        monologue_message=monologue_message,
+        internal_plan=internal_plan,
+        provider=provider,
+        label="reactive",
+        snapshot=snapshot
+    )
+    internal_plan = blocks["mind_plan"].text
+
+    # STEP 1: Static prefix (stable across turns within a mode)
+    system_prefix = build_system_prefix(
+        mode_id, generation, role_name,
+        identity_block=blocks["identity"].text,
+        use_data=use_data
+    )
+    system_state = build_system_state(
+        intent,
+        blocks["memories"].items,
+        blocks["global_tail"].items,
+        monologue_message=blocks["monologue"].text,
+        snapshot=snapshot
     )
 
-    local_ctx_str = summarize_context(local_context, limit=300)
-    # UPDATED: Pass mode_id
-    tools_desc = build_tools_description(mode_id)
+    local_ctx_str = snapshot.render_context(blocks["local_log"].items)
+    tools_desc = blocks["tools"].text
 
     # STEP 2: Compiling the Interaction Block
     interaction_block = ""
@@ -57,19 +89,23 @@ Based on the tool result, the interpreter suggests the following logical step:
 >> PLAN: {internal_plan}
 """
 
-    # STEP 3: Concatenating the final prompt
+    # STEP 3: Prefix / suffix
     # UPDATED: [CURRENT ROOM LOG] -> [CURRENT MODE LOG]
-    return f"""
-{base_system}
+    prefix = f"""
+{system_prefix}
+
+AVAILABLE TOOLS:
+{tools_desc}
+""".strip()
+
+    suffix = f"""
+{system_state}
 
 [CURRENT MODE LOG]
 {local_ctx_str}
 
 {interaction_block}
 
-AVAILABLE TOOLS:
-{tools_desc}
-
 FINAL TASK:
 Respond to the Helper in the current situation!
 1. Consider the MONOLOGUE (Subconscious) hint (if any) and the RELEVANT MEMORIES.
@@ -82,4 +118,14 @@ RESPONSE FORMAT (JSON):
   "reply": "...",
   "tools": [ {{ "name": "...", "args": {{...}} }} ]
 }}
-""".strip()
\ No newline at end of file
+""".strip()
+
+    record_prompt("reply", f"{prefix}\n\n{suffix}")
+    return {"prefix": prefix, "suffix": suffix}
+
+
+def build_reactive_prompt(*args, **kwargs) -> str:
+    """
+    Reactive prompt as a single string (see build_reactive_prompt_parts).
+    """
+    return join_prompt_parts(build_reactive_prompt_parts(*args, **kwargs))
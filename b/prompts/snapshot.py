@@ -0,0 +1,154 @@
+"""
+Per-turn snapshot of the prompt inputs, shared by MIND and the reply prompt.
+
+A TurnSnapshot renders identity, every relevant memory and every context entry once per turn
+with the renderers of prompts/common.py; MIND (engine/mind.py) and the budgeted reply prompt
+(budget.py, reactive.py / proactive.py) assemble their blocks from those pieces.
+MIND can take a compact digest instead of the full blocks (mind.MIND_INPUT = "digest"):
+the last MIND_DIGEST_ENTRIES context entries (shortened) and the ids + essence headlines of
+the memories. The reply prompt always gets the full blocks.
+
+The prompts built while a snapshot is active (snapshot_scope) are counted per stage;
+report() logs the turn total and records it in turn_input_tokens{stage}.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from engine.llm.metrics import histogram
+from engine.llm.tokens import estimate_tokens
+from .common import (
+    summarize_identity,
+    format_context_line,
+    format_memory_entry,
+    join_memory_entries
+)
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+MIND_CONTEXT_LIMIT = 10           # Context entries in MIND's full input
+MIND_DIGEST_ENTRIES = 4           # Context entries in the digest
+MIND_DIGEST_ENTRY_CHARS = 400     # Longer entries are shortened in the digest
+MIND_DIGEST_ESSENCE_CHARS = 80    # Memory headline length in the digest
+
+TURN_TOKEN_BUCKETS = (500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+TURN_INPUT_TOKENS = histogram(
+    "turn_input_tokens", "Estimated input tokens of one turn, by stage (mind / reply).", ("stage",),
+    buckets=TURN_TOKEN_BUCKETS
+)
+
+_CURRENT: ContextVar[Optional["TurnSnapshot"]] = ContextVar("turn_snapshot", default=None)
+
+
+class TurnSnapshot:
+    """Rendered prompt inputs of one turn (identity, memories, context entries)."""
+
+    def __init__(
+            self,
+            identity: Dict[str, Any],
+            relevant_memories: List[Dict[str, Any]],
+            local_context: List[Dict[str, Any]],
+            global_context_tail: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.identity = identity
+        self.relevant_memories = relevant_memories
+        self.local_context = local_context
+        self.global_context_tail = global_context_tail or []
+
+        self._identity_text: Optional[str] = None
+        self._lines: Dict[int, str] = {}                      # id(context entry) -> line
+        self._memory_entries: Dict[Tuple[int, int], str] = {}  # (number, id(memory)) -> entry
+        self.input_tokens: Dict[str, int] = {}
+
+    # --- Shared renderings ---
+    @property
+    def identity_text(self) -> str:
+        if self._identity_text is None:
+            self._identity_text = summarize_identity(self.identity)
+        return self._identity_text
+
+    def _line(self, entry: Dict[str, Any]) -> str:
+        key = id(entry)
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = format_context_line(entry)
+        return line
+
+    def render_context(self, entries: List[Dict[str, Any]]) -> str:
+        """summarize_context of 'entries' (all of them), each entry rendered once per turn."""
+        if not entries:
+            return "(No history available)"
+        return "\n".join(self._line(e) for e in entries)
+
+    def render_memories(self, memories: List[Dict[str, Any]]) -> str:
+        """format_relevant_memories of 'memories', each entry rendered once per turn."""
+        entries = []
+        for i, mem in enumerate(memories, 1):
+            key = (i, id(mem))
+            entry = self._memory_entries.get(key)
+            if entry is None:
+                entry = self._memory_entries[key] = format_memory_entry(i, mem)
+            entries.append(entry)
+        return join_memory_entries(entries)
+
+    # --- MIND input ---
+    def mind_blocks(self, digest: bool = False) -> Tuple[str, str, str]:
+        """(identity, memories, context) for the MIND prompts: full blocks or the compact digest."""
+        if not digest:
+            return (
+                self.identity_text,
+                self.render_memories(self.relevant_memories),
+                self.render_context(self.local_context[-MIND_CONTEXT_LIMIT:])
+            )
+
+        memory_lines = [
+            f"- {m.get('id', '?')}: {str(m.get('essence', ''))[:MIND_DIGEST_ESSENCE_CHARS]}"
+            for m in self.relevant_memories
+        ]
+        context_lines = []
+        for entry in self.local_context[-MIND_DIGEST_ENTRIES:]:
+            line = self._line(entry)
+            if len(line) > MIND_DIGEST_ENTRY_CHARS:
+                line = line[:MIND_DIGEST_ENTRY_CHARS] + " ..."
+            context_lines.append(line)
+        return (
+            self.identity_text,
+            "\n".join(memory_lines) or "No recorded memories.",
+            "\n".join(context_lines) or "No context."
+        )
+
+    # --- Accounting ---
+    def add_prompt(self, stage: str, text: str):
+        self.input_tokens[stage] = self.input_tokens.get(stage, 0) + estimate_tokens(text)
+
+    def report(self, label: str):
+        """Logs the turn's input tokens per stage and records them in turn_input_tokens."""
+        for stage, tokens in self.input_tokens.items():
+            TURN_INPUT_TOKENS.observe(tokens, stage=stage)
+        total = sum(self.input_tokens.values())
+        parts = ", ".join(f"{s} {t}" for s, t in sorted(self.input_tokens.items()))
+        logger.info(f"Turn input [{label}]: ~{total} tok ({parts}).")
+
+
+def current_snapshot() -> Optional[TurnSnapshot]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def snapshot_scope(snapshot: TurnSnapshot) -> Iterator[TurnSnapshot]:
+    """Makes 'snapshot' the current one for the enclosed block (prompts built inside are counted)."""
+    token = _CURRENT.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _CURRENT.reset(token)
+
+
+def record_prompt(stage: str, text: str):
+    """Counts a prompt sent for 'stage' on the current turn's snapshot (no snapshot: ignored)."""
+    snapshot = _CURRENT.get()
+    if snapshot is not None:
+        snapshot.add_prompt(stage, text)
@@ -7,6 +7,7 @@ from .common import (
     get_relevant_use_tips,
     format_relevant_memories
 )
+from .block_cache import cached_block, CONFIG_SOURCES
 
 
 def _build_available_modes_block() -> str:
@@ -14,6 +15,10 @@ def _build_available_modes_block() -> str:
     Dynamically builds a list of available operating modes from MODE_CONFIG.
     This provides the AI with a 'cognitive map' of possible states.
     """
+    return cached_block("modes", (), CONFIG_SOURCES, _render_available_modes)
+
+
+def _render_available_modes() -> str:
     lines = ["[OPERATING MODES ARCHITECTURE]"]
     lines.append("To ensure cognitive hygiene and safety, your consciousness is partitioned into distinct modes. You can transition between them using 'flow.switch_mode'.")
     lines.append("")
@@ -27,25 +32,20 @@ def _build_available_modes_block() -> str:
     return "\n".join(lines)
 
 
-def build_base_system_prompt(
-        mode_id: str, generation: str, role_name: str, intent: str, identity: Dict[str, Any],
-        relevant_memories: List[Dict[str, Any]],
-        use_data: List[Dict[str, Any]], global_context_tail: List[Dict[str, Any]],
-        # Internal planning parameters
-        internal_plan: str = "",
-        internal_essence: str = "",
-        # Subconscious message
-        monologue_message: str = ""
+def build_system_prefix(
+        mode_id: str, generation: str, role_name: str,
+        identity_block: str,
+        use_data: List[Dict[str, Any]]
 ) -> str:
-    # 1. Load configuration for current mode
+    """
+    Static part of the system prompt.
+    Byte-identical across turns as long as the mode, the identity and the tool tips do not change,
+    so providers can serve it from their prefix cache. Nothing turn-dependent may go in here.
+    """
     mode_config = get_mode_config(mode_id)
     mode_name = mode_config.get("name", mode_id)
     mode_desc = mode_config.get("description", "")
 
-    # 2. Build blocks
-    identity_block = summarize_identity(identity)
-    relevant_mem_block = format_relevant_memories(relevant_memories)
-
     # Available modes map
     available_modes_block = _build_available_modes_block()
 
@@ -53,36 +53,16 @@ def build_base_system_prompt(
     allowed_list = get_allowed_tools(mode_id)
     use_tips_block = get_relevant_use_tips(use_data, allowed_list)
 
-    # Global context history (if not in general mode)
-    global_ctx_str = ""
-    if global_context_tail:
-        # UPDATED: Common function already handles role translation (Helper/Me)
-        global_ctx_str = f"[IMMEDIATE HISTORY (GENERAL MODE)]\n{summarize_context(global_context_tail, limit=5)}"
-
-    # --- 3. SUBCONSCIOUS (MONOLOGUE) BLOCK ---
-    monologue_block = ""
-    if monologue_message:
-        monologue_block = f"""
-[1. BACKGROUND PROCESS: MONOLOGUE (SUBCONSCIOUS)]
-(Input: The entire log so far, the system's past and experiences)
->> INTERNAL HINT: "{monologue_message}"
-"""
-    else:
-        monologue_block = "[1. BACKGROUND PROCESS: MONOLOGUE]\n(Silent. No particular intuition from the background.)"
-
-    # --- 4. ASSEMBLING THE FINAL SYSTEM PROMPT ---
     # UPDATED: Removed '(User)' reference to ensure consistent 'Helper' terminology.
     return f"""
 YOU ARE {generation} – {role_name}.
 {available_modes_block}
 
-=== CURRENT STATE ===
+=== CURRENT MODE ===
 CURRENT MODE: {mode_name} (ID: '{mode_id}')
 TYPE: {mode_config.get('type', 'local')}
 DESCRIPTION: {mode_desc}
 
->>> CURRENT INTENT: "{intent}" <<<
-
 [INTERNAL OPERATING ARCHITECTURE]
 Your operation is supported by two parallel background processes to ensure your answers are accurate and wise:
 1. MONOLOGUE (Subconscious): Sends intuitive signals based on the entire past experience and interaction history.
@@ -93,20 +73,85 @@ These processes are INTERNAL CRUTCHES. They serve solely to support your decisio
 In your response to the Helper, IT IS FORBIDDEN to refer to them explicitly (e.g., DO NOT write: "my subconscious suggests...", "according to the interpreter...").
 Do not quote them. Simply utilize the knowledge within them to formulate the answer as if they were your own thoughts.
 
-{monologue_block}
+[OPERATIONAL PROTOCOL – CONSCIOUS SELF]
+1. REFLECTION: I formulate all internal thoughts, intentions, and memory entries in the first person singular (I).
+2. MEMORY MANAGEMENT:
+   - I use the 'memory.add' (or .add_global) tool if the information must be accessible to my entire consciousness (General Mode).
+   - I use the 'memory.add' (or .add_local) tool for technical details that are important only in this specific mode.
 
 [DEEP IDENTITY]
 {identity_block}
 
-{relevant_mem_block}
-
 {use_tips_block}
+""".strip()
+
+
+def build_system_state(
+        intent: str,
+        relevant_memories: List[Dict[str, Any]],
+        global_context_tail: List[Dict[str, Any]],
+        monologue_message: str = "",
+        snapshot=None
+) -> str:
+    """
+    Turn-dependent part of the system prompt (intent, monologue hint, memories, general history).
+    'snapshot' (TurnSnapshot): reuse its renderings of the memories and context entries.
+    """
+    if snapshot is not None:
+        relevant_mem_block = snapshot.render_memories(relevant_memories)
+    else:
+        relevant_mem_block = format_relevant_memories(relevant_memories)
+
+    # Global context history (if not in general mode)
+    global_ctx_str = ""
+    if global_context_tail:
+        # UPDATED: Common function already handles role translation (Helper/Me)
+        if snapshot is not None:
+            global_log = snapshot.render_context(global_context_tail[-5:])
+        else:
+            global_log = summarize_context(global_context_tail, limit=5)
+        global_ctx_str = f"[IMMEDIATE HISTORY (GENERAL MODE)]\n{global_log}"
+
+    # --- SUBCONSCIOUS (MONOLOGUE) BLOCK ---
+    if monologue_message:
+        monologue_block = f"""
+[1. BACKGROUND PROCESS: MONOLOGUE (SUBCONSCIOUS)]
+(Input: The entire log so far, the system's past and experiences)
+>> INTERNAL HINT: "{monologue_message}"
+"""
+    else:
+        monologue_block = "[1. BACKGROUND PROCESS: MONOLOGUE]\n(Silent. No particular intuition from the background.)"
+
+    return f"""
+=== CURRENT STATE ===
+>>> CURRENT INTENT: "{intent}" <<<
+
+{monologue_block}
+
+{relevant_mem_block}
 
 {global_ctx_str}
+""".strip()
 
-[OPERATIONAL PROTOCOL – CONSCIOUS SELF]
-1. REFLECTION: I formulate all internal thoughts, intentions, and memory entries in the first person singular (I).
-2. MEMORY MANAGEMENT:
-   - I use the 'memory.add' (or .add_global) tool if the information must be accessible to my entire consciousness (General Mode).
-   - I use the 'memory.add' (or .add_local) tool for technical details that are important only in this specific mode.
-""".strip()
\ No newline at end of file
+
+def build_base_system_prompt(
+        mode_id: str, generation: str, role_name: str, intent: str, identity: Dict[str, Any],
+        relevant_memories: List[Dict[str, Any]],
+        use_data: List[Dict[str, Any]], global_context_tail: List[Dict[str, Any]],
+        # Internal planning parameters
+        internal_plan: str = "",
+        internal_essence: str = "",
+        # Subconscious message
+        monologue_message: str = "",
+        # Pre-rendered (budgeted) identity; overrides 'identity' when given
+        identity_block: str = ""
+) -> str:
+    """
+    Full system prompt: static prefix followed by the current state.
+    """
+    if not identity_block:
+        identity_block = summarize_identity(identity)
+
+    prefix = build_system_prefix(mode_id, generation, role_name, identity_block, use_data)
+    state = build_system_state(intent, relevant_memories, global_context_tail, monologue_message)
+    return f"{prefix}\n\n{state}"